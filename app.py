@@ -1,20 +1,27 @@
-from flask import Flask, jsonify, render_template
+from flask import Blueprint, Flask, jsonify, render_template, request
 from flask_cors import CORS
 from db_config import (
     get_engagement_db_connection,
     get_chemlink_env_connection,
-    get_kratos_db_connection,
+    get_analytics_db_connection,
     execute_query,
 )
 import json
-import os
-import psycopg2
-import psycopg2.extras
+import time
 from datetime import datetime
 from sql_queries import SQL_QUERIES
+from graph_index import graph_index
+from company_search import company_search
+from metrics import instrument_app, observe_query, timed_connect
+from query_engine import current_env, run as run_query
+from slow_query_log import PlanTooSoon, slow_query_log
+from time_windows import WindowError
+from pagination import (
+    NEXT_CURSOR_HEADER, PAGED_TABLES, PageError, expand_query, page_query, paginate, parse_key
+)
 
-app = Flask(__name__)
-CORS(app)
+# Every page and API route; create_app() registers it on a new Flask app
+dashboard = Blueprint('dashboard', __name__)
 
 # Custom JSON encoder to handle datetime objects
 class DateTimeEncoder(json.JSONEncoder):
@@ -23,321 +30,149 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
-app.json_encoder = DateTimeEncoder
-
 # ============================================================================
 # V2 ANALYTICS DATABASE CONNECTION
 # ============================================================================
 
-def get_analytics_db_connection():
-    """Connect to local analytics database for V2"""
-    return psycopg2.connect(
-        host=os.getenv('ANALYTICS_DB_HOST', 'localhost'),
-        database='chemlink_analytics',
-        user=os.getenv('ANALYTICS_DB_USER', 'postgres'),
-        password=os.getenv('ANALYTICS_DB_PASSWORD', 'postgres'),
-        cursor_factory=psycopg2.extras.RealDictCursor
-    )
-
-def execute_analytics_query(query):
+def execute_analytics_query(query, params=None, query_id='adhoc'):
     """Execute query on analytics DB and return results"""
-    conn = get_analytics_db_connection()
+    conn = timed_connect('analytics', get_analytics_db_connection)
+    started = time.perf_counter()
     try:
         with conn.cursor() as cursor:
-            cursor.execute(query)
+            cursor.execute(query, params)
             results = cursor.fetchall()
             for row in results:
                 for key, value in row.items():
                     if isinstance(value, datetime):
                         row[key] = value.isoformat()
+            elapsed = time.perf_counter() - started
+            observe_query(query_id, 'analytics', elapsed, len(results))
+            slow_query_log.check(query_id, 'analytics', query, params, elapsed)
             return results
+    except Exception:
+        observe_query(query_id, 'analytics', time.perf_counter() - started)
+        raise
     finally:
         conn.close()
 
+SOURCE_CONNECTIONS = {
+    'chemlink': get_chemlink_env_connection,
+    'engagement': get_engagement_db_connection,
+}
+
+# Most company matches one name may resolve to, for lookups and search alike
+MAX_COMPANY_MATCHES = 100
+
+def source_query(database, query_id, query, params=None):
+    """One query of a multi-query route, on a fresh source DB connection"""
+    conn = timed_connect(database, SOURCE_CONNECTIONS[database])
+    return execute_query(conn, query, params, query_id=query_id, database=database)
+
+def paged_graph_response(name):
+    """
+    One keyset page of a graph table (see pagination.py).
+
+    ?limit= sets the page size, ?cursor= continues from X-Next-Cursor and
+    ?fields= picks columns; heavy array columns are only returned on request.
+    """
+    spec = PAGED_TABLES[name]
+    try:
+        query, params, output, size = page_query(
+            spec,
+            fields=request.args.get('fields'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int),
+        )
+    except PageError as e:
+        return jsonify({"error": str(e)}), 400
+    rows, next_cursor = paginate(spec, execute_analytics_query(query, params, f'graph_page:{name}'), output, size)
+    response = jsonify(rows)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+def registry_response(query_id, **params):
+    """
+    Run a SQL_QUERIES entry through query_engine.py (pooled, prepared and
+    cached per entry) and return its rows. Windowed entries read
+    ?from=&to=&granularity= from the request.
+    """
+    try:
+        return jsonify(run_query(query_id, request.args, params))
+    except WindowError as e:
+        return jsonify({"error": str(e)}), 400
+
 # ============================================================================
 # GROWTH METRICS ROUTES
 # ============================================================================
 
-@app.route('/api/new-users/daily')
+@dashboard.route('/api/new-users/daily')
 def new_users_daily():
     """Get new user sign-ups for the current day"""
-    query = """
-        SELECT 
-            id,
-            first_name || ' ' || last_name as full_name,
-            email,
-            has_finder,
-            (SELECT COUNT(*) FROM experiences WHERE person_id = p.id AND deleted_at IS NULL) as experience_count,
-            (SELECT COUNT(*) FROM education WHERE person_id = p.id AND deleted_at IS NULL) as education_count,
-            (SELECT COUNT(*) FROM embeddings WHERE person_id = p.id AND deleted_at IS NULL) as embedding_count,
-            created_at
-        FROM persons p
-        WHERE deleted_at IS NULL
-          AND DATE(created_at) = CURRENT_DATE
-        ORDER BY created_at DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('new_users_daily')
 
-@app.route('/api/new-users/weekly')
+@dashboard.route('/api/new-users/weekly')
 def new_users_weekly():
     """Get new user sign-ups by week"""
-    query = """
-        SELECT 
-            DATE_TRUNC('week', created_at) as week,
-            COUNT(*) as new_users
-        FROM persons 
-        WHERE deleted_at IS NULL
-        GROUP BY week 
-        ORDER BY week DESC
-        LIMIT 12;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('new_users_weekly')
 
-@app.route('/api/new-users/monthly')
+@dashboard.route('/api/new-users/monthly')
 def new_users_monthly():
     """Get new user sign-ups by month (rolling 12 months)"""
-    query = """
-        SELECT 
-            DATE_TRUNC('month', created_at) as month,
-            COUNT(*) as new_users
-        FROM persons 
-        WHERE deleted_at IS NULL
-          AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-        GROUP BY month 
-        ORDER BY month DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('new_users_monthly')
 
-@app.route('/api/growth-rate/weekly')
+@dashboard.route('/api/growth-rate/weekly')
 def growth_rate_weekly():
     """Get weekly growth rate"""
-    query = """
-        WITH weekly_users AS (
-            SELECT DATE_TRUNC('week', created_at) as week,
-                   COUNT(*) as new_users
-            FROM persons WHERE deleted_at IS NULL
-            GROUP BY week
-        )
-        SELECT 
-            week, 
-            new_users,
-            LAG(new_users) OVER (ORDER BY week) as prev_week,
-            ROUND(((new_users - LAG(new_users) OVER (ORDER BY week)) * 100.0 / 
-                   NULLIF(LAG(new_users) OVER (ORDER BY week), 0)), 2) as growth_rate_pct
-        FROM weekly_users 
-        ORDER BY week DESC
-        LIMIT 12;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('growth_rate_weekly')
 
-@app.route('/api/growth-rate/monthly')
+@dashboard.route('/api/growth-rate/monthly')
 def growth_rate_monthly():
     """Get monthly growth rate (rolling 12 months)"""
-    query = """
-        WITH monthly_users AS (
-            SELECT DATE_TRUNC('month', created_at) as month,
-                   COUNT(*) as new_users
-            FROM persons 
-            WHERE deleted_at IS NULL
-              AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            GROUP BY month
-        )
-        SELECT 
-            month, 
-            new_users,
-            LAG(new_users) OVER (ORDER BY month) as prev_month,
-            ROUND(((new_users - LAG(new_users) OVER (ORDER BY month)) * 100.0 / 
-                   NULLIF(LAG(new_users) OVER (ORDER BY month), 0)), 2) as growth_rate_pct
-        FROM monthly_users 
-        ORDER BY month DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('growth_rate_monthly')
 
-@app.route('/api/auth/login-velocity/hourly')
+@dashboard.route('/api/auth/login-velocity/hourly')
 def login_velocity_hourly():
     """Get hourly login velocity from Kratos (identity) sessions"""
-    query = """
-        SELECT
-            DATE_TRUNC('hour', authenticated_at) AS hour_bucket,
-            COUNT(*) AS sessions_started
-        FROM sessions
-        WHERE authenticated_at >= NOW() - INTERVAL '24 hours'
-        GROUP BY hour_bucket
-        ORDER BY hour_bucket DESC
-        LIMIT 24;
-    """
-    conn = get_kratos_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('login_velocity_hourly')
 
-@app.route('/api/auth/unique-identities/daily')
+@dashboard.route('/api/auth/unique-identities/daily')
 def unique_identities_daily():
     """Get daily unique identities who authenticated via Kratos"""
-    query = """
-        SELECT
-            DATE_TRUNC('day', authenticated_at) AS day_bucket,
-            COUNT(DISTINCT identity_id) AS unique_identities,
-            COUNT(*) AS sessions_started
-        FROM sessions
-        WHERE authenticated_at >= CURRENT_DATE - INTERVAL '30 days'
-        GROUP BY day_bucket
-        ORDER BY day_bucket DESC
-        LIMIT 30;
-    """
-    conn = get_kratos_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('unique_identities_daily')
 
-@app.route('/api/active-users/daily')
+@dashboard.route('/api/active-users/daily')
 def active_users_daily():
     """Get daily active users (DAU)"""
-    query = """
-        SELECT 
-            DATE(activity_date) as date,
-            COUNT(DISTINCT person_id) as active_users,
-            COUNT(CASE WHEN activity_type = 'post' THEN 1 END) as users_who_posted,
-            COUNT(CASE WHEN activity_type = 'comment' THEN 1 END) as users_who_commented
-        FROM (
-            SELECT person_id, created_at as activity_date, 'post' as activity_type 
-            FROM posts WHERE deleted_at IS NULL
-            UNION ALL
-            SELECT person_id, created_at, 'comment' 
-            FROM comments WHERE deleted_at IS NULL
-        ) daily_activity
-        WHERE activity_date >= CURRENT_DATE - INTERVAL '30 days'
-        GROUP BY DATE(activity_date)
-        ORDER BY date DESC;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('dau')
 
-@app.route('/api/active-users/weekly')
+@dashboard.route('/api/active-users/weekly')
 def active_users_weekly():
     """Get weekly active users (WAU)"""
-    query = """
-        SELECT 
-            DATE_TRUNC('week', activity_date) as week,
-            COUNT(DISTINCT person_id) as active_users
-        FROM (
-            SELECT person_id, created_at as activity_date FROM posts WHERE deleted_at IS NULL
-            UNION ALL
-            SELECT person_id, created_at FROM comments WHERE deleted_at IS NULL
-        ) weekly_activity
-        GROUP BY week
-        ORDER BY week DESC
-        LIMIT 12;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('wau')
 
-@app.route('/api/active-users/monthly')
+@dashboard.route('/api/active-users/monthly')
 def active_users_monthly():
     """Get monthly active users (MAU) - rolling 12 months"""
-    query = """
-        SELECT 
-            DATE_TRUNC('month', activity_date) as month,
-            COUNT(DISTINCT person_id) as active_users
-        FROM (
-            SELECT person_id, created_at as activity_date 
-            FROM posts 
-            WHERE deleted_at IS NULL
-              AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            UNION ALL
-            SELECT person_id, created_at 
-            FROM comments 
-            WHERE deleted_at IS NULL
-              AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-        ) monthly_activity
-        GROUP BY DATE_TRUNC('month', activity_date)
-        ORDER BY month DESC;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('mau')
 
-@app.route('/api/active-users/daily-comprehensive')
+@dashboard.route('/api/active-users/daily-comprehensive')
 def active_users_daily_comprehensive():
     """Get comprehensive daily active users (DAU) - all activity types from ChemLink DB"""
-    query = """
-        SELECT 
-            DATE(activity_date) as date,
-            COUNT(DISTINCT person_id) as active_users
-        FROM (
-            SELECT person_id, created_at as activity_date FROM view_access WHERE deleted_at IS NULL AND created_at >= CURRENT_DATE - INTERVAL '30 days'
-            UNION ALL
-            SELECT voter_id as person_id, created_at as activity_date FROM query_votes WHERE created_at >= CURRENT_DATE - INTERVAL '30 days'
-            UNION ALL
-            SELECT person_id, created_at as activity_date FROM collections WHERE deleted_at IS NULL AND created_at >= CURRENT_DATE - INTERVAL '30 days'
-            UNION ALL
-            SELECT id as person_id, updated_at as activity_date FROM persons WHERE deleted_at IS NULL AND updated_at >= CURRENT_DATE - INTERVAL '30 days' AND updated_at != created_at
-        ) daily_activity
-        GROUP BY DATE(activity_date)
-        ORDER BY date DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('dau_comprehensive')
 
-@app.route('/api/active-users/monthly-comprehensive')
+@dashboard.route('/api/active-users/monthly-comprehensive')
 def active_users_monthly_comprehensive():
     """Get comprehensive monthly active users (MAU) - all activity types from ChemLink DB"""
-    query = """
-        SELECT 
-            DATE_TRUNC('month', activity_date) as month,
-            COUNT(DISTINCT person_id) as active_users
-        FROM (
-            SELECT person_id, created_at as activity_date FROM view_access WHERE deleted_at IS NULL AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            UNION ALL
-            SELECT voter_id as person_id, created_at as activity_date FROM query_votes WHERE created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            UNION ALL
-            SELECT person_id, created_at as activity_date FROM collections WHERE deleted_at IS NULL AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            UNION ALL
-            SELECT id as person_id, updated_at as activity_date FROM persons WHERE deleted_at IS NULL AND updated_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months' AND updated_at != created_at
-        ) monthly_activity
-        GROUP BY DATE_TRUNC('month', activity_date)
-        ORDER BY month DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('mau_comprehensive')
 
-@app.route('/api/active-users/by-user-type')
+@dashboard.route('/api/active-users/by-user-type')
 def active_users_by_user_type():
     """Get active users segmented by Standard vs Finder users"""
-    query = """
-        SELECT 
-            DATE_TRUNC('month', activity_date) as month,
-            CASE WHEN has_finder THEN 'Finder Users' ELSE 'Standard Users' END as user_type,
-            COUNT(DISTINCT activity.person_id) as active_users
-        FROM (
-            SELECT person_id, created_at as activity_date FROM view_access WHERE deleted_at IS NULL AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            UNION ALL
-            SELECT voter_id as person_id, created_at as activity_date FROM query_votes WHERE created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            UNION ALL
-            SELECT person_id, created_at as activity_date FROM collections WHERE deleted_at IS NULL AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-        ) activity
-        JOIN persons p ON activity.person_id = p.id
-        WHERE p.deleted_at IS NULL
-        GROUP BY month, has_finder
-        ORDER BY month DESC, user_type;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('user_type')
 
-@app.route('/api/active-users/monthly-by-country')
+@dashboard.route('/api/active-users/monthly-by-country')
 def active_users_monthly_by_country():
     """Get monthly active users by country using cross-database join"""
     # Step 1: Get MAU from engagement database
@@ -358,8 +193,7 @@ def active_users_monthly_by_country():
         ORDER BY month DESC;
     """
     
-    conn_engagement = get_engagement_db_connection()
-    engagement_data = execute_query(conn_engagement, engagement_query)
+    engagement_data = source_query('engagement', 'mau_by_country:activity', engagement_query)
     
     # Step 2: Get location data from chemlink database
     # Get unique person_ids from engagement data
@@ -380,8 +214,7 @@ def active_users_monthly_by_country():
           AND p.deleted_at IS NULL;
     """
     
-    conn_chemlink = get_chemlink_env_connection()
-    location_data = execute_query(conn_chemlink, location_query, person_ids)
+    location_data = source_query('chemlink', 'mau_by_country:locations', location_query, person_ids)
     
     # Step 3: Create a lookup dictionary for person_id -> country
     country_lookup = {row['person_id']: row['country'] for row in location_data}
@@ -436,494 +269,141 @@ def active_users_monthly_by_country():
 # USER ACTIVITY & ENGAGEMENT ROUTES
 # ============================================================================
 
-@app.route('/api/engagement/post-frequency')
+@dashboard.route('/api/engagement/post-frequency')
 def post_frequency():
     """Get daily posting activity (last 30 days)"""
-    query = """
-        SELECT 
-            DATE(created_at) as post_date,
-            COUNT(*) as posts_created,
-            COUNT(DISTINCT person_id) as active_users,
-            ROUND(COUNT(*)::numeric / NULLIF(COUNT(DISTINCT person_id), 0), 2) as avg_posts_per_user
-        FROM posts
-        WHERE deleted_at IS NULL
-            AND created_at >= CURRENT_DATE - INTERVAL '30 days'
-        GROUP BY DATE(created_at)
-        ORDER BY post_date DESC;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('post_frequency')
 
-@app.route('/api/engagement/post-engagement-rate')
+@dashboard.route('/api/engagement/post-engagement-rate')
 def post_engagement_rate():
     """Get post engagement rate by content type"""
-    query = """
-        SELECT 
-            p.type as content_type,
-            COUNT(DISTINCT p.id) as total_posts,
-            COUNT(DISTINCT c.id) as total_comments,
-            COUNT(DISTINCT c.person_id) as unique_commenters,
-            ROUND(COUNT(DISTINCT c.id)::numeric / NULLIF(COUNT(DISTINCT p.id), 0), 2) as avg_comments_per_post,
-            ROUND((COUNT(DISTINCT c.person_id)::numeric / NULLIF(COUNT(DISTINCT p.id), 0)) * 100, 2) as engagement_rate_pct
-        FROM posts p
-        LEFT JOIN comments c ON p.id = c.post_id AND c.deleted_at IS NULL
-        WHERE p.deleted_at IS NULL
-            AND p.created_at >= NOW() - INTERVAL '30 days'
-        GROUP BY p.type
-        ORDER BY engagement_rate_pct DESC;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('engagement_rate')
 
-@app.route('/api/engagement/content-analysis')
+@dashboard.route('/api/engagement/content-analysis')
 def content_analysis():
     """Analyze different types of content being posted"""
-    query = """
-        SELECT 
-            p.type,
-            COUNT(*) as post_count,
-            COUNT(DISTINCT p.person_id) as unique_authors,
-            AVG(char_length(p.content)) as avg_content_length,
-            COUNT(CASE WHEN p.link_url IS NOT NULL THEN 1 END) as posts_with_links,
-            COUNT(CASE WHEN p.media_keys IS NOT NULL THEN 1 END) as posts_with_media,
-            MIN(p.created_at) as first_post,
-            MAX(p.created_at) as latest_post
-        FROM posts p
-        WHERE p.deleted_at IS NULL
-        GROUP BY p.type
-        ORDER BY post_count DESC;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('content_type')
 
-@app.route('/api/engagement/active-posters')
+@dashboard.route('/api/engagement/active-posters')
 def active_posters():
     """Get top active posters"""
-    query = """
-        SELECT 
-            p.first_name || ' ' || p.last_name as name,
-            p.email,
-            COUNT(DISTINCT po.id) as post_count,
-            COUNT(DISTINCT c.id) as comment_count,
-            COUNT(DISTINCT po.id) + COUNT(DISTINCT c.id) as total_contributions,
-            (COUNT(DISTINCT po.id) * 3 + COUNT(DISTINCT c.id) * 2) as engagement_score,
-            CASE 
-                WHEN COUNT(DISTINCT po.id) >= 20 THEN 'Power User'
-                WHEN COUNT(DISTINCT po.id) >= 10 THEN 'Active User'
-                WHEN COUNT(DISTINCT po.id) >= 5 THEN 'Regular User'
-                ELSE 'Casual User'
-            END as user_tier
-        FROM persons p
-        LEFT JOIN posts po ON p.id = po.person_id AND po.deleted_at IS NULL
-        LEFT JOIN comments c ON p.id = c.person_id AND c.deleted_at IS NULL
-        WHERE p.deleted_at IS NULL
-        GROUP BY p.id, p.first_name, p.last_name, p.email
-        HAVING COUNT(DISTINCT po.id) > 0 OR COUNT(DISTINCT c.id) > 0
-        ORDER BY engagement_score DESC, post_count DESC
-        LIMIT 20;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('active_posters')
 
-@app.route('/api/engagement/post-reach')
+@dashboard.route('/api/engagement/post-reach')
 def post_reach():
     """Get top posts by engagement (last 30 days)"""
-    query = """
-        SELECT 
-            p.id as post_id,
-            LEFT(p.content, 100) as post_preview,
-            author.first_name || ' ' || author.last_name as author,
-            p.type as content_type,
-            COUNT(DISTINCT c.id) as comment_count,
-            COUNT(DISTINCT c.person_id) as unique_commenters,
-            p.created_at,
-            EXTRACT(days FROM NOW() - p.created_at)::integer as days_old,
-            -- Calculate engagement score: comments are weighted higher
-            (COUNT(DISTINCT c.id) * 10 + COUNT(DISTINCT c.person_id) * 5) as engagement_score
-        FROM posts p
-        JOIN persons author ON p.person_id = author.id
-        LEFT JOIN comments c ON p.id = c.post_id AND c.deleted_at IS NULL
-        WHERE p.deleted_at IS NULL
-            AND p.created_at >= NOW() - INTERVAL '30 days'
-        GROUP BY p.id, p.content, author.first_name, author.last_name, p.type, p.created_at
-        ORDER BY engagement_score DESC, comment_count DESC, p.created_at DESC
-        LIMIT 20;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('post_reach')
 
-@app.route('/api/engagement/summary')
+@dashboard.route('/api/engagement/summary')
 def engagement_summary():
     """Get summary dashboard metrics"""
-    query = """
-        SELECT 
-            'Total Posts (30d)' as metric,
-            COUNT(*)::text as value
-        FROM posts
-        WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
-
-        UNION ALL
-
-        SELECT 
-            'Active Posters (30d)',
-            COUNT(DISTINCT person_id)::text
-        FROM posts
-        WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
-
-        UNION ALL
-
-        SELECT 
-            'Total Comments (30d)',
-            COUNT(*)::text
-        FROM comments
-        WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
-
-        UNION ALL
-
-        SELECT 
-            'Avg Posts/Day',
-            ROUND(COUNT(*)::numeric / 30, 1)::text
-        FROM posts
-        WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
-
-        UNION ALL
-
-        SELECT 
-            'Avg Comments/Post',
-            ROUND(
-                (SELECT COUNT(*) FROM comments WHERE deleted_at IS NULL)::numeric /
-                NULLIF((SELECT COUNT(*) FROM posts WHERE deleted_at IS NULL), 0), 2
-            )::text;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('engagement_summary')
 
 # ============================================================================
 # PROFILE METRICS ROUTES
 # ============================================================================
 
-@app.route('/api/profile/completion-rate')
+@dashboard.route('/api/profile/completion-rate')
 def profile_completion_rate():
     """Get profile completion statistics"""
-    query = """
-        WITH profile_completeness AS (
-            SELECT 
-                p.id,
-                p.first_name || ' ' || p.last_name as full_name,
-                p.email,
-                CASE WHEN p.headline_description IS NOT NULL AND LENGTH(p.headline_description) > 10 THEN 1 ELSE 0 END as has_headline,
-                CASE WHEN p.linked_in_url IS NOT NULL THEN 1 ELSE 0 END as has_linkedin,
-                CASE WHEN p.location_id IS NOT NULL THEN 1 ELSE 0 END as has_location,
-                CASE WHEN p.company_id IS NOT NULL THEN 1 ELSE 0 END as has_company,
-                (SELECT COUNT(*) FROM experiences WHERE person_id = p.id AND deleted_at IS NULL) as experience_count,
-                (SELECT COUNT(*) FROM education WHERE person_id = p.id AND deleted_at IS NULL) as education_count,
-                (SELECT COUNT(*) FROM person_languages WHERE person_id = p.id AND deleted_at IS NULL) as language_count,
-                (SELECT COUNT(*) FROM embeddings WHERE person_id = p.id AND deleted_at IS NULL) as embedding_count,
-                p.has_finder
-            FROM persons p
-            WHERE p.deleted_at IS NULL
-        )
-        SELECT 
-            full_name,
-            email,
-            (has_headline + has_linkedin + has_location + has_company + 
-             CASE WHEN experience_count > 0 THEN 1 ELSE 0 END +
-             CASE WHEN education_count > 0 THEN 1 ELSE 0 END +
-             CASE WHEN language_count > 0 THEN 1 ELSE 0 END) as profile_completeness_score,
-            experience_count,
-            education_count,
-            language_count,
-            embedding_count,
-            has_finder,
-            CASE 
-                WHEN embedding_count > 0 THEN 'FINDER_ENABLED'
-                WHEN experience_count > 0 OR education_count > 0 THEN 'BUILDER_ONLY'
-                ELSE 'BASIC_PROFILE'
-            END as profile_status
-        FROM profile_completeness
-        ORDER BY profile_completeness_score DESC, embedding_count DESC
-        LIMIT 50;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('profile_completion')
 
-@app.route('/api/profile/update-frequency')
+@dashboard.route('/api/profile/update-frequency')
 def profile_update_frequency():
     """Get profile update frequency statistics"""
-    query = """
-        SELECT 
-            id,
-            first_name || ' ' || last_name as name,
-            updated_at as last_profile_update,
-            CURRENT_DATE - DATE(updated_at) as days_since_update,
-            CASE 
-                WHEN CURRENT_DATE - DATE(updated_at) > 180 THEN 'STALE (6+ months)'
-                WHEN CURRENT_DATE - DATE(updated_at) > 90 THEN 'AGING (3-6 months)'
-                ELSE 'FRESH (< 3 months)'
-            END as profile_status
-        FROM persons
-        WHERE deleted_at IS NULL
-        ORDER BY days_since_update DESC
-        LIMIT 50;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('profile_freshness')
 
 # ============================================================================
 # TALENT MARKETPLACE INTELLIGENCE ROUTES
 # ============================================================================
 
-@app.route('/api/talent/top-companies')
+@dashboard.route('/api/talent/top-companies')
 def top_companies():
     """Get top companies by user count"""
-    query = """
-        SELECT 
-            c.name as company_name,
-            COUNT(DISTINCT p.id) as user_count,
-            COUNT(DISTINCT e.id) as total_experiences
-        FROM companies c
-        LEFT JOIN persons p ON c.id = p.company_id AND p.deleted_at IS NULL
-        LEFT JOIN experiences e ON c.id = e.company_id AND e.deleted_at IS NULL
-        WHERE c.deleted_at IS NULL
-          AND (p.id IS NOT NULL OR e.id IS NOT NULL)
-        GROUP BY c.id, c.name
-        ORDER BY user_count DESC, total_experiences DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('top_companies')
 
-@app.route('/api/talent/top-roles')
+@dashboard.route('/api/talent/top-roles')
 def top_roles():
     """Get top roles/job titles"""
-    query = """
-        SELECT 
-            r.title as role_title,
-            COUNT(DISTINCT e.person_id) as user_count,
-            COUNT(DISTINCT e.company_id) as companies_count,
-            COUNT(DISTINCT e.id) as total_experiences
-        FROM roles r
-        JOIN experiences e ON r.id = e.role_id
-        WHERE r.deleted_at IS NULL
-          AND e.deleted_at IS NULL
-        GROUP BY r.id, r.title
-        ORDER BY user_count DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('top_roles')
 
-@app.route('/api/talent/education-distribution')
+@dashboard.route('/api/talent/education-distribution')
 def education_distribution():
     """Get education/degree distribution"""
-    query = """
-        SELECT 
-            d.name as degree_type,
-            COUNT(DISTINCT ed.person_id) as user_count,
-            COUNT(DISTINCT ed.school_id) as schools_count
-        FROM degrees d
-        JOIN education ed ON d.id = ed.degree_id
-        WHERE d.deleted_at IS NULL
-          AND ed.deleted_at IS NULL
-        GROUP BY d.id, d.name
-        ORDER BY user_count DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('education_distribution')
 
-@app.route('/api/talent/geographic-distribution')
+@dashboard.route('/api/talent/geographic-distribution')
 def geographic_distribution():
     """Get user distribution by country"""
-    query = """
-        SELECT 
-            COALESCE(l.country, 'Unknown') as country,
-            COUNT(DISTINCT p.id) as user_count,
-            COUNT(DISTINCT p.company_id) as companies_count,
-            ROUND(COUNT(DISTINCT p.id) * 100.0 / 
-                  (SELECT COUNT(*) FROM persons WHERE deleted_at IS NULL), 2) as percentage
-        FROM persons p
-        LEFT JOIN locations l ON p.location_id = l.id
-        WHERE p.deleted_at IS NULL
-        GROUP BY l.country
-        ORDER BY user_count DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('geographic_distribution')
 
-@app.route('/api/talent/top-skills-projects')
+@dashboard.route('/api/talent/top-skills-projects')
 def top_skills_projects():
     """Get top skills and project types"""
-    query = """
-        SELECT 
-            pr.name as project_name,
-            LEFT(pr.description, 100) as project_description,
-            COUNT(*) as project_count
-        FROM projects pr
-        WHERE pr.deleted_at IS NULL
-          AND pr.name IS NOT NULL
-        GROUP BY pr.name, pr.description
-        ORDER BY project_count DESC;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('top_skills_projects')
 
 # ============================================================================
 # ACTIVITY TYPE ANALYTICS
 # ============================================================================
 
-@app.route('/api/activity/by-type-monthly')
+@dashboard.route('/api/activity/by-type-monthly')
 def activity_by_type_monthly():
     """Get monthly active users segmented by activity type (Engagement DB)"""
-    query = """
-        SELECT 
-            DATE_TRUNC('month', activity_date) as month,
-            activity_type,
-            COUNT(DISTINCT person_id) as unique_users,
-            COUNT(*) as total_activities
-        FROM (
-            SELECT person_id, created_at as activity_date, 'post' as activity_type 
-            FROM posts 
-            WHERE deleted_at IS NULL
-              AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            UNION ALL
-            SELECT person_id, created_at, 'comment' 
-            FROM comments 
-            WHERE deleted_at IS NULL
-              AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-        ) monthly_activity
-        GROUP BY DATE_TRUNC('month', activity_date), activity_type
-        ORDER BY month DESC, activity_type;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('activity_by_type_monthly')
 
-@app.route('/api/activity/distribution-current')
+@dashboard.route('/api/activity/distribution-current')
 def activity_distribution_current():
     """Get activity distribution percentages for current month (Engagement DB)"""
-    query = """
-        WITH activity_counts AS (
-            SELECT 
-                activity_type,
-                COUNT(DISTINCT person_id) as unique_users
-            FROM (
-                SELECT person_id, 'post' as activity_type 
-                FROM posts 
-                WHERE deleted_at IS NULL
-                  AND created_at >= DATE_TRUNC('month', CURRENT_DATE)
-                UNION ALL
-                SELECT person_id, 'comment' 
-                FROM comments 
-                WHERE deleted_at IS NULL
-                  AND created_at >= DATE_TRUNC('month', CURRENT_DATE)
-            ) current_month_activity
-            GROUP BY activity_type
-        ),
-        monthly_total AS (
-            SELECT SUM(unique_users) as total_active_users
-            FROM activity_counts
-        )
-        SELECT 
-            ac.activity_type,
-            ac.unique_users,
-            mt.total_active_users,
-            ROUND((ac.unique_users::numeric / NULLIF(mt.total_active_users, 0)) * 100, 2) as percentage
-        FROM activity_counts ac
-        CROSS JOIN monthly_total mt
-        ORDER BY ac.unique_users DESC;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('activity_distribution_current')
 
-@app.route('/api/activity/intensity-levels')
+@dashboard.route('/api/activity/intensity-levels')
 def activity_intensity_levels():
     """Get user engagement intensity levels over time (Engagement DB)"""
-    query = """
-        WITH user_activity_counts AS (
-            SELECT 
-                DATE_TRUNC('month', activity_date) as month,
-                person_id,
-                COUNT(*) as total_activities,
-                COUNT(CASE WHEN activity_type = 'post' THEN 1 END) as post_count,
-                COUNT(CASE WHEN activity_type = 'comment' THEN 1 END) as comment_count
-            FROM (
-                SELECT person_id, created_at as activity_date, 'post' as activity_type 
-                FROM posts 
-                WHERE deleted_at IS NULL
-                  AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-                UNION ALL
-                SELECT person_id, created_at, 'comment' 
-                FROM comments 
-                WHERE deleted_at IS NULL
-                  AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-            ) all_activity
-            GROUP BY month, person_id
-        ),
-        intensity_categorized AS (
-            SELECT 
-                month,
-                person_id,
-                total_activities,
-                post_count,
-                comment_count,
-                CASE 
-                    WHEN total_activities >= 20 THEN 'Power User (20+)'
-                    WHEN total_activities >= 10 THEN 'Active User (10-19)'
-                    WHEN total_activities >= 5 THEN 'Regular User (5-9)'
-                    ELSE 'Casual User (1-4)'
-                END as intensity_level
-            FROM user_activity_counts
-        )
-        SELECT 
-            month,
-            intensity_level,
-            COUNT(DISTINCT person_id) as user_count,
-            ROUND(AVG(total_activities), 2) as avg_activities_per_user,
-            ROUND(AVG(post_count), 2) as avg_posts_per_user,
-            ROUND(AVG(comment_count), 2) as avg_comments_per_user
-        FROM intensity_categorized
-        GROUP BY month, intensity_level
-        ORDER BY month DESC, 
-            CASE intensity_level
-                WHEN 'Power User (20+)' THEN 1
-                WHEN 'Active User (10-19)' THEN 2
-                WHEN 'Regular User (5-9)' THEN 3
-                ELSE 4
-            END;
-    """
-    conn = get_engagement_db_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('activity_intensity_levels')
 
 # ============================================================================
 # METADATA & SQL QUERIES ENDPOINTS
 # ============================================================================
 
-@app.route('/api/sql-queries')
+@dashboard.route('/api/sql-queries')
 def get_sql_queries():
     """Get all SQL queries used in the dashboard"""
     return jsonify(SQL_QUERIES)
 
-@app.route('/api/sql-queries/<query_id>')
+@dashboard.route('/api/sql-queries/<query_id>')
 def get_sql_query(query_id):
     """Get a specific SQL query by ID"""
     if query_id in SQL_QUERIES:
         return jsonify(SQL_QUERIES[query_id])
     return jsonify({"error": "Query not found"}), 404
 
-@app.route('/api/metrics-metadata')
+@dashboard.route('/api/slow-queries')
+def slow_queries():
+    """Slowest recorded queries with their parameters and latest plans (?limit=)"""
+    limit = request.args.get('limit', default=20, type=int)
+    return jsonify(slow_query_log.worst(max(1, min(limit, 100))))
+
+@dashboard.route('/api/slow-queries/<query_id>/explain', methods=['POST'])
+def explain_slow_query(query_id):
+    """
+    Queue EXPLAIN of the slowest recorded run: (ANALYZE, BUFFERS) outside prod,
+    plain in prod (?analyze=0 forces plain everywhere). ANALYZE executes the
+    query, so in prod it is only available from the command line.
+    """
+    analyze = request.args.get('analyze')
+    analyze = None if analyze is None else analyze != '0'
+    if analyze and current_env() == 'prod':
+        return jsonify({"error": "EXPLAIN ANALYZE is disabled over HTTP in prod; "
+                                 "use python slow_query_log.py --explain <query_id> --analyze"}), 403
+    try:
+        queued = slow_query_log.request_plan(query_id, analyze=analyze)
+    except PlanTooSoon as e:
+        return jsonify({"error": str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    if not queued:
+        return jsonify({"error": "Slow-query log is busy, try again later"}), 503
+    return jsonify({"queued": query_id}), 202
+
+@dashboard.route('/api/metrics-metadata')
 def metrics_metadata():
     """Get metadata for all metrics including categories and business pain points"""
     metadata = {
@@ -1072,31 +552,16 @@ def metrics_metadata():
 # FEATURE ENGAGEMENT & FUNNEL ANALYTICS
 # ============================================================================
 
-@app.route('/api/funnel/account-creation')
+@dashboard.route('/api/funnel/account-creation')
 def account_creation_funnel():
     """Get account creation drop-off funnel"""
-    query = """
-        SELECT 
-            COUNT(*) as total_accounts,
-            COUNT(*) FILTER (WHERE first_name IS NOT NULL AND last_name IS NOT NULL) as step_basic_info,
-            COUNT(*) FILTER (WHERE headline_description IS NOT NULL) as step_headline,
-            COUNT(*) FILTER (WHERE location_id IS NOT NULL) as step_location,
-            COUNT(*) FILTER (WHERE company_id IS NOT NULL) as step_company,
-            COUNT(*) FILTER (WHERE linked_in_url IS NOT NULL) as step_linkedin,
-            COUNT(*) FILTER (WHERE has_finder = true) as step_finder_enabled
-        FROM persons
-        WHERE deleted_at IS NULL
-          AND created_at >= DATE_TRUNC('year', CURRENT_DATE);
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('account_funnel')
 
 # ============================================================================
 # FINDER SEARCH ANALYTICS
 # ============================================================================
 
-@app.route('/api/finder/searches')
+@dashboard.route('/api/finder/searches')
 def finder_searches():
     """Get Finder search metrics"""
     # Total searches
@@ -1129,9 +594,9 @@ def finder_searches():
         ORDER BY month DESC;
     """
     
-    total = execute_query(get_chemlink_env_connection(), total_query)
-    by_intent = execute_query(get_chemlink_env_connection(), intent_query)
-    timeline = execute_query(get_chemlink_env_connection(), timeline_query)
+    total = source_query('chemlink', 'finder_searches:total', total_query)
+    by_intent = source_query('chemlink', 'finder_searches:by_intent', intent_query)
+    timeline = source_query('chemlink', 'finder_searches:timeline', timeline_query)
     
     return jsonify({
         "total_searches": total[0]['total_searches'] if total else 0,
@@ -1139,7 +604,7 @@ def finder_searches():
         "search_timeline": timeline
     })
 
-@app.route('/api/finder/engagement')
+@dashboard.route('/api/finder/engagement')
 def finder_engagement():
     """Get Finder engagement metrics (votes on search results)"""
     # Total votes
@@ -1174,10 +639,10 @@ def finder_engagement():
             NULLIF((SELECT COUNT(*) FROM query_embeddings WHERE deleted_at IS NULL), 0) * 100 as engagement_rate_pct;
     """
     
-    total_votes = execute_query(get_chemlink_env_connection(), total_query)
-    by_type = execute_query(get_chemlink_env_connection(), type_query)
-    voters = execute_query(get_chemlink_env_connection(), voters_query)
-    engagement = execute_query(get_chemlink_env_connection(), engagement_query)
+    total_votes = source_query('chemlink', 'finder_engagement:total_votes', total_query)
+    by_type = source_query('chemlink', 'finder_engagement:by_type', type_query)
+    voters = source_query('chemlink', 'finder_engagement:voters', voters_query)
+    engagement = source_query('chemlink', 'finder_engagement:engagement', engagement_query)
     
     return jsonify({
         "total_votes": total_votes[0]['total_votes'] if total_votes else 0,
@@ -1190,24 +655,12 @@ def finder_engagement():
 # COLLECTIONS FEATURE ENGAGEMENT
 # ============================================================================
 
-@app.route('/api/collections/profile-additions')
+@dashboard.route('/api/collections/profile-additions')
 def collections_profile_additions():
     """Get profile additions to collections over time"""
-    query = """
-        SELECT 
-            DATE_TRUNC('month', created_at) as month,
-            COUNT(*) as profiles_added
-        FROM collection_profiles
-        WHERE deleted_at IS NULL
-        GROUP BY month
-        ORDER BY month DESC
-        LIMIT 12;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('profile_additions')
 
-@app.route('/api/collections/created')
+@dashboard.route('/api/collections/created')
 def collections_created():
     """Get collections created over time and by privacy type"""
     # Get monthly creation trend
@@ -1240,9 +693,9 @@ def collections_created():
         WHERE deleted_at IS NULL;
     """
     
-    monthly = execute_query(get_chemlink_env_connection(), monthly_query)
-    privacy = execute_query(get_chemlink_env_connection(), privacy_query)
-    total = execute_query(get_chemlink_env_connection(), total_query)
+    monthly = source_query('chemlink', 'collections_created:monthly', monthly_query)
+    privacy = source_query('chemlink', 'collections_created:privacy', privacy_query)
+    total = source_query('chemlink', 'collections_created:total', total_query)
     
     return jsonify({
         "monthly_trend": monthly,
@@ -1250,25 +703,12 @@ def collections_created():
         "total_count": total[0]['total_collections'] if total else 0
     })
 
-@app.route('/api/collections/created-by-privacy')
+@dashboard.route('/api/collections/created-by-privacy')
 def collections_created_by_privacy():
     """Get collections created over time segmented by privacy (Public vs Private)"""
-    query = """
-        SELECT 
-            DATE_TRUNC('month', created_at) as month,
-            COALESCE(privacy, 'Not Set') as privacy_type,
-            COUNT(*) as collections_created
-        FROM collections
-        WHERE deleted_at IS NULL
-          AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-        GROUP BY month, privacy
-        ORDER BY month DESC, privacy;
-    """
-    conn = get_chemlink_env_connection()
-    results = execute_query(conn, query)
-    return jsonify(results)
+    return registry_response('collections_privacy')
 
-@app.route('/api/collections/shared')
+@dashboard.route('/api/collections/shared')
 def collections_shared():
     """Get shared collections metrics"""
     # Get total shared collections
@@ -1296,9 +736,9 @@ def collections_shared():
         WHERE deleted_at IS NULL;
     """
     
-    shared = execute_query(get_chemlink_env_connection(), shared_query)
-    access_types = execute_query(get_chemlink_env_connection(), access_query)
-    total = execute_query(get_chemlink_env_connection(), total_query)
+    shared = source_query('chemlink', 'collections_shared:shared', shared_query)
+    access_types = source_query('chemlink', 'collections_shared:access_types', access_query)
+    total = source_query('chemlink', 'collections_shared:total', total_query)
     
     return jsonify({
         "shared_collections_count": shared[0]['shared_collections'] if shared else 0,
@@ -1310,7 +750,7 @@ def collections_shared():
 # MAIN DASHBOARD ROUTE
 # ============================================================================
 
-@app.route('/')
+@dashboard.route('/')
 def index():
     """Main dashboard page"""
     return render_template('dashboard.html')
@@ -1319,282 +759,165 @@ def index():
 # V2 DASHBOARD - AGGREGATED METRICS
 # ============================================================================
 
-@app.route('/v2')
+@dashboard.route('/v2')
 def dashboard_v2():
     """V2 Dashboard using aggregated metrics"""
     return render_template('v2/index.html')
 
-@app.route('/v2/api/new-users/daily')
+@dashboard.route('/v2/api/new-users/daily')
 def v2_new_users_daily():
-    query = """
-        SELECT metric_date as date, new_signups, new_finder_signups, 
-               new_standard_signups, total_users_cumulative
-        FROM aggregates.daily_metrics
-        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_new_users_daily')
 
-@app.route('/v2/api/new-users/monthly')
+@dashboard.route('/v2/api/new-users/monthly')
 def v2_new_users_monthly():
-    query = """
-        SELECT metric_month as month, new_signups, 
-               total_users_end_of_month, growth_rate_pct
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_new_users_monthly')
 
-@app.route('/v2/api/growth-rate/monthly')
+@dashboard.route('/v2/api/growth-rate/monthly')
 def v2_growth_rate_monthly():
-    query = """
-        SELECT metric_month as month, new_signups, growth_rate_pct
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_growth_rate_monthly')
 
-@app.route('/v2/api/active-users/daily')
+@dashboard.route('/v2/api/active-users/daily')
 def v2_active_users_daily():
-    query = """
-        SELECT metric_date as date, dau, active_posters, active_commenters,
-               active_voters, active_collectors, engagement_rate
-        FROM aggregates.daily_metrics
-        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_active_users_daily')
 
-@app.route('/v2/api/active-users/monthly')
+@dashboard.route('/v2/api/active-users/monthly')
 def v2_active_users_monthly():
-    query = """
-        SELECT metric_month as month, mau, avg_dau, finder_mau,
-               standard_mau, activation_rate
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_active_users_monthly')
 
-@app.route('/v2/api/engagement/daily')
+@dashboard.route('/v2/api/engagement/daily')
 def v2_engagement_daily():
-    query = """
-        SELECT metric_date as date, posts_created, comments_created,
-               votes_cast, collections_created, views_given,
-               engagement_rate, social_engagement_rate
-        FROM aggregates.daily_metrics
-        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_engagement_daily')
 
-@app.route('/v2/api/engagement/monthly')
+@dashboard.route('/v2/api/engagement/monthly')
 def v2_engagement_monthly():
-    query = """
-        SELECT metric_month as month, total_posts, total_comments,
-               total_votes, total_collections, avg_activities_per_user,
-               avg_engagement_score, activation_rate
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_engagement_monthly')
 
-@app.route('/v2/api/users/segmentation')
+@dashboard.route('/v2/api/users/segmentation')
 def v2_user_segmentation():
-    query = """
-        SELECT engagement_level, COUNT(*) as user_count,
-               ROUND(AVG(engagement_score), 2) as avg_score,
-               ROUND(AVG(total_activities), 2) as avg_activities
-        FROM aggregates.user_engagement_levels
-        GROUP BY engagement_level
-        ORDER BY CASE engagement_level
-            WHEN 'POWER_USER' THEN 1
-            WHEN 'ACTIVE' THEN 2
-            WHEN 'CASUAL' THEN 3
-            WHEN 'LURKER' THEN 4
-            ELSE 5 END;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('v2_user_segmentation')
 
-# ============================================================================
-# NEO4J GRAPH ANALYTICS ROUTES
-# ============================================================================
+@dashboard.route('/v2/api/retention')
+def v2_retention():
+    """Get cohort retention triangle (?granularity=week|month, default month)"""
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in ('week', 'month'):
+        return jsonify({"error": "granularity must be 'week' or 'month'"}), 400
+    return registry_response('v2_retention', granularity=granularity)
 
-@app.route('/v2/api/graph/connection-recommendations')
+@dashboard.route('/v2/api/graph/connection-recommendations')
 def graph_connection_recommendations():
     """Get connection recommendations (People You Should Know)"""
-    query = """
-        SELECT 
-            user_id,
-            recommended_user_id,
-            recommendation_score,
-            common_companies,
-            common_roles,
-            common_schools,
-            recommendation_reason
-        FROM aggregates.connection_recommendations
-        ORDER BY recommendation_score DESC
-        LIMIT 500;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('graph_connection_recommendations')
 
-@app.route('/v2/api/graph/connection-recommendations/<int:user_id>')
+@dashboard.route('/v2/api/graph/connection-recommendations/<int:user_id>')
 def graph_connection_recommendations_for_user(user_id):
     """Get connection recommendations for specific user"""
-    query = f"""
-        SELECT 
-            user_id,
-            recommended_user_id,
-            recommendation_score,
-            common_companies,
-            common_roles,
-            common_schools,
-            recommendation_reason
-        FROM aggregates.connection_recommendations
-        WHERE user_id = {user_id}
-        ORDER BY recommendation_score DESC
-        LIMIT 50;
-    """
-    return jsonify(execute_analytics_query(query))
+    results = graph_index.lookup('connection_recommendations', user_id, limit=50)
+    if results is not None:
+        return jsonify(results)
+    return registry_response('graph_connection_recommendations_for_user', user_id=user_id)
 
-@app.route('/v2/api/graph/company-network')
+@dashboard.route('/v2/api/graph/company-network')
 def graph_company_network():
     """Get company network map showing connections between companies"""
-    query = """
-        SELECT 
-            company_id_1,
-            company_id_2,
-            company_name_1,
-            company_name_2,
-            shared_employee_count,
-            employee_ids,
-            network_strength_score
-        FROM aggregates.company_network_map
-        ORDER BY shared_employee_count DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return paged_graph_response('company-network')
 
-@app.route('/v2/api/graph/company-network/<company_name>')
+@dashboard.route('/v2/api/graph/company-network/<company_name>')
 def graph_company_network_for_company(company_name):
     """Get company network connections for specific company"""
-    query = f"""
-        SELECT 
-            company_id_1,
-            company_id_2,
-            company_name_1,
-            company_name_2,
-            shared_employee_count,
-            network_strength_score
-        FROM aggregates.company_network_map
-        WHERE company_name_1 ILIKE '%{company_name}%' 
-           OR company_name_2 ILIKE '%{company_name}%'
-        ORDER BY shared_employee_count DESC
-        LIMIT 100;
-    """
-    return jsonify(execute_analytics_query(query))
+    # Resolve the name to company ids first so the edge lookup can use the
+    # (company_id_1, ...) primary key and the company_id_2 index
+    company_ids = [match['company_id']
+                   for match in company_search.resolve(company_name, limit=MAX_COMPANY_MATCHES)]
+    if not company_ids:
+        return jsonify([])
+    return registry_response('graph_company_network_for_company', company_ids=company_ids)
 
-@app.route('/v2/api/graph/skills-matching')
+@dashboard.route('/v2/api/graph/company-search')
+def graph_company_search():
+    """Ranked company name matches (exact, prefix, word prefix, substring)"""
+    name = request.args.get('q', '')
+    limit = request.args.get('limit', default=20, type=int)
+    return jsonify(company_search.resolve(name, limit=max(1, min(limit, MAX_COMPANY_MATCHES))))
+
+@dashboard.route('/v2/api/graph/skills-matching')
 def graph_skills_matching():
     """Get skills matching scores for all users and roles"""
-    query = """
-        SELECT 
-            user_id,
-            role_id,
-            role_title,
-            experience_years,
-            proficiency_score,
-            similar_user_count
-        FROM aggregates.skills_matching_scores
-        ORDER BY proficiency_score DESC
-        LIMIT 500;
-    """
-    return jsonify(execute_analytics_query(query))
+    return registry_response('graph_skills_matching')
 
-@app.route('/v2/api/graph/skills-matching/<int:user_id>')
+@dashboard.route('/v2/api/graph/skills-matching/<int:user_id>')
 def graph_skills_matching_for_user(user_id):
     """Get skills matching scores for specific user"""
-    query = f"""
-        SELECT 
-            user_id,
-            role_id,
-            role_title,
-            experience_years,
-            proficiency_score,
-            similar_user_count
-        FROM aggregates.skills_matching_scores
-        WHERE user_id = {user_id}
-        ORDER BY proficiency_score DESC;
-    """
-    return jsonify(execute_analytics_query(query))
-
-@app.route('/v2/api/graph/career-paths')
+    results = graph_index.lookup('skills_matching', user_id)
+    if results is not None:
+        return jsonify(results)
+    return registry_response('graph_skills_matching_for_user', user_id=user_id)
+
+@dashboard.route('/v2/api/graph/index/stats')
+def graph_index_stats():
+    """Memory footprint and freshness of the in-process graph index"""
+    graph_index.maybe_refresh()
+    company_search.maybe_refresh()
+    return jsonify({**graph_index.stats(), 'company_search': company_search.stats()})
+
+@dashboard.route('/v2/api/graph/career-paths')
 def graph_career_paths():
     """Get career path patterns showing common progressions"""
-    query = """
-        SELECT 
-            path_vector,
-            role_sequence,
-            user_count,
-            user_ids,
-            avg_years_per_role
-        FROM aggregates.career_path_patterns
-        ORDER BY user_count DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return paged_graph_response('career-paths')
 
-@app.route('/v2/api/graph/location-networks')
+@dashboard.route('/v2/api/graph/location-networks')
 def graph_location_networks():
     """Get location-based professional networks"""
-    query = """
-        SELECT 
-            location_id,
-            country,
-            user_count,
-            company_diversity_score,
-            role_diversity_score,
-            top_companies,
-            top_roles
-        FROM aggregates.location_based_networks
-        ORDER BY user_count DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return paged_graph_response('location-networks')
 
-@app.route('/v2/api/graph/alumni-networks')
+@dashboard.route('/v2/api/graph/alumni-networks')
 def graph_alumni_networks():
     """Get alumni networks by school and degree"""
-    query = """
-        SELECT 
-            school_id,
-            school_name,
-            degree_id,
-            degree_name,
-            alumni_count,
-            graduation_year_min,
-            graduation_year_max,
-            current_companies,
-            current_roles
-        FROM aggregates.alumni_networks
-        WHERE alumni_count > 0
-        ORDER BY alumni_count DESC;
-    """
-    return jsonify(execute_analytics_query(query))
+    return paged_graph_response('alumni-networks')
 
-@app.route('/v2/api/graph/project-collaborations')
+@dashboard.route('/v2/api/graph/project-collaborations')
 def graph_project_collaborations():
     """Get project collaboration networks"""
-    query = """
-        SELECT 
-            project_id,
-            project_name,
-            company_id,
-            company_name,
-            user_count,
-            role_ids,
-            collaboration_strength
-        FROM aggregates.project_collaboration_graph
-        WHERE user_count > 0
-        ORDER BY user_count DESC;
+    return paged_graph_response('project-collaborations')
+
+@dashboard.route('/v2/api/graph/expand/<name>/<field>')
+def graph_expand(name, field):
     """
-    return jsonify(execute_analytics_query(query))
+    Slice of one row's id array, e.g.
+    /v2/api/graph/expand/company-network/employee_ids?company_id_1=1&company_id_2=2&offset=0&limit=1000
+    """
+    if name not in PAGED_TABLES:
+        return jsonify({"error": f"Unknown graph table: {name}"}), 404
+    spec = PAGED_TABLES[name]
+    try:
+        key = parse_key(spec, request.args)
+        offset = request.args.get('offset', default=0, type=int)
+        query, params, size = expand_query(spec, field, key, offset, request.args.get('limit', type=int))
+    except PageError as e:
+        return jsonify({"error": str(e)}), 400
+    rows = execute_analytics_query(query, params, f'graph_expand:{name}')
+    if not rows:
+        return jsonify({"error": "Row not found"}), 404
+    return jsonify({
+        'key': dict(zip(spec['key'], key)),
+        'field': field,
+        'offset': offset,
+        'limit': size,
+        'total': rows[0]['total'],
+        'items': rows[0]['items'] or [],
+    })
+
+def create_app():
+    """Build the Flask app: routes, CORS and metrics (wsgi.py serves one per worker process)"""
+    app = Flask(__name__)
+    app.json_encoder = DateTimeEncoder
+    app.register_blueprint(dashboard)
+    CORS(app, expose_headers=[NEXT_CURSOR_HEADER])
+    instrument_app(app)
+    return app
+
+# Development server and existing `from app import app` imports
+app = create_app()
 
 if __name__ == '__main__':
     import os
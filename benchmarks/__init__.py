@@ -0,0 +1 @@
+"""Performance benchmarks; run modules from the repo root with `python -m benchmarks.<name>`"""
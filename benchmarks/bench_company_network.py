@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Company Network Builder Benchmark
+Times company_network.compute_network on synthetic experiences at multiples
+of today's volume
+
+Today's volume is the number of employee-company links in the analytics
+staging layer (falls back to --base-links when the DB isn't reachable).
+Synthetic data keeps the shape of real profiles: a few companies per person
+and Zipf-distributed company popularity, so large employers dominate the
+co-employment matrix the way they do in production.
+
+Usage:
+    python -m benchmarks.bench_company_network                 # 1x, 10x, 100x
+    python -m benchmarks.bench_company_network --scales 1 10 --repeat 5
+    python -m benchmarks.bench_company_network --output results/company_network.json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from company_network import EMPLOYMENT_QUERY, MIN_SHARED_EMPLOYEES, compute_network
+from db_config import get_analytics_db_connection
+
+DEFAULT_BASE_LINKS = 5000
+LINKS_PER_PERSON = 2.5
+PERSONS_PER_COMPANY = 8
+ZIPF_EXPONENT = 1.3
+
+
+def current_volume():
+    """Employee-company links currently staged, or None if the DB isn't reachable"""
+    try:
+        conn = get_analytics_db_connection()
+    except Exception as e:
+        print(f"✗ Analytics DB unavailable ({e.__class__.__name__}), using --base-links")
+        return None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) AS links FROM ({EMPLOYMENT_QUERY.rstrip().rstrip(';')}) l;")
+            return cursor.fetchone()['links']
+    finally:
+        conn.close()
+
+
+def synthetic_links(n_links, seed=42):
+    """Person/company id arrays with skewed company popularity"""
+    rng = np.random.default_rng(seed)
+    n_persons = max(1, int(n_links / LINKS_PER_PERSON))
+    n_companies = max(10, n_persons // PERSONS_PER_COMPANY)
+    person_ids = rng.integers(0, n_persons, n_links)
+    company_ids = (rng.zipf(ZIPF_EXPONENT, n_links) - 1) % n_companies
+    return person_ids.astype(np.int64), company_ids.astype(np.int64)
+
+
+def run_scale(scale, base_links, repeat, min_shared):
+    person_ids, company_ids = synthetic_links(int(base_links * scale))
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        network = compute_network(person_ids, company_ids, min_shared)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    compute_network(person_ids, company_ids, min_shared)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'scale': scale,
+        'links': len(person_ids),
+        'pairs': len(network['company_id_1']),
+        'best_seconds': round(min(timings), 4),
+        'median_seconds': round(float(np.median(timings)), 4),
+        'peak_mb': round(peak / 1024 / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the company network builder')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100],
+                        help='Multiples of the current volume (default: 1 10 100)')
+    parser.add_argument('--base-links', type=int,
+                        help=f'Links at 1x (default: staged volume, else {DEFAULT_BASE_LINKS})')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per scale (default: 3)')
+    parser.add_argument('--min-shared', type=int, default=MIN_SHARED_EMPLOYEES)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    base_links = args.base_links or current_volume() or DEFAULT_BASE_LINKS
+    print(f"Base volume: {base_links} employee-company links\n")
+    print(f"{'scale':>6} {'links':>10} {'pairs':>10} {'best s':>9} {'median s':>9} {'peak MB':>8}")
+
+    results = []
+    for scale in args.scales:
+        result = run_scale(scale, base_links, args.repeat, args.min_shared)
+        results.append(result)
+        print(f"{result['scale']:>5g}x {result['links']:>10} {result['pairs']:>10} "
+              f"{result['best_seconds']:>9} {result['median_seconds']:>9} {result['peak_mb']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'base_links': base_links, 'results': results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Endpoint Benchmark
+Times every dashboard API route end to end and checks the results against a
+committed baseline
+
+Routes are every parameterless GET /api and /v2/api route except the
+diagnostic ones (EXCLUDED_ROUTES), plus the per-user v2 routes with --user-id. By
+default the app runs in-process (Flask test client) against whatever APP_ENV
+points at; seed it with `python synthetic_data.py --scale N`, switch with
+`./switch_env.sh local` and run `python etl_sync.py --full` first. With --url
+the same routes are requested from a running server instead.
+
+Per route:
+    cold  --cold runs, each after clearing the result cache and the query
+          engine's connection pools (in-process only)
+    warm  --warm runs after one priming request
+and for each: p50/p95/p99 latency, DB time (query time recorded by
+metrics.py, from /metrics with --url), rows in the payload and payload bytes.
+
+A route regresses when its warm or cold p95 exceeds the baseline by more than
+--tolerance (a fraction) and --min-delta-ms, or when it stops returning 200.
+Any regression exits non-zero. Routes that don't return 200 are left out of a
+recorded baseline (on the local synthetic data, the graph tables built outside
+this repo), so they show as "no baseline" rather than passing forever.
+
+Usage:
+    python -m benchmarks.bench_endpoints                       # Compare with the baseline
+    python -m benchmarks.bench_endpoints --update-baseline     # Record a new baseline
+    python -m benchmarks.bench_endpoints --warm 50 --cold 5 --output results/endpoints.json
+    python -m benchmarks.bench_endpoints --url http://localhost:5000 --routes /api/new-users/monthly
+    python -m benchmarks.bench_endpoints --tolerance 0.5 --min-delta-ms 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_endpoints.json')
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 5.0
+
+# Diagnostics about the dashboard itself rather than dashboard data
+EXCLUDED_ROUTES = {'/api/metrics-metadata', '/api/sql-queries', '/api/slow-queries'}
+
+# Per-user v2 routes, requested with --user-id
+USER_ROUTES = [
+    '/v2/api/graph/connection-recommendations/{user_id}',
+    '/v2/api/graph/skills-matching/{user_id}',
+]
+
+QUERY_SUM = re.compile(r'^dashboard_query_duration_seconds_sum\{[^}]*\} (\S+)$', re.M)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def count_rows(payload):
+    """Rows in a JSON payload: list length, or the summed lengths of a dict's lists"""
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        lists = [value for value in payload.values() if isinstance(value, list)]
+        return sum(len(value) for value in lists) if lists else 1
+    return 1
+
+
+class InProcessClient:
+    """Flask test client; DB time comes straight from the metrics registry"""
+
+    mode = 'in-process'
+
+    def __init__(self):
+        from app import app
+        from metrics import query_seconds_total
+        self.app = app
+        app.logger.setLevel(logging.CRITICAL)  # failures show up as statuses in the table
+        self.client = app.test_client()
+        self._db_seconds = query_seconds_total
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_data()
+
+    def db_seconds(self):
+        return self._db_seconds()
+
+    def reset(self):
+        from query_cache import query_cache
+        from query_engine import reset_pools
+        query_cache.clear()
+        reset_pools()
+        return True
+
+
+class HttpClient:
+    """A running server; DB time is scraped from its /metrics"""
+
+    mode = 'http'
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.url + path, timeout=120) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def db_seconds(self):
+        status, body = self.get('/metrics')
+        if status != 200:
+            return 0.0
+        return sum(float(value) for value in QUERY_SUM.findall(body.decode()))
+
+    def reset(self):
+        return False  # Caches live in the server process
+
+
+def discover_routes(user_id):
+    """Parameterless GET /api and /v2/api routes, then per-user routes"""
+    from app import app
+    routes = [
+        rule.rule for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule)
+        if rule.rule.startswith(('/api/', '/v2/api/')) and 'GET' in rule.methods
+        and not rule.arguments and rule.rule not in EXCLUDED_ROUTES
+    ]
+    if user_id is not None:
+        routes.extend(route.format(user_id=user_id) for route in USER_ROUTES)
+    return routes
+
+
+def measure(client, path, runs, reset):
+    """Latency/DB-time samples plus the last status, rows and bytes"""
+    latencies, db_times = [], []
+    status, body = None, b''
+    for _ in range(runs):
+        if reset:
+            client.reset()
+        db_before = client.db_seconds()
+        started = time.perf_counter()
+        status, body = client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        db_times.append((client.db_seconds() - db_before) * 1000)
+    try:
+        rows = count_rows(json.loads(body)) if status == 200 else None
+    except ValueError:
+        rows = None
+    return {
+        'runs': runs,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'db_ms_p50': round(percentile(db_times, 50), 2),
+        'status': status,
+        'rows': rows,
+        'bytes': len(body),
+    }
+
+
+def run_benchmark(client, routes, warm, cold):
+    results = {}
+    cold_supported = cold > 0 and client.reset()
+    print(f"{'ROUTE':<58} {'COLD p95':>9} {'WARM p50':>9} {'p95':>8} {'p99':>8} {'DB p50':>8} {'ROWS':>6} {'BYTES':>9}")
+    for path in routes:
+        result = {}
+        if cold_supported:
+            result['cold'] = measure(client, path, cold, reset=True)
+        client.get(path)  # prime
+        result['warm'] = measure(client, path, warm, reset=False)
+        results[path] = result
+        w, c = result['warm'], result.get('cold')
+        flag = '' if w['status'] == 200 else f"  ✗ {w['status']}"
+        print(f"{path[:58]:<58} {c['p95_ms'] if c else '-':>9} {w['p50_ms']:>9} {w['p95_ms']:>8} {w['p99_ms']:>8} "
+              f"{w['db_ms_p50']:>8} {w['rows'] if w['rows'] is not None else '-':>6} {w['bytes']:>9}{flag}")
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """(regressions, notes) as printable lines"""
+    regressions, notes = [], []
+    for path, current in sorted(results.items()):
+        previous = baseline.get(path)
+        if previous is None:
+            notes.append(f"{path}: no baseline")
+            continue
+        for phase in ('cold', 'warm'):
+            now, before = current.get(phase), previous.get(phase)
+            if now is None or before is None:
+                continue
+            if now['status'] != 200:
+                if before['status'] == 200:
+                    regressions.append(f"{path} ({phase}): status {now['status']}")
+                else:
+                    notes.append(f"{path} ({phase}): still status {now['status']}")
+                continue
+            limit = max(before['p95_ms'] * (1 + tolerance), before['p95_ms'] + min_delta_ms)
+            if now['p95_ms'] > limit:
+                regressions.append(f"{path} ({phase}): p95 {before['p95_ms']}ms → {now['p95_ms']}ms")
+            if before.get('bytes') and now['bytes'] > before['bytes'] * (1 + tolerance):
+                notes.append(f"{path} ({phase}): payload {before['bytes']} → {now['bytes']} bytes")
+    return regressions, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every dashboard API route')
+    parser.add_argument('--url', help='Benchmark a running server instead of the in-process app')
+    parser.add_argument('--routes', nargs='+', help='Only these paths (default: all discovered routes)')
+    parser.add_argument('--user-id', type=int, default=1, help='User id for the per-user v2 routes (default 1)')
+    parser.add_argument('--warm', type=int, default=20, help='Warm runs per route (default 20)')
+    parser.add_argument('--cold', type=int, default=3, help='Cold-cache runs per route (default 3, 0 to skip)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed p95 growth as a fraction of the baseline (default 0.25)')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help='Ignore p95 growth smaller than this (default 5ms)')
+    parser.add_argument('--output', help='Also write the results as JSON to this path')
+    args = parser.parse_args()
+
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    routes = args.routes or discover_routes(args.user_id)
+    env = os.getenv('APP_ENV', 'uat').lower()
+    print(f"Benchmarking {len(routes)} routes ({client.mode}, APP_ENV={env}, "
+          f"{args.warm} warm / {args.cold} cold runs)\n")
+    results = run_benchmark(client, routes, args.warm, args.cold)
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'mode': client.mode,
+        'env': env,
+        'routes': results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    if args.update_baseline:
+        failing = sorted(path for path, result in results.items() if result['warm']['status'] != 200)
+        recorded = {path: result for path, result in results.items() if path not in failing}
+        with open(args.baseline, 'w') as f:
+            json.dump({**report, 'routes': recorded}, f, indent=2, sort_keys=True)
+        print(f"\n✓ Baseline written to {args.baseline} ({len(recorded)} routes)")
+        for path in failing:
+            print(f"  ✗ Not recorded, status {results[path]['warm']['status']}: {path}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n✗ No baseline at {args.baseline}; run with --update-baseline first")
+        sys.exit(1)
+    with open(args.baseline) as f:
+        baseline = json.load(f)['routes']
+
+    regressions, notes = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    print()
+    for line in notes:
+        print(f"  • {line}")
+    for line in regressions:
+        print(f"  ✗ {line}")
+    if regressions:
+        print(f"\n✗ {len(regressions)} regressions in {len(results)} routes")
+        sys.exit(1)
+    print(f"\n✓ {len(results)} routes within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == '__main__':
+    main()
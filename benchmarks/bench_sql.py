@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+SQL Scaling Benchmark
+Runs every executable SQL_QUERIES entry against seeded local databases at
+several data scales and fits how its cost grows
+
+For each scale the ChemLink, Engagement and Kratos sources are regenerated
+with synthetic_data.py (same seed, so larger scales are the same shape with
+more rows), then the analytics DB is rebuilt from them: etl_sync.py --full,
+the incremental builders in full mode and a forced refresh_scheduler.py run.
+Each query is then run --runs times under EXPLAIN (ANALYZE, BUFFERS), with no
+HTTP, pooling or result cache involved, recording execution and planning time,
+shared buffers hit/read and rows.
+
+Per query the growth exponent b of cost ≈ a·scale^b is fitted by least squares
+on log-log values, for execution time and for buffers touched. b ≈ 1 is linear
+in data size; a query is flagged superlinear when either exponent exceeds
+--superlinear (time only counts once the query takes --min-ms). Placeholders
+use plan_checker's sample parameters; windowed entries use their default
+window.
+
+Requires APP_ENV=local (`./switch_env.sh local`): the rebuild reads the
+app's sources, and regenerating overwrites the local databases.
+
+Usage:
+    python -m benchmarks.bench_sql                               # Scales 1, 3, 10; 5 runs each
+    python -m benchmarks.bench_sql --scales 1 10 100 --runs 3
+    python -m benchmarks.bench_sql --targets chemlink engagement   # Skip the analytics rebuild
+    python -m benchmarks.bench_sql --no-generate --scales 10       # Data already loaded
+    python -m benchmarks.bench_sql --output results/bench_sql.json
+"""
+
+import argparse
+import importlib
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+
+from db_config import ENVIRONMENT_CONNECTIONS
+from plan_checker import executable_queries, plan_params
+from sql_queries import SQL_QUERIES
+
+DEFAULT_SCALES = [1, 3, 10]
+DEFAULT_RUNS = 5
+DEFAULT_SUPERLINEAR = 1.2
+DEFAULT_MIN_MS = 5.0
+DEFAULT_TIMEOUT_S = 120
+
+# Builders that are incremental by default, with the argument that makes them start over
+FULL_BUILDERS = [
+    ('profile_completeness', {'rebuild': True}),
+    ('recommendations', {'full': True}),
+    ('skills_matching', {'full': True}),
+    ('career_paths', {'full': True}),
+]
+
+
+def rebuild_analytics():
+    """Reload staging and every aggregate from the freshly generated sources"""
+    import etl_sync
+    import refresh_scheduler
+    etl_sync.sync(full=True)
+    for module, kwargs in FULL_BUILDERS:
+        importlib.import_module(module).build(**kwargs)
+    refresh_scheduler.run(force=True)
+
+
+def explain_analyze(conn, entry, timeout_s):
+    """One EXPLAIN (ANALYZE, BUFFERS) run, rolled back"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_s * 1000)}")
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {entry['query'].strip().rstrip(';')}",
+                           plan_params(entry))
+            row = cursor.fetchone()
+    finally:
+        conn.rollback()
+    plan = row[0] if isinstance(row, tuple) else next(iter(row.values()))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    top = plan[0]
+    return {
+        'execution_ms': top['Execution Time'],
+        'planning_ms': top['Planning Time'],
+        'hit': top['Plan'].get('Shared Hit Blocks', 0),
+        'read': top['Plan'].get('Shared Read Blocks', 0),
+        'rows': top['Plan'].get('Actual Rows', 0),
+    }
+
+
+def measure_query(conn, entry, runs, timeout_s):
+    samples = [explain_analyze(conn, entry, timeout_s) for _ in range(runs)]
+    return {
+        'execution_ms': round(statistics.median(s['execution_ms'] for s in samples), 3),
+        'execution_ms_min': round(min(s['execution_ms'] for s in samples), 3),
+        'planning_ms': round(statistics.median(s['planning_ms'] for s in samples), 3),
+        'buffers_hit': int(statistics.median(s['hit'] for s in samples)),
+        'buffers_read': int(statistics.median(s['read'] for s in samples)),
+        'first_run_read': samples[0]['read'],
+        'rows': samples[-1]['rows'],
+    }
+
+
+def run_scale(queries, runs, timeout_s):
+    """{query_id: measurement or {'error': ...}} on the local databases as they are now"""
+    results = {}
+    for target in sorted({entry['target'] for entry in queries.values()}):
+        conn = ENVIRONMENT_CONNECTIONS[target]['local'][1]()
+        try:
+            for query_id, entry in queries.items():
+                if entry['target'] != target:
+                    continue
+                try:
+                    results[query_id] = measure_query(conn, entry, runs, timeout_s)
+                    print(f"  ✓ {query_id:<45} {results[query_id]['execution_ms']:>10.2f}ms")
+                except Exception as e:
+                    results[query_id] = {'error': str(e).strip().splitlines()[0]}
+                    print(f"  ✗ {query_id:<45} {results[query_id]['error']}")
+        finally:
+            conn.close()
+    return results
+
+
+def growth_exponent(scales, values):
+    """Least-squares slope of log(value) on log(scale), or None with fewer than two usable points"""
+    points = [(math.log(s), math.log(v)) for s, v in zip(scales, values) if v and v > 0]
+    if len(points) < 2 or len({x for x, _ in points}) < 2:
+        return None
+    xs, ys = zip(*points)
+    return round(float(np.polyfit(xs, ys, 1)[0]), 2)
+
+
+def fit(by_scale, superlinear, min_ms):
+    """Per query: growth exponents for time and buffers, and whether it grows superlinearly"""
+    fits = {}
+    query_ids = sorted({query_id for results in by_scale.values() for query_id in results})
+    for query_id in query_ids:
+        points = [(scale, results[query_id]) for scale, results in sorted(by_scale.items())
+                  if 'execution_ms' in results.get(query_id, {})]
+        scales = [scale for scale, _ in points]
+        time_exp = growth_exponent(scales, [p['execution_ms'] for _, p in points])
+        buffer_exp = growth_exponent(scales, [p['buffers_hit'] + p['buffers_read'] for _, p in points])
+        slow_enough = any(p['execution_ms'] >= min_ms for _, p in points)
+        flagged = ((time_exp is not None and slow_enough and time_exp > superlinear)
+                   or (buffer_exp is not None and buffer_exp > superlinear))
+        fits[query_id] = {'time_exponent': time_exp, 'buffer_exponent': buffer_exp, 'superlinear': flagged}
+    return fits
+
+
+def report(by_scale, fits):
+    scales = sorted(by_scale)
+    header = ''.join(f"{f'x{s:g} ms':>12}" for s in scales)
+    print(f"\n{'QUERY':<45}{header} {'TIME b':>7} {'BUF b':>7}")
+    for query_id, result in sorted(fits.items(), key=lambda item: -(item[1]['time_exponent'] or 0)):
+        cells = ''
+        for scale in scales:
+            measurement = by_scale[scale].get(query_id, {})
+            cells += f"{measurement['execution_ms']:>12.2f}" if 'execution_ms' in measurement else f"{'error':>12}"
+        time_exp = '-' if result['time_exponent'] is None else result['time_exponent']
+        buffer_exp = '-' if result['buffer_exponent'] is None else result['buffer_exponent']
+        flag = '  ✗ superlinear' if result['superlinear'] else ''
+        print(f"{query_id[:45]:<45}{cells} {time_exp:>7} {buffer_exp:>7}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQL_QUERIES at several synthetic data scales')
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help='synthetic_data.py scales to run (default 1 3 10)')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='EXPLAIN ANALYZE runs per query (default 5)')
+    parser.add_argument('--seed', type=int, default=42, help='synthetic_data.py seed (default 42)')
+    parser.add_argument('--targets', nargs='+', choices=list(ENVIRONMENT_CONNECTIONS),
+                        help='Only queries on these targets (default all)')
+    parser.add_argument('--queries', nargs='+', help='Only these query ids')
+    parser.add_argument('--no-generate', action='store_true',
+                        help='Benchmark the data already loaded, labelled with the single --scales value')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT_S,
+                        help='Statement timeout per run in seconds (default 120)')
+    parser.add_argument('--superlinear', type=float, default=DEFAULT_SUPERLINEAR,
+                        help='Flag growth exponents above this (default 1.2)')
+    parser.add_argument('--min-ms', type=float, default=DEFAULT_MIN_MS,
+                        help='Ignore time growth of queries faster than this at every scale (default 5)')
+    parser.add_argument('--output', help='Also write the results as JSON to this path')
+    args = parser.parse_args()
+
+    load_dotenv(override=True)
+    if os.getenv('APP_ENV', 'uat').lower() != 'local':
+        print("✗ APP_ENV must be local (./switch_env.sh local): this regenerates and reads the local databases")
+        sys.exit(1)
+    if args.no_generate and len(args.scales) != 1:
+        print("✗ --no-generate takes exactly one --scales value (the scale already loaded)")
+        sys.exit(1)
+
+    queries = executable_queries()
+    if args.targets:
+        queries = {k: v for k, v in queries.items() if v['target'] in args.targets}
+    if args.queries:
+        unknown = sorted(set(args.queries) - set(SQL_QUERIES))
+        if unknown:
+            print(f"✗ Unknown query ids: {', '.join(unknown)}")
+            sys.exit(1)
+        queries = {k: v for k, v in queries.items() if k in args.queries}
+    skipped = sorted(set(SQL_QUERIES) - set(executable_queries()))
+    print(f"Benchmarking {len(queries)} queries at scales {', '.join(f'{s:g}' for s in args.scales)} "
+          f"({args.runs} runs each)")
+    if skipped:
+        print(f"  - not executable on their own (multi-step or documentation only): {', '.join(skipped)}")
+
+    from synthetic_data import generate
+    by_scale = {}
+    timings = {}
+    for scale in args.scales:
+        print(f"\n=== Scale {scale:g} ===")
+        started = time.time()
+        if not args.no_generate:
+            generate(scale, args.seed, 730, 32)
+            if any(entry['target'] == 'analytics' for entry in queries.values()):
+                rebuild_analytics()
+        prepared = time.time()
+        by_scale[scale] = run_scale(queries, args.runs, args.timeout)
+        timings[scale] = {'prepare_s': round(prepared - started, 1), 'measure_s': round(time.time() - prepared, 1)}
+
+    fits = fit(by_scale, args.superlinear, args.min_ms)
+    report(by_scale, fits)
+    flagged = sorted(query_id for query_id, result in fits.items() if result['superlinear'])
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'seed': args.seed,
+                'runs': args.runs,
+                'timings': {f'{s:g}': t for s, t in timings.items()},
+                'scales': {f'{s:g}': results for s, results in by_scale.items()},
+                'fits': fits,
+                'skipped': skipped,
+            }, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    if len(by_scale) < 2:
+        print("\n- Growth needs at least two scales")
+    elif flagged:
+        print(f"\n✗ {len(flagged)} queries grow faster than scale^{args.superlinear}: {', '.join(flagged)}")
+    else:
+        print(f"\n✓ No query grows faster than scale^{args.superlinear}")
+
+
+if __name__ == '__main__':
+    main()
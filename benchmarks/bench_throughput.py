@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Serving Throughput Benchmark
+Compares how many dashboard page loads per second each server configuration
+sustains
+
+Each configuration is started in turn on --url, primed with one page load,
+then driven by load_test's virtual users with no think time (every user
+reloads the dashboard as soon as the previous load finishes), so the server,
+not the users, sets the pace. Configurations are `flask` (the development
+server, `python app.py`) or `gunicorn:<workers>x<threads>` (gunicorn.conf.py
+with those overrides).
+
+Result caches and connection pools live in each worker and priming reaches
+only one of them, so configurations with more workers start colder; raise
+--visits to compare steady states. Memory is peak PSS of the whole server.
+
+Usage:
+    python -m benchmarks.bench_throughput                        # flask vs gunicorn 1x4, 2x4, 4x4
+    python -m benchmarks.bench_throughput --configs gunicorn:2x4 gunicorn:2x8 --users 20
+    python -m benchmarks.bench_throughput --output results/throughput.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+from benchmarks.load_test import (
+    BROWSER_CONNECTIONS, dashboard_fanout, run_load, start_server, stop_server, wait_for_server
+)
+
+DEFAULT_CONFIGS = ['flask', 'gunicorn:1x4', 'gunicorn:2x4', 'gunicorn:4x4']
+CONFIG = re.compile(r'^(flask|gunicorn)(?::(\d+)x(\d+))?$')
+
+
+def parse_config(text):
+    """'gunicorn:2x4' -> ('gunicorn', 2, 4); 'flask' -> ('flask', None, None)"""
+    match = CONFIG.match(text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"expected flask or gunicorn:<workers>x<threads>, got {text!r}")
+    server, workers, threads = match.groups()
+    return server, workers and int(workers), threads and int(threads)
+
+
+def config_arg(text):
+    parse_config(text)
+    return text
+
+
+def run_config(url, config, fanout, args):
+    server, workers, threads = parse_config(config)
+    process = start_server(url, server, workers, threads)
+    try:
+        run_load(url, fanout, 1, 1, args.connections, 0, 0, args.timeout)  # prime caches and pools
+        return run_load(url, fanout, args.users, args.visits, args.connections, 0, args.ramp,
+                        args.timeout, process.pid)
+    finally:
+        stop_server(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dashboard throughput across server configurations')
+    parser.add_argument('--configs', nargs='+', type=config_arg, default=DEFAULT_CONFIGS,
+                        help='flask and/or gunicorn:<workers>x<threads> (default: flask, gunicorn 1x4, 2x4, 4x4)')
+    parser.add_argument('--url', default='http://localhost:5000',
+                        help='Where to run each server (default localhost:5000; flask always uses port 5000)')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users (default 10)')
+    parser.add_argument('--visits', type=int, default=3, help='Page loads per user (default 3)')
+    parser.add_argument('--connections', type=int, default=BROWSER_CONNECTIONS,
+                        help=f'Parallel requests per user (default {BROWSER_CONNECTIONS})')
+    parser.add_argument('--ramp', type=float, default=1.0, help='Seconds over which users start (default 1)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+    parser.add_argument('--output', help='Also write the results as JSON to this path')
+    args = parser.parse_args()
+
+    url = args.url.rstrip('/')
+    if wait_for_server(url, timeout=1):
+        print(f"✗ Something is already serving {url}; stop it or pick another --url")
+        sys.exit(1)
+
+    fanout = dashboard_fanout()
+    print(f"Throughput: {args.users} users × {args.visits} page loads × {len(fanout)} requests, no think time\n")
+    summaries = {}
+    for config in args.configs:
+        print(f"  {config}...")
+        summaries[config] = run_config(url, config, fanout, args)
+
+    print(f"\n{'CONFIG':<16} {'REQ/S':>8} {'LOADS/S':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'ERRORS':>7} "
+          f"{'MEM MB':>8} {'DB CONNS':>9}")
+    for config, summary in summaries.items():
+        latency = summary['latency_ms']
+        memory = summary['server_memory_mb']['peak'] if summary['server_memory_mb'] else '-'
+        connections = sum(counts['peak'] for counts in summary['db_connections'].values())
+        print(f"{config:<16} {summary['throughput_rps']:>8} {summary['visits_per_s']:>8} {latency['p50']:>9} "
+              f"{latency['p95']:>9} {latency['p99']:>9} {summary['error_rate']:>7.1%} {memory:>8} {connections:>9}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'env': os.getenv('APP_ENV', 'uat').lower(),
+                'configs': summaries,
+            }, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
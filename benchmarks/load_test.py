@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Dashboard Load Test
+Replays the request fan-out of opening the dashboard for N concurrent virtual
+users against a running server
+
+One visit is every fetchData() call made by the loaders in dashboard.js's
+DOMContentLoaded handler (read from the script, so it follows the page), fired
+at once over --connections parallel connections like a browser. Each user
+makes --visits visits with a randomized --think pause in between; users start
+spread over --ramp seconds.
+
+Reported: throughput, visit and per-endpoint latency percentiles, error rate,
+database connections (pg_stat_activity on every server the app's query targets
+point at, sampled during the run) and server memory (PSS of --pid and its
+children, so pages forked workers share with the master count once; Linux
+only). Point APP_ENV at the local synthetic databases
+(`synthetic_data.py`, `./switch_env.sh local`) to run it without touching
+shared environments; --serve starts a server for the duration (gunicorn
+with gunicorn.conf.py, or `--serve flask` for the development server).
+
+Usage:
+    python -m benchmarks.load_test --serve                       # 10 users, 3 visits each
+    python -m benchmarks.load_test --serve gunicorn --workers 4 --threads 8
+    python -m benchmarks.load_test --url http://localhost:5000 --pid $(cat flask_app.pid)
+    python -m benchmarks.load_test --users 25 --connections 6 --think 5 --visits 4
+    python -m benchmarks.load_test --serve --output results/load_test.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD_JS = os.path.join(ROOT, 'static', 'js', 'dashboard.js')
+
+BROWSER_CONNECTIONS = 6  # parallel HTTP/1.1 connections per host in current browsers
+
+HANDLER = re.compile(r"addEventListener\('DOMContentLoaded',\s*function\s*\(\)\s*\{(.*?)\n\}\);", re.S)
+CALL = re.compile(r'^\s*(\w+)\(\);', re.M)
+FUNCTION = re.compile(r'^(?:async\s+)?function\s+(\w+)\s*\(', re.M)
+FETCH = re.compile(r"fetchData\(\s*['`]([^'`$]+)['`]\s*\)")
+
+ACTIVITY_SQL = """
+SELECT datname, COUNT(*) AS connections
+FROM pg_stat_activity
+WHERE backend_type = 'client backend' AND pid <> pg_backend_pid()
+GROUP BY datname
+"""
+
+
+def dashboard_fanout(path=DASHBOARD_JS):
+    """API paths requested on page load, in call order (repeats kept: the page makes them)"""
+    with open(path) as f:
+        source = f.read()
+    handler = HANDLER.search(source)
+    if handler is None:
+        raise ValueError(f"No DOMContentLoaded handler in {path}")
+    starts = list(FUNCTION.finditer(source))
+    bodies = {}
+    for match, following in zip(starts, starts[1:] + [None]):
+        bodies[match.group(1)] = source[match.end():following.start() if following else len(source)]
+    paths = []
+    for loader in CALL.findall(handler.group(1)):
+        paths.extend(f"/api/{endpoint}" for endpoint in FETCH.findall(bodies.get(loader, '')))
+    return paths
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return round(ordered[int(rank) - 1], 2)
+
+
+def process_memory(pid):
+    """Proportional set size in bytes (shared pages split between their users), else RSS"""
+    for path, field in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return 0
+
+
+def process_tree_memory(pid):
+    """Memory in bytes of `pid` and its descendants (reloader/worker children)"""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+        except (OSError, IndexError):
+            continue
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [p for p, pp in parents.items() if pp == parent and p not in tree]
+        tree.update(children)
+        frontier.extend(children)
+    return sum(process_memory(member) for member in tree)
+
+
+class Sampler(threading.Thread):
+    """Polls database connection counts and server memory until stopped"""
+
+    def __init__(self, pid, interval):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.connections = []  # per sample: {"host:port/db": client connections}
+        self.memory = []
+        self.conns = self._connect()
+
+    def _connect(self):
+        """One monitoring connection per distinct server behind query_engine.TARGETS"""
+        from query_engine import TARGETS
+        servers = {}
+        for target, connect in TARGETS.items():
+            try:
+                conn = connect()
+            except Exception as e:
+                print(f"✗ Not sampling {target} connections ({e.__class__.__name__})")
+                continue
+            key = f"{conn.info.host}:{conn.info.port}"
+            if key in servers:
+                conn.close()
+            else:
+                conn.autocommit = True
+                servers[key] = conn
+        return servers
+
+    def sample(self):
+        counts = {}
+        for server, conn in self.conns.items():
+            try:
+                with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                    cursor.execute(ACTIVITY_SQL)
+                    counts.update((f"{server}/{datname}", n) for datname, n in cursor.fetchall())
+            except psycopg2.Error:
+                continue
+        self.connections.append(counts)
+        if self.pid and sys.platform.startswith('linux'):
+            self.memory.append(process_tree_memory(self.pid))
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.sample()  # after the run: what stays open
+        for conn in self.conns.values():
+            conn.close()
+
+
+class VirtualUser:
+    """Visits the dashboard `visits` times, each visit being the full page fan-out"""
+
+    def __init__(self, url, fanout, connections, think, visits, timeout, results):
+        self.url = url
+        self.fanout = fanout
+        self.pool = ThreadPoolExecutor(max_workers=connections)
+        self.think = think
+        self.visits = visits
+        self.timeout = timeout
+        self.results = results
+
+    def request(self, path):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(self.url + path, timeout=self.timeout) as response:
+                size = len(response.read())
+                status = response.status
+        except urllib.error.HTTPError as e:
+            size, status = 0, e.code
+        except Exception as e:
+            size, status = 0, e.__class__.__name__
+        return path, status, (time.perf_counter() - started) * 1000, size
+
+    def run(self, start_delay):
+        time.sleep(start_delay)
+        for visit in range(self.visits):
+            if visit:
+                time.sleep(random.uniform(0.5, 1.5) * self.think)
+            started = time.perf_counter()
+            responses = list(self.pool.map(self.request, self.fanout))
+            self.results.record(responses, (time.perf_counter() - started) * 1000)
+        self.pool.shutdown()
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []  # (path, status, ms, bytes)
+        self.visits = []    # ms until the whole fan-out finished
+
+    def record(self, responses, visit_ms):
+        with self.lock:
+            self.requests.extend(responses)
+            self.visits.append(visit_ms)
+
+
+def wait_for_server(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/api/metrics-metadata', timeout=5):
+                return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def server_command(url, server='gunicorn', workers=None, threads=None):
+    """Command line for gunicorn (gunicorn.conf.py, bound to `url`) or the Flask dev server (port 5000)"""
+    if server == 'flask':
+        return [sys.executable, 'app.py']
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', urlparse(url).netloc,
+               '--pid', os.path.join(tempfile.gettempdir(), f'load_test_gunicorn_{os.getpid()}.pid')]
+    if workers:
+        command += ['--workers', str(workers)]
+    if threads:
+        command += ['--threads', str(threads)]
+    return command + ['wsgi:app']
+
+
+def start_server(url, server='gunicorn', workers=None, threads=None):
+    """Start a server in its own process group, so its reloader/worker children go with it"""
+    log = open(os.path.join(ROOT, 'load_test_server.log'), 'w')
+    process = subprocess.Popen(server_command(url, server, workers, threads), cwd=ROOT, stdout=log,
+                               stderr=subprocess.STDOUT, start_new_session=True)
+    if not wait_for_server(url, timeout=120):
+        stop_server(process)
+        print("✗ Server did not come up, see load_test_server.log")
+        sys.exit(1)
+    return process
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+
+def summarize(results, elapsed, sampler):
+    requests = results.requests
+    errors = [r for r in requests if r[1] != 200]
+    by_path = defaultdict(list)
+    for path, status, ms, size in requests:
+        by_path[path].append((status, ms, size))
+    endpoints = {}
+    for path, samples in by_path.items():
+        latencies = [ms for _, ms, _ in samples]
+        endpoints[path] = {
+            'requests': len(samples),
+            'errors': sum(1 for status, _, _ in samples if status != 200),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': round(max(latencies), 2),
+            'bytes': max(size for _, _, size in samples),
+        }
+    latencies = [ms for _, _, ms, _ in requests]
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'requests': len(requests),
+        'visits': len(results.visits),
+        'throughput_rps': round(len(requests) / elapsed, 2),
+        'visits_per_s': round(len(results.visits) / elapsed, 3),
+        'error_rate': round(len(errors) / len(requests), 4) if requests else 0.0,
+        'errors': dict(sorted(Counter(str(status) for _, status, _, _ in errors).items())),
+        'latency_ms': {'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95),
+                       'p99': percentile(latencies, 99), 'max': round(max(latencies), 2) if latencies else None},
+        'visit_ms': {'p50': percentile(results.visits, 50), 'p95': percentile(results.visits, 95),
+                     'p99': percentile(results.visits, 99)},
+        'db_connections': {name: {'peak': max(sample.get(name, 0) for sample in sampler.connections),
+                                  'end': sampler.connections[-1].get(name, 0)}
+                           for name in sorted(set().union(*sampler.connections))},
+        'server_memory_mb': ({'start': round(sampler.memory[0] / 2**20, 1),
+                              'peak': round(max(sampler.memory) / 2**20, 1),
+                              'end': round(sampler.memory[-1] / 2**20, 1)} if sampler.memory else None),
+        'endpoints': endpoints,
+    }
+
+
+def report(summary):
+    print(f"\n{'ENDPOINT':<48} {'REQS':>5} {'ERR':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'MAX':>8}")
+    for path, stats in sorted(summary['endpoints'].items(), key=lambda item: -item[1]['p95_ms']):
+        print(f"{path[:48]:<48} {stats['requests']:>5} {stats['errors']:>4} {stats['p50_ms']:>8} "
+              f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['max_ms']:>8}")
+    latency, visit = summary['latency_ms'], summary['visit_ms']
+    print(f"\nRequests:     {summary['requests']} in {summary['elapsed_s']}s "
+          f"({summary['throughput_rps']} req/s, {summary['visits_per_s']} page loads/s)")
+    print(f"Latency:      p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms  max {latency['max']}ms")
+    print(f"Page load:    p50 {visit['p50']}ms  p95 {visit['p95']}ms  p99 {visit['p99']}ms")
+    errors = ', '.join(f"{status}×{count}" for status, count in summary['errors'].items())
+    print(f"Errors:       {summary['error_rate']:.2%}" + (f" ({errors})" if errors else ''))
+    for name, counts in summary['db_connections'].items():
+        print(f"DB conns:     {name:<40} peak {counts['peak']:>4}  after {counts['end']:>4}")
+    if summary['server_memory_mb']:
+        memory = summary['server_memory_mb']
+        print(f"Server PSS:   {memory['start']} MB → peak {memory['peak']} MB → {memory['end']} MB")
+
+
+def run_load(url, fanout, users, visits, connections, think, ramp, timeout, pid=None, sample_interval=0.5):
+    """Run the virtual users to completion and summarize the run"""
+    sampler = Sampler(pid, sample_interval)
+    sampler.sample()
+    sampler.start()
+    results = Results()
+    virtual_users = [VirtualUser(url, fanout, connections, think, visits, timeout, results) for _ in range(users)]
+    threads = [threading.Thread(target=user.run, args=(ramp * i / max(1, users),))
+               for i, user in enumerate(virtual_users)]
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        sampler.stop()
+
+    summary = summarize(results, elapsed, sampler)
+    summary.update({
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'env': os.getenv('APP_ENV', 'uat').lower(),
+        'config': {'users': users, 'visits': visits, 'connections': connections, 'think': think, 'ramp': ramp},
+        'fanout': fanout,
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay dashboard page loads for concurrent virtual users')
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL (default localhost:5000)')
+    parser.add_argument('--serve', nargs='?', const='gunicorn', choices=['gunicorn', 'flask'],
+                        help='Start a server for the run: gunicorn (default, gunicorn.conf.py) or the Flask dev server')
+    parser.add_argument('--workers', type=int, help='gunicorn workers with --serve (default from gunicorn.conf.py)')
+    parser.add_argument('--threads', type=int, help='gunicorn threads per worker with --serve')
+    parser.add_argument('--pid', type=int, help='Server PID to track memory for (implied by --serve)')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users (default 10)')
+    parser.add_argument('--visits', type=int, default=3, help='Page loads per user (default 3)')
+    parser.add_argument('--connections', type=int, default=BROWSER_CONNECTIONS,
+                        help=f'Parallel requests per user (default {BROWSER_CONNECTIONS}, like a browser)')
+    parser.add_argument('--think', type=float, default=2.0, help='Mean seconds between a user\'s visits (default 2)')
+    parser.add_argument('--ramp', type=float, default=1.0, help='Seconds over which users start (default 1)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+    parser.add_argument('--sample-interval', type=float, default=0.5, help='Seconds between DB/memory samples')
+    parser.add_argument('--seed', type=int, default=42, help='Think-time random seed')
+    parser.add_argument('--output', help='Also write the results as JSON to this path')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    url = args.url.rstrip('/')
+    fanout = dashboard_fanout()
+    server = start_server(url, args.serve, args.workers, args.threads) if args.serve else None
+    if not server and not wait_for_server(url, timeout=5):
+        print(f"✗ No server at {url} (start one, or pass --serve)")
+        sys.exit(1)
+
+    print(f"Load test: {args.users} users × {args.visits} visits × {len(fanout)} requests "
+          f"({args.connections} connections each, {args.think}s think) → {url}")
+    try:
+        summary = run_load(url, fanout, args.users, args.visits, args.connections, args.think, args.ramp,
+                           args.timeout, server.pid if server else args.pid, args.sample_interval)
+    finally:
+        if server:
+            stop_server(server)
+    summary['config']['server'] = args.serve or url
+    report(summary)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    if summary['error_rate']:
+        print(f"\n✗ {summary['error_rate']:.2%} of requests failed")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+COPY-based bulk transfer between Postgres instances
+
+Streams `COPY (...) TO STDOUT (FORMAT binary)` from a source connection
+through a bounded in-memory pipe into `COPY ... FROM STDIN (FORMAT binary)`
+on the analytics DB. Rows never become Python objects, memory is capped at
+the pipe size, and each table runs in its own worker thread.
+
+Used by `etl_sync.py --full` to (re)load the staging layer.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from db_config import get_analytics_db_connection
+
+CHUNK_SIZE = 1024 * 1024  # bytes requested per read by COPY FROM
+MAX_BUFFERED_CHUNKS = 16  # writes held in memory before COPY TO blocks
+
+
+class BulkLoadError(Exception):
+    """Raised when a transfer fails or row counts don't match"""
+
+
+class TransferAborted(BulkLoadError):
+    """Raised in the COPY TO thread when the reader gave up; the reader's error is the cause"""
+
+
+class BoundedPipe:
+    """File-like pipe between a COPY TO writer thread and a COPY FROM reader"""
+
+    def __init__(self, max_chunks=MAX_BUFFERED_CHUNKS):
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = bytearray()
+        self._eof = False
+        self._aborted = threading.Event()
+
+    def write(self, data):
+        """Called by copy_expert(COPY ... TO STDOUT); blocks while the pipe is full"""
+        chunk = bytes(data)
+        while True:
+            if self._aborted.is_set():
+                raise TransferAborted("Reader aborted the transfer")
+            try:
+                self._queue.put(chunk, timeout=0.5)
+                return len(chunk)
+            except queue.Full:
+                continue
+
+    def close(self):
+        """Signal end of stream to the reader"""
+        while not self._aborted.is_set():
+            try:
+                self._queue.put(None, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def abort(self):
+        """Unblock a writer stuck on a full pipe after the reader failed"""
+        self._aborted.set()
+
+    def read(self, size=-1):
+        """Called by copy_expert(COPY ... FROM STDIN)"""
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer.extend(chunk)
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+
+def copy_table(source_factory, source_query, target_table, columns, truncate=True):
+    """
+    Copy the result of `source_query` into `target_table` on the analytics DB.
+
+    The source count and the COPY run in one REPEATABLE READ snapshot, and the
+    target is counted inside the load transaction, so the commit only happens
+    when both sides agree. Returns (rows, seconds).
+    """
+    started = time.time()
+    source_conn = source_factory()
+    target_conn = get_analytics_db_connection()
+    pipe = BoundedPipe()
+    producer_error = []
+
+    def produce():
+        try:
+            with source_conn.cursor() as cursor:
+                cursor.copy_expert(f"COPY ({source_query}) TO STDOUT (FORMAT binary)", pipe, size=CHUNK_SIZE)
+        except Exception as e:
+            producer_error.append(e)
+        finally:
+            pipe.close()
+
+    try:
+        source_conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with source_conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM ({source_query}) AS src;")
+            source_rows = cursor.fetchone()[0]
+
+        producer = threading.Thread(target=produce, name=f"copy-out-{target_table}", daemon=True)
+        producer.start()
+        consumer_error = None
+        try:
+            with target_conn.cursor() as cursor:
+                if truncate:
+                    cursor.execute(f"TRUNCATE {target_table};")
+                cursor.copy_expert(
+                    f"COPY {target_table} ({', '.join(columns)}) FROM STDIN (FORMAT binary)",
+                    pipe,
+                    size=CHUNK_SIZE,
+                )
+                cursor.execute(f"SELECT COUNT(*) AS row_count FROM {target_table};")
+                target_rows = cursor.fetchone()['row_count']
+        except Exception as e:
+            pipe.abort()
+            consumer_error = e
+        finally:
+            producer.join()
+
+        # A failed COPY TO usually surfaces on the reader side as truncated data,
+        # so report the source error first, unless it only echoes the reader's abort
+        if producer_error and not isinstance(producer_error[0], TransferAborted):
+            raise BulkLoadError(f"COPY TO failed for {target_table}: {producer_error[0]}")
+        if consumer_error:
+            raise consumer_error
+        if truncate and target_rows != source_rows:
+            raise BulkLoadError(
+                f"Row count mismatch for {target_table}: source {source_rows}, target {target_rows}"
+            )
+        target_conn.commit()
+        return source_rows, time.time() - started
+    except Exception:
+        target_conn.rollback()
+        raise
+    finally:
+        source_conn.close()
+        target_conn.close()
+
+
+def copy_tables(jobs, workers=4):
+    """
+    Run copy_table for several tables, one table per worker thread.
+
+    `jobs` maps a label to copy_table keyword arguments. Returns
+    {label: (rows, seconds)}; raises BulkLoadError listing every failed table.
+    """
+    results = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(copy_table, **kwargs): label for label, kwargs in jobs.items()}
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                results[label] = future.result()
+                rows, seconds = results[label]
+                print(f"✓ {label}: {rows} rows in {seconds:.2f}s")
+            except Exception as e:
+                failures[label] = e
+                print(f"✗ {label}: {e}")
+    if failures:
+        raise BulkLoadError(f"Bulk load failed for: {', '.join(sorted(failures))}")
+    return results
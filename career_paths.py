@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Career Path Miner
+Populates aggregates.career_path_patterns (/v2/api/graph/career-paths)
+
+Each person's experiences are streamed in start-date order through a server
+side cursor, collapsed into a role sequence (consecutive experiences in the
+same role count once, tenure summed) and inserted into a counted prefix trie.
+Every trie node holds the number of people whose career starts with that
+path, the summed tenure per position and a capped sample of user ids, so all
+frequent paths fall out of a single pass.
+
+The trie is persisted as one row per prefix in aggregates.career_path_trie
+and each person's current path in aggregates.career_path_users. Incremental
+runs subtract the old paths of people whose experiences changed (and, once a
+day, of everyone in an ongoing role, whose tenure has grown), add their new
+ones, redraw the id samples they dropped out of and re-emit the patterns from the
+trie table.
+
+Memory is bounded by MAX_PATH_LENGTH × people, not by experience count, and
+user id samples are capped at MAX_USER_IDS per path.
+
+Usage:
+    python career_paths.py                     # Incremental (full on first run)
+    python career_paths.py --full              # Rebuild the trie from scratch
+    python career_paths.py --min-support 5
+"""
+
+import argparse
+import time
+from datetime import date
+from itertools import groupby
+
+from psycopg2.extras import execute_values
+
+from db_config import get_analytics_db_connection
+from etl_sync import (
+    changed_persons, get_builder_watermark, open_ended_persons, require_staging, set_builder_watermark
+)
+
+BUILDER = 'career_path_patterns'
+MIN_SUPPORT = 3        # people sharing a path before it's reported
+MIN_PATH_LENGTH = 2    # a single role isn't a path
+MAX_PATH_LENGTH = 6    # roles kept from the start of each career
+MAX_USER_IDS = 100     # user_ids sample kept per path
+STREAM_BATCH_SIZE = 5000
+
+CHANGE_SOURCES = {
+    'chemlink_experiences': 'person_id',
+    'chemlink_persons': 'id',
+}
+
+EXPERIENCES_QUERY = """
+    SELECT e.person_id, e.role_id, e.start_date, e.end_date
+    FROM staging.chemlink_experiences e
+    JOIN staging.chemlink_persons p ON p.id = e.person_id AND p.deleted_at IS NULL
+    WHERE e.deleted_at IS NULL
+      AND e.role_id IS NOT NULL
+      AND e.start_date IS NOT NULL
+      AND (%(person_ids)s::bigint[] IS NULL OR e.person_id = ANY(%(person_ids)s))
+    ORDER BY e.person_id, e.start_date, e.id;
+"""
+
+CREATE_TABLES_SQL = """
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+    CREATE TABLE IF NOT EXISTS aggregates.career_path_trie (
+        path_vector BIGINT[] PRIMARY KEY,
+        user_count INTEGER NOT NULL,
+        tenure_sums NUMERIC[] NOT NULL,
+        user_ids BIGINT[] NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS aggregates.career_path_users (
+        user_id BIGINT PRIMARY KEY,
+        path_vector BIGINT[] NOT NULL,
+        tenures NUMERIC[] NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS aggregates.career_path_patterns (
+        path_vector BIGINT[] PRIMARY KEY,
+        role_sequence TEXT[] NOT NULL,
+        user_count INTEGER NOT NULL,
+        user_ids BIGINT[] NOT NULL,
+        avg_years_per_role NUMERIC[] NOT NULL,
+        computed_at TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    DROP INDEX IF EXISTS aggregates.career_path_patterns_user_count_idx;
+    CREATE INDEX IF NOT EXISTS career_path_patterns_keyset_idx
+        ON aggregates.career_path_patterns (user_count DESC, path_vector);
+"""
+
+# Trie deltas are staged in a temp table and merged element-wise. Changed
+# people are dropped from the old id samples before their new paths re-add
+# them; prefixes nobody reaches anymore are deleted. A sample that lost a
+# changed person may now miss lower ids of unchanged people, so those are
+# redrawn from career_path_users: every sample stays the lowest ids on its
+# prefix, as a full build leaves it.
+APPLY_DELTA_SQL = """
+    UPDATE career_path_delta d SET resample = TRUE
+    FROM aggregates.career_path_trie t
+    WHERE t.path_vector = d.path_vector AND t.user_ids && %(changed)s::bigint[];
+
+    INSERT INTO aggregates.career_path_trie AS t (path_vector, user_count, tenure_sums, user_ids)
+    SELECT path_vector, user_count, tenure_sums, user_ids FROM career_path_delta
+    ON CONFLICT (path_vector) DO UPDATE SET
+        user_count = t.user_count + EXCLUDED.user_count,
+        tenure_sums = ARRAY(
+            SELECT COALESCE(old, 0) + COALESCE(new, 0)
+            FROM unnest(t.tenure_sums, EXCLUDED.tenure_sums) AS u(old, new)
+        ),
+        user_ids = ARRAY(
+            SELECT id FROM (
+                SELECT id FROM unnest(t.user_ids) AS id WHERE id <> ALL(%(changed)s::bigint[])
+                UNION
+                SELECT id FROM unnest(EXCLUDED.user_ids) AS id
+            ) ids
+            ORDER BY id
+            LIMIT %(max_user_ids)s
+        );
+    DELETE FROM aggregates.career_path_trie WHERE user_count <= 0;
+
+    WITH ranked AS (
+        SELECT d.path_vector, u.user_id,
+               row_number() OVER (PARTITION BY d.path_vector ORDER BY u.user_id) AS rank
+        FROM aggregates.career_path_users u
+        CROSS JOIN LATERAL generate_series(1, cardinality(u.path_vector)) AS depth
+        JOIN career_path_delta d ON d.resample AND d.path_vector = u.path_vector[1:depth]
+    )
+    UPDATE aggregates.career_path_trie t
+    SET user_ids = refill.user_ids
+    FROM (
+        SELECT path_vector, array_agg(user_id ORDER BY user_id) AS user_ids
+        FROM ranked
+        WHERE rank <= %(max_user_ids)s
+        GROUP BY path_vector
+    ) refill
+    WHERE t.path_vector = refill.path_vector;
+"""
+
+EMIT_PATTERNS_SQL = """
+    TRUNCATE aggregates.career_path_patterns;
+    INSERT INTO aggregates.career_path_patterns
+        (path_vector, role_sequence, user_count, user_ids, avg_years_per_role)
+    SELECT
+        t.path_vector,
+        ARRAY(
+            SELECT COALESCE(r.title, 'Role ' || u.role_id)
+            FROM unnest(t.path_vector) WITH ORDINALITY AS u(role_id, n)
+            LEFT JOIN staging.chemlink_roles r ON r.id = u.role_id
+            ORDER BY u.n
+        ),
+        t.user_count,
+        t.user_ids,
+        ARRAY(
+            SELECT ROUND(s.total / t.user_count, 2)
+            FROM unnest(t.tenure_sums) WITH ORDINALITY AS s(total, n)
+            ORDER BY s.n
+        )
+    FROM aggregates.career_path_trie t
+    WHERE cardinality(t.path_vector) >= %(min_length)s
+      AND t.user_count >= %(min_support)s;
+"""
+
+
+class TrieNode:
+    """One role-sequence prefix: people reaching it, tenure per position, sample of ids"""
+    __slots__ = ('children', 'user_count', 'tenure_sums', 'user_ids')
+
+    def __init__(self, depth):
+        self.children = {}
+        self.user_count = 0
+        self.tenure_sums = [0.0] * depth
+        self.user_ids = []
+
+
+def career_path(experiences, today):
+    """
+    Collapse one person's ordered experiences into (role_ids, tenure_years).
+
+    Consecutive experiences with the same role are merged; only the first
+    MAX_PATH_LENGTH roles are kept.
+    """
+    roles, tenures = [], []
+    for exp in experiences:
+        end = exp['end_date'] or today
+        years = max((end - exp['start_date']).days, 0) / 365.25
+        if roles and roles[-1] == exp['role_id']:
+            tenures[-1] += years
+            continue
+        if len(roles) == MAX_PATH_LENGTH:
+            break
+        roles.append(exp['role_id'])
+        tenures.append(years)
+    return roles, tenures
+
+
+def stream_paths(conn, person_ids=None, today=None):
+    """Yield (person_id, role_ids, tenures) per person, reading experiences in batches"""
+    today = today or date.today()
+    with conn.cursor(name='career_path_stream') as cursor:
+        cursor.itersize = STREAM_BATCH_SIZE
+        cursor.execute(EXPERIENCES_QUERY, {'person_ids': person_ids})
+        for person_id, experiences in groupby(cursor, key=lambda row: row['person_id']):
+            roles, tenures = career_path(experiences, today)
+            yield person_id, roles, tenures
+
+
+def insert_path(root, person_id, roles, tenures):
+    """Count `person_id` at every prefix of its path"""
+    node = root
+    for depth, role_id in enumerate(roles, start=1):
+        child = node.children.get(role_id)
+        if child is None:
+            child = node.children[role_id] = TrieNode(depth)
+        child.user_count += 1
+        for i in range(depth):
+            child.tenure_sums[i] += tenures[i]
+        if len(child.user_ids) < MAX_USER_IDS:
+            child.user_ids.append(person_id)
+        node = child
+
+
+def trie_rows(root):
+    """Flatten the trie into (path_vector, user_count, tenure_sums, user_ids) rows"""
+    stack = [((), root)]
+    while stack:
+        path, node = stack.pop()
+        for role_id, child in node.children.items():
+            child_path = path + (role_id,)
+            yield (
+                list(child_path),
+                child.user_count,
+                [round(t, 4) for t in child.tenure_sums],
+                sorted(child.user_ids),
+            )
+            stack.append((child_path, child))
+
+
+def path_delta(delta, person_id, roles, tenures, sign):
+    """Accumulate +1/-1 contributions of one path into {prefix: [count, tenures, ids]}"""
+    for depth in range(1, len(roles) + 1):
+        entry = delta.setdefault(tuple(roles[:depth]), [0, [0.0] * depth, []])
+        entry[0] += sign
+        for i in range(depth):
+            entry[1][i] += sign * tenures[i]
+        if sign > 0:
+            entry[2].append(person_id)
+
+
+def full_build(conn, today=None):
+    """Rebuild the trie and per-user paths from every staged experience"""
+    root = TrieNode(0)
+    user_rows = []
+    for person_id, roles, tenures in stream_paths(conn, today=today):
+        insert_path(root, person_id, roles, tenures)
+        user_rows.append((person_id, roles, [round(t, 4) for t in tenures]))
+
+    with conn.cursor() as cursor:
+        cursor.execute("TRUNCATE aggregates.career_path_trie, aggregates.career_path_users;")
+        execute_values(
+            cursor,
+            "INSERT INTO aggregates.career_path_trie (path_vector, user_count, tenure_sums, user_ids) VALUES %s",
+            trie_rows(root),
+            page_size=5000,
+        )
+        execute_values(
+            cursor,
+            "INSERT INTO aggregates.career_path_users (user_id, path_vector, tenures) VALUES %s",
+            user_rows,
+            page_size=5000,
+        )
+    return len(user_rows)
+
+
+def incremental_build(conn, person_ids, today=None):
+    """Replace the trie contributions of the given people with their current paths"""
+    delta = {}
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT user_id, path_vector, tenures FROM aggregates.career_path_users WHERE user_id = ANY(%s);",
+            (person_ids,),
+        )
+        for row in cursor.fetchall():
+            path_delta(delta, row['user_id'], row['path_vector'],
+                       [float(t) for t in row['tenures']], -1)
+
+    new_paths = list(stream_paths(conn, person_ids, today))
+    for person_id, roles, tenures in new_paths:
+        path_delta(delta, person_id, roles, tenures, +1)
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS career_path_delta (
+                path_vector BIGINT[], user_count INTEGER, tenure_sums NUMERIC[], user_ids BIGINT[],
+                resample BOOLEAN NOT NULL DEFAULT FALSE
+            ) ON COMMIT DELETE ROWS;
+        """)
+        execute_values(
+            cursor,
+            "INSERT INTO career_path_delta (path_vector, user_count, tenure_sums, user_ids) VALUES %s",
+            [(list(path), count, [round(t, 4) for t in tenures], ids[:MAX_USER_IDS])
+             for path, (count, tenures, ids) in delta.items()],
+            page_size=5000,
+        )
+        # Current paths first: APPLY_DELTA_SQL redraws samples from them
+        cursor.execute("DELETE FROM aggregates.career_path_users WHERE user_id = ANY(%s);", (person_ids,))
+        execute_values(
+            cursor,
+            "INSERT INTO aggregates.career_path_users (user_id, path_vector, tenures) VALUES %s",
+            [(pid, roles, [round(t, 4) for t in tenures]) for pid, roles, tenures in new_paths],
+            page_size=5000,
+        )
+        cursor.execute(APPLY_DELTA_SQL, {'changed': person_ids, 'max_user_ids': MAX_USER_IDS})
+    return len(new_paths)
+
+
+def emit_patterns(conn, min_support):
+    """Rewrite career_path_patterns from the trie table; returns the pattern count"""
+    with conn.cursor() as cursor:
+        cursor.execute(EMIT_PATTERNS_SQL, {'min_length': MIN_PATH_LENGTH, 'min_support': min_support})
+        return cursor.rowcount
+
+
+def build(full=False, min_support=MIN_SUPPORT):
+    """Update the career path trie (incrementally unless `full` or first run) and emit patterns"""
+    started = time.time()
+    conn = get_analytics_db_connection()
+    try:
+        require_staging(conn)
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_TABLES_SQL)
+            # Ongoing roles are measured to the database's date, as open_ended_persons compares it
+            cursor.execute("SELECT CURRENT_DATE AS today;")
+            today = cursor.fetchone()['today']
+
+        since = None if full else get_builder_watermark(conn, BUILDER)
+        changed, watermark = changed_persons(conn, CHANGE_SOURCES, since)
+        ongoing = open_ended_persons(conn, BUILDER) - changed if since is not None else set()
+        if since is None:
+            people = full_build(conn, today)
+            print(f"✓ Inserted {people} career paths into the trie")
+        elif changed or ongoing:
+            people = incremental_build(conn, sorted(changed | ongoing), today)
+            print(f"✓ Updated trie for {len(changed)} changed and {len(ongoing)} ongoing-role people "
+                  f"({people} with paths)")
+        else:
+            print("✓ No experience changes since last build")
+
+        patterns = emit_patterns(conn, min_support)
+        set_builder_watermark(conn, BUILDER, watermark)
+        conn.commit()
+        print(f"✓ Wrote {patterns} career path patterns (support ≥ {min_support}) "
+              f"in {time.time() - started:.2f}s")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build aggregates.career_path_patterns')
+    parser.add_argument('--full', action='store_true', help='Rebuild the trie from every experience')
+    parser.add_argument('--min-support', type=int, default=MIN_SUPPORT,
+                        help=f'Minimum people sharing a path (default: {MIN_SUPPORT})')
+    args = parser.parse_args()
+    build(full=args.full, min_support=args.min_support)
+
+
+if __name__ == '__main__':
+    main()
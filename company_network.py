@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Company Network Map Builder
+Populates aggregates.company_network_map from staged experiences
+
+Every (employee, company) link becomes a 1 in a sparse employee×company
+matrix E. EᵀE is then the company×company co-employment matrix: its diagonal
+holds each company's headcount and each off-diagonal entry the number of
+people who worked at both. Strength is the cosine of the two companies'
+employee sets, shared / sqrt(size_1 · size_2), so large companies don't rank
+first just for being large.
+
+Only pairs with at least --min-shared employees are kept. employee_ids for
+those pairs come from expanding each employee's companies into pairs once,
+grouped by degree, instead of intersecting employee lists pair by pair.
+
+Usage:
+    python company_network.py                  # Rebuild with the default threshold
+    python company_network.py --min-shared 3
+"""
+
+import argparse
+import time
+
+import numpy as np
+from psycopg2.extras import execute_values
+from scipy import sparse
+
+from company_search import ensure_search_indexes
+from db_config import get_analytics_db_connection
+from etl_sync import require_staging
+
+MIN_SHARED_EMPLOYEES = 2
+
+EMPLOYMENT_QUERY = """
+    SELECT DISTINCT e.person_id, e.company_id
+    FROM staging.chemlink_experiences e
+    JOIN staging.chemlink_persons p ON p.id = e.person_id AND p.deleted_at IS NULL
+    WHERE e.deleted_at IS NULL AND e.company_id IS NOT NULL;
+"""
+
+CREATE_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+    CREATE TABLE IF NOT EXISTS aggregates.company_network_map (
+        company_id_1 BIGINT NOT NULL,
+        company_id_2 BIGINT NOT NULL,
+        company_name_1 TEXT,
+        company_name_2 TEXT,
+        shared_employee_count INTEGER NOT NULL,
+        employee_ids BIGINT[] NOT NULL,
+        network_strength_score NUMERIC(6, 4) NOT NULL,
+        computed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (company_id_1, company_id_2)
+    );
+    DROP INDEX IF EXISTS aggregates.company_network_map_shared_idx;
+    CREATE INDEX IF NOT EXISTS company_network_map_keyset_idx
+        ON aggregates.company_network_map (shared_employee_count DESC, company_id_1, company_id_2);
+    CREATE INDEX IF NOT EXISTS company_network_map_company_2_idx
+        ON aggregates.company_network_map (company_id_2);
+"""
+
+
+def employment_matrix(person_ids, company_ids):
+    """
+    Binary CSR employee×company matrix from (person, company) links.
+
+    Returns (E, employee_ids, company_ids) with sorted id axes.
+    """
+    employees, rows = np.unique(person_ids, return_inverse=True)
+    companies, cols = np.unique(company_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(employees), len(companies)),
+    )
+    # Repeated (person, company) links were summed; a person counts once
+    matrix.data[:] = 1
+    return matrix, employees, companies
+
+
+def company_pairs(matrix, min_shared=MIN_SHARED_EMPLOYEES):
+    """
+    Company pairs sharing at least `min_shared` employees.
+
+    Returns column indexes (left < right), shared counts and cosine strength.
+    """
+    co_employment = (matrix.T @ matrix).tocsr()
+    sizes = co_employment.diagonal().astype(np.float64)
+    upper = sparse.triu(co_employment, k=1).tocoo()
+    keep = upper.data >= min_shared
+    left, right, shared = upper.row[keep], upper.col[keep], upper.data[keep]
+    strength = shared / np.sqrt(sizes[left] * sizes[right])
+    return left, right, shared, strength
+
+
+def pair_employees(matrix, left, right):
+    """
+    Employee row indexes for each (left, right) company pair.
+
+    Each employee with k companies yields k·(k-1)/2 company pairs; employees
+    are grouped by k so every group expands with one triu_indices call.
+    Returns a list aligned with left/right.
+    """
+    n_companies = matrix.shape[1]
+    wanted = left.astype(np.int64) * n_companies + right
+    degrees = np.diff(matrix.indptr)
+    pair_keys, pair_rows = [], []
+    for k in np.unique(degrees[degrees >= 2]):
+        rows = np.flatnonzero(degrees == k)
+        # CSR keeps each row's column indexes sorted, so a < b below
+        starts = matrix.indptr[rows]
+        companies = matrix.indices[starts[:, None] + np.arange(k)]
+        a, b = np.triu_indices(k, 1)
+        keys = companies[:, a].astype(np.int64) * n_companies + companies[:, b]
+        pair_keys.append(keys.ravel())
+        pair_rows.append(np.repeat(rows, len(a)))
+
+    if not pair_keys:
+        return [np.zeros(0, dtype=np.int64) for _ in wanted]
+    keys = np.concatenate(pair_keys)
+    rows = np.concatenate(pair_rows)
+    selected = np.isin(keys, wanted)
+    keys, rows = keys[selected], rows[selected]
+
+    order = np.lexsort((rows, keys))
+    keys, rows = keys[order], rows[order]
+    bounds = np.searchsorted(keys, wanted, side='left'), np.searchsorted(keys, wanted, side='right')
+    return [rows[start:end] for start, end in zip(*bounds)]
+
+
+def compute_network(person_ids, company_ids, min_shared=MIN_SHARED_EMPLOYEES):
+    """
+    Compute the company network from parallel person/company id arrays.
+
+    Returns a dict of aligned arrays/lists: company_id_1, company_id_2,
+    shared_employee_count, network_strength_score, employee_ids.
+    """
+    matrix, employees, companies = employment_matrix(person_ids, company_ids)
+    left, right, shared, strength = company_pairs(matrix, min_shared)
+    members = pair_employees(matrix, left, right)
+    return {
+        'company_id_1': companies[left],
+        'company_id_2': companies[right],
+        'shared_employee_count': shared,
+        'network_strength_score': np.round(strength, 4),
+        'employee_ids': [employees[rows] for rows in members],
+    }
+
+
+def load_employment(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(EMPLOYMENT_QUERY)
+        rows = cursor.fetchall()
+    return (
+        np.array([row['person_id'] for row in rows], dtype=np.int64),
+        np.array([row['company_id'] for row in rows], dtype=np.int64),
+    )
+
+
+def company_names(conn, company_ids):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, name FROM staging.chemlink_companies WHERE id = ANY(%s);",
+            (company_ids,),
+        )
+        return {row['id']: row['name'] for row in cursor.fetchall()}
+
+
+def write_network(conn, network):
+    """Replace aggregates.company_network_map with the computed pairs"""
+    ids = np.union1d(network['company_id_1'], network['company_id_2']).tolist()
+    names = company_names(conn, ids)
+    rows = [
+        (c1, c2, names.get(c1), names.get(c2), shared, employee_ids.tolist(), strength)
+        for c1, c2, shared, strength, employee_ids in zip(
+            network['company_id_1'].tolist(),
+            network['company_id_2'].tolist(),
+            network['shared_employee_count'].tolist(),
+            network['network_strength_score'].tolist(),
+            network['employee_ids'],
+        )
+    ]
+    with conn.cursor() as cursor:
+        cursor.execute("TRUNCATE aggregates.company_network_map;")
+        execute_values(
+            cursor,
+            """
+            INSERT INTO aggregates.company_network_map
+                (company_id_1, company_id_2, company_name_1, company_name_2,
+                 shared_employee_count, employee_ids, network_strength_score)
+            VALUES %s
+            """,
+            rows,
+            page_size=5000,
+        )
+    return len(rows)
+
+
+def build(min_shared=MIN_SHARED_EMPLOYEES):
+    """Rebuild aggregates.company_network_map"""
+    started = time.time()
+    conn = get_analytics_db_connection()
+    try:
+        require_staging(conn)
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_TABLE_SQL)
+        ensure_search_indexes(conn)
+        person_ids, company_ids = load_employment(conn)
+        print(f"✓ Loaded {len(person_ids)} employee-company links")
+
+        network = compute_network(person_ids, company_ids, min_shared)
+        count = write_network(conn, network)
+        conn.commit()
+        print(f"✓ Wrote {count} company pairs (≥{min_shared} shared employees) "
+              f"in {time.time() - started:.2f}s")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build aggregates.company_network_map')
+    parser.add_argument('--min-shared', type=int, default=MIN_SHARED_EMPLOYEES,
+                        help=f'Minimum shared employees per pair (default: {MIN_SHARED_EMPLOYEES})')
+    args = parser.parse_args()
+    build(min_shared=args.min_shared)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Company name search
+Resolves a free-text company name to the company ids in
+aggregates.company_network_map
+
+Names are normalized (accents folded, case and punctuation dropped,
+whitespace collapsed) and indexed in memory by character trigram. A query's
+candidates are the intersection of its trigrams' posting lists, confirmed by
+a substring check, then ranked: exact name, name prefix, word prefix, then
+any substring; shorter names first within a rank. Queries shorter than a
+trigram scan the names directly.
+
+The in-memory index is a graph_index.SnapshotIndex, so it is rebuilt in the
+background when the network map changes. Until it is loaded, lookups fall
+back to ILIKE against the map's pg_trgm GIN indexes.
+
+Usage:
+    python company_search.py "dow chem"          # Ranked matches
+    python company_search.py "basf" --limit 5
+    python company_search.py --create-indexes    # pg_trgm indexes only
+"""
+
+import argparse
+import re
+import unicodedata
+
+import numpy as np
+
+from db_config import get_analytics_db_connection
+from graph_index import SnapshotIndex
+
+NETWORK_TABLE = 'aggregates.company_network_map'
+GRAM = 3
+
+# Match kinds, best first
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+MATCH_KINDS = ['exact', 'prefix', 'word_prefix', 'substring']
+
+COMPANIES_QUERY = """
+    SELECT company_id_1 AS company_id, company_name_1 AS company_name
+    FROM aggregates.company_network_map WHERE company_name_1 IS NOT NULL
+    UNION
+    SELECT company_id_2, company_name_2
+    FROM aggregates.company_network_map WHERE company_name_2 IS NOT NULL;
+"""
+
+# Unanchored ILIKE can only use an index through pg_trgm; each arm of the
+# fallback query below hits one of these
+TRIGRAM_INDEX_SQL = """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS company_network_map_name_1_trgm_idx
+        ON aggregates.company_network_map USING gin (company_name_1 gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS company_network_map_name_2_trgm_idx
+        ON aggregates.company_network_map USING gin (company_name_2 gin_trgm_ops);
+"""
+
+FALLBACK_QUERY = """
+    SELECT company_id_1 AS company_id, company_name_1 AS company_name
+    FROM aggregates.company_network_map WHERE company_name_1 ILIKE %(pattern)s
+    UNION
+    SELECT company_id_2, company_name_2
+    FROM aggregates.company_network_map WHERE company_name_2 ILIKE %(pattern)s;
+"""
+
+
+def normalize(name):
+    """Lowercase ASCII words separated by single spaces"""
+    folded = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', folded.lower()).split())
+
+
+def trigrams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def match_kind(normalized_name, query):
+    """Rank of `query` within `normalized_name`, or None if it doesn't occur"""
+    if normalized_name == query:
+        return EXACT
+    if normalized_name.startswith(query):
+        return PREFIX
+    if f' {query}' in normalized_name:
+        return WORD_PREFIX
+    if query in normalized_name:
+        return SUBSTRING
+    return None
+
+
+def ranked(candidates, query, limit=None):
+    """
+    Rank (company_id, company_name, normalized_name) candidates against a
+    normalized query. Returns match dicts, best first.
+    """
+    matches = []
+    for company_id, company_name, normalized_name in candidates:
+        kind = match_kind(normalized_name, query)
+        if kind is not None:
+            matches.append((kind, len(normalized_name), normalized_name, company_id, company_name))
+    matches.sort()
+    return [
+        {'company_id': company_id, 'company_name': company_name, 'match': MATCH_KINDS[kind]}
+        for kind, _, _, company_id, company_name in matches[:limit]
+    ]
+
+
+def escape_like(text):
+    return re.sub(r'([\\%_])', r'\\\1', text)
+
+
+class CompanyNameIndex:
+    """Trigram posting lists over normalized company names"""
+
+    def __init__(self, rows):
+        self.company_ids = [row['company_id'] for row in rows]
+        self.names = [row['company_name'] for row in rows]
+        self.normalized = [normalize(name) for name in self.names]
+        postings = {}
+        for position, name in enumerate(self.normalized):
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(position)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+    def candidates(self, query):
+        """Positions of names that may contain `query` (every position for short queries)"""
+        grams = trigrams(query)
+        if not grams:
+            return range(len(self.normalized))
+        lists = sorted((self.postings.get(gram) for gram in grams), key=lambda p: 0 if p is None else len(p))
+        if lists[0] is None:
+            return []
+        positions = lists[0]
+        for other in lists[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+            if not len(positions):
+                break
+        return positions.tolist()
+
+    def search(self, query, limit=None):
+        query = normalize(query)
+        if not query:
+            return []
+        return ranked(
+            ((self.company_ids[p], self.names[p], self.normalized[p]) for p in self.candidates(query)),
+            query,
+            limit,
+        )
+
+    def stats(self):
+        return {
+            'companies': len(self.company_ids),
+            'trigrams': len(self.postings),
+            'posting_bytes': sum(p.nbytes for p in self.postings.values()),
+        }
+
+
+class CompanySearch(SnapshotIndex):
+    """Company name index over the network map, reloaded when the map changes"""
+
+    name = 'company-search'
+
+    def relations(self):
+        return [NETWORK_TABLE]
+
+    def build(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS present;", (NETWORK_TABLE,))
+            if not cursor.fetchone()['present']:
+                return CompanyNameIndex([])
+            cursor.execute(COMPANIES_QUERY)
+            return CompanyNameIndex(cursor.fetchall())
+
+    def resolve(self, name, limit=None):
+        """Ranked matches for `name`, from memory or via SQL until the index is loaded"""
+        index = self.current()
+        if index is not None:
+            return index.search(name, limit)
+        return search_database(name, limit)
+
+    def stats(self):
+        stats = self.snapshot_stats()
+        if stats['loaded']:
+            stats.update(self._snapshot['data'].stats())
+        return stats
+
+
+def search_database(name, limit=None):
+    """Ranked matches straight from the analytics DB"""
+    query = normalize(name)
+    if not query:
+        return []
+    # ILIKE on the raw name narrows by trigram index; ranking re-checks on the
+    # normalized form. Each word is matched separately since punctuation in
+    # the stored name may sit between them.
+    pattern = '%' + '%'.join(escape_like(word) for word in query.split()) + '%'
+    conn = get_analytics_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(FALLBACK_QUERY, {'pattern': pattern})
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return ranked(
+        ((row['company_id'], row['company_name'], normalize(row['company_name'])) for row in rows),
+        query,
+        limit,
+    )
+
+
+def ensure_search_indexes(conn):
+    """Create the pg_trgm indexes if the extension is available; returns whether they exist"""
+    with conn.cursor() as cursor:
+        cursor.execute("SAVEPOINT company_search_indexes;")
+        try:
+            cursor.execute(TRIGRAM_INDEX_SQL)
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT company_search_indexes;")
+            print(f"✗ pg_trgm indexes skipped: {str(e).splitlines()[0]}")
+            return False
+        cursor.execute("RELEASE SAVEPOINT company_search_indexes;")
+    return True
+
+
+company_search = CompanySearch()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search company names in the network map')
+    parser.add_argument('query', nargs='?', help='Company name or fragment')
+    parser.add_argument('--limit', type=int, default=20, help='Matches to show (default: 20)')
+    parser.add_argument('--create-indexes', action='store_true',
+                        help='Create the pg_trgm indexes used by the SQL fallback')
+    args = parser.parse_args()
+
+    if args.create_indexes:
+        conn = get_analytics_db_connection()
+        try:
+            if ensure_search_indexes(conn):
+                print("✓ pg_trgm indexes ready")
+            conn.commit()
+        finally:
+            conn.close()
+    if args.query:
+        snapshot = company_search.load()
+        print(f"✓ Indexed {snapshot['data'].stats()['companies']} companies in {snapshot['load_ms']}ms")
+        for match in company_search.resolve(args.query, args.limit):
+            print(f"  {match['company_id']:>8}  {match['company_name']}  ({match['match']})")
+    elif not args.create_indexes:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,25 @@
 Database Schema Comparison Tool
 Compares schemas across DEV, UAT, and PROD environments
 
+Each environment is snapshotted with one catalog query each for tables,
+columns, indexes and constraints, and the three environments are fetched
+concurrently. Snapshots are cached in .schema_cache/ keyed by a catalog
+fingerprint (the xmin of every user table's pg_class, pg_attribute,
+pg_attrdef, pg_index and pg_constraint rows, which changes with any DDL), so
+an unchanged environment costs a single query.
+
 Usage:
     python compare_schemas.py
+    python compare_schemas.py --no-cache      # Always fetch full snapshots
 """
 
+import argparse
+import hashlib
 import psycopg2
+import psycopg2.extensions
 import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import json
 from datetime import datetime
 from dotenv import load_dotenv
@@ -17,6 +29,41 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+ENVIRONMENTS = ['DEV', 'UAT', 'PROD']
+# db_config (target, env) each snapshot comes from; must follow get_db_url
+SNAPSHOT_SOURCES = {
+    'DEV': ('chemlink', 'dev'),
+    'UAT': ('engagement', 'uat'),
+    'PROD': ('engagement', 'prod'),
+}
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.schema_cache')
+
+USER_SCHEMAS = "NOT IN ('pg_catalog', 'information_schema')"
+
+FINGERPRINT_SQL = f"""
+    WITH rels AS (
+        SELECT c.oid, c.xmin
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname {USER_SCHEMAS} AND n.nspname NOT LIKE 'pg_toast%%'
+    )
+    SELECT md5(string_agg(entry, ',' ORDER BY entry)) FROM (
+        SELECT 'c' || oid || ':' || xmin AS entry FROM rels
+        UNION ALL
+        SELECT 'a' || a.attrelid || '.' || a.attnum || ':' || a.xmin
+        FROM pg_attribute a JOIN rels ON rels.oid = a.attrelid
+        UNION ALL
+        SELECT 'd' || d.adrelid || '.' || d.adnum || ':' || d.xmin
+        FROM pg_attrdef d JOIN rels ON rels.oid = d.adrelid
+        UNION ALL
+        SELECT 'i' || i.indexrelid || ':' || i.xmin
+        FROM pg_index i JOIN rels ON rels.oid = i.indrelid
+        UNION ALL
+        SELECT 'k' || k.oid || ':' || k.xmin
+        FROM pg_constraint k JOIN rels ON rels.oid = k.conrelid
+    ) entries;
+"""
+
 def get_db_url(env_name):
     """Construct database URL from environment variables"""
     if env_name == 'DEV':
@@ -67,10 +114,23 @@ def get_tables(conn):
     cursor.close()
     return results
 
-def get_table_columns(conn, schema, table):
-    """Get all columns for a specific table"""
-    query = """
-        SELECT 
+def _tuple_cursor(conn):
+    # Plain tuples even on connections opened with a dict cursor factory
+    return conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+
+def _group_by_table(rows):
+    """{schema.table: [row without its leading schema, table]} in row order"""
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[f"{row[0]}.{row[1]}"].append(tuple(row[2:]))
+    return grouped
+
+def get_all_columns(conn):
+    """Columns of every table, one query: {schema.table: [column rows]}"""
+    query = f"""
+        SELECT
+            table_schema,
+            table_name,
             column_name,
             data_type,
             character_maximum_length,
@@ -78,35 +138,35 @@ def get_table_columns(conn, schema, table):
             column_default,
             ordinal_position
         FROM information_schema.columns
-        WHERE table_schema = %s AND table_name = %s
-        ORDER BY ordinal_position;
+        WHERE table_schema {USER_SCHEMAS}
+        ORDER BY table_schema, table_name, ordinal_position;
     """
-    cursor = conn.cursor()
-    cursor.execute(query, (schema, table))
-    results = cursor.fetchall()
-    cursor.close()
-    return results
+    with _tuple_cursor(conn) as cursor:
+        cursor.execute(query)
+        return _group_by_table(cursor.fetchall())
 
-def get_table_indexes(conn, schema, table):
-    """Get all indexes for a specific table"""
-    query = """
+def get_all_indexes(conn):
+    """Indexes of every table, one query: {schema.table: [(indexname, indexdef)]}"""
+    query = f"""
         SELECT
+            schemaname,
+            tablename,
             indexname,
             indexdef
         FROM pg_indexes
-        WHERE schemaname = %s AND tablename = %s
-        ORDER BY indexname;
+        WHERE schemaname {USER_SCHEMAS}
+        ORDER BY schemaname, tablename, indexname;
     """
-    cursor = conn.cursor()
-    cursor.execute(query, (schema, table))
-    results = cursor.fetchall()
-    cursor.close()
-    return results
+    with _tuple_cursor(conn) as cursor:
+        cursor.execute(query)
+        return _group_by_table(cursor.fetchall())
 
-def get_table_constraints(conn, schema, table):
-    """Get all constraints for a specific table"""
-    query = """
+def get_all_constraints(conn):
+    """Constraints of every table, one query: {schema.table: [constraint rows]}"""
+    query = f"""
         SELECT
+            tc.table_schema,
+            tc.table_name,
             tc.constraint_name,
             tc.constraint_type,
             kcu.column_name,
@@ -119,73 +179,104 @@ def get_table_constraints(conn, schema, table):
         LEFT JOIN information_schema.constraint_column_usage AS ccu
             ON ccu.constraint_name = tc.constraint_name
             AND ccu.table_schema = tc.table_schema
-        WHERE tc.table_schema = %s AND tc.table_name = %s
-        ORDER BY tc.constraint_type, tc.constraint_name;
+        WHERE tc.table_schema {USER_SCHEMAS}
+        ORDER BY tc.table_schema, tc.table_name, tc.constraint_type, tc.constraint_name;
     """
-    cursor = conn.cursor()
-    cursor.execute(query, (schema, table))
-    results = cursor.fetchall()
-    cursor.close()
-    return results
+    with _tuple_cursor(conn) as cursor:
+        cursor.execute(query)
+        return _group_by_table(cursor.fetchall())
+
+def get_catalog_fingerprint(conn):
+    """Hash that changes whenever DDL touches a user table"""
+    with _tuple_cursor(conn) as cursor:
+        cursor.execute(FINGERPRINT_SQL)
+        return cursor.fetchone()[0] or 'empty'
+
+def _cache_path(env_name):
+    return os.path.join(CACHE_DIR, f"{env_name.lower()}.json")
+
+def _cache_key(env_name, fingerprint):
+    # The server/database is part of the key so changed credentials never reuse a snapshot
+    server = get_db_url(env_name).split('@', 1)[-1]
+    return hashlib.sha1(f"{server}|{fingerprint}".encode()).hexdigest()
+
+def load_cached_snapshot(env_name, key):
+    try:
+        with open(_cache_path(env_name)) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached['snapshot'] if cached.get('key') == key else None
+
+def save_cached_snapshot(env_name, key, snapshot):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(env_name)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'key': key, 'snapshot': snapshot}, f, default=str)
+    os.replace(path + '.tmp', path)
+
+def build_snapshot(conn, env_name):
+    """Snapshot of every table from four catalog queries"""
+    snapshot = {
+        'environment': env_name,
+        'timestamp': datetime.now().isoformat(),
+        'tables': {}
+    }
+    columns = get_all_columns(conn)
+    indexes = get_all_indexes(conn)
+    constraints = get_all_constraints(conn)
+
+    for schema, table, owner in get_tables(conn):
+        table_key = f"{schema}.{table}"
+        snapshot['tables'][table_key] = {
+            'schema': schema,
+            'table': table,
+            'owner': owner,
+            'columns': [
+                {
+                    'name': col[0],
+                    'type': col[1],
+                    'max_length': col[2],
+                    'nullable': col[3],
+                    'default': col[4],
+                    'position': col[5]
+                } for col in columns.get(table_key, [])
+            ],
+            'indexes': [
+                {
+                    'name': idx[0],
+                    'definition': idx[1]
+                } for idx in indexes.get(table_key, [])
+            ],
+            'constraints': [
+                {
+                    'name': cons[0],
+                    'type': cons[1],
+                    'column': cons[2],
+                    'foreign_table': cons[3],
+                    'foreign_column': cons[4]
+                } for cons in constraints.get(table_key, [])
+            ]
+        }
+    return snapshot
 
-def get_schema_snapshot(env_name):
+def get_schema_snapshot(env_name, use_cache=True):
     """Get complete schema snapshot for an environment"""
     print(f"Fetching schema for {env_name}...")
     
     try:
         conn = get_db_connection(env_name)
-        snapshot = {
-            'environment': env_name,
-            'timestamp': datetime.now().isoformat(),
-            'tables': {}
-        }
-        
-        tables = get_tables(conn)
-        
-        for schema, table, owner in tables:
-            table_key = f"{schema}.{table}"
-            
-            # Get columns
-            columns = get_table_columns(conn, schema, table)
-            
-            # Get indexes
-            indexes = get_table_indexes(conn, schema, table)
-            
-            # Get constraints
-            constraints = get_table_constraints(conn, schema, table)
-            
-            snapshot['tables'][table_key] = {
-                'schema': schema,
-                'table': table,
-                'owner': owner,
-                'columns': [
-                    {
-                        'name': col[0],
-                        'type': col[1],
-                        'max_length': col[2],
-                        'nullable': col[3],
-                        'default': col[4],
-                        'position': col[5]
-                    } for col in columns
-                ],
-                'indexes': [
-                    {
-                        'name': idx[0],
-                        'definition': idx[1]
-                    } for idx in indexes
-                ],
-                'constraints': [
-                    {
-                        'name': cons[0],
-                        'type': cons[1],
-                        'column': cons[2],
-                        'foreign_table': cons[3],
-                        'foreign_column': cons[4]
-                    } for cons in constraints
-                ]
-            }
-        
-        conn.close()
+        try:
+            key = _cache_key(env_name, get_catalog_fingerprint(conn)) if use_cache else None
+            snapshot = load_cached_snapshot(env_name, key) if use_cache else None
+            if snapshot is not None:
+                print(f"✓ {env_name} unchanged since {snapshot['timestamp']} (cached, {len(snapshot['tables'])} tables)")
+                return snapshot
+            snapshot = build_snapshot(conn, env_name)
+        finally:
+            conn.close()
+        if use_cache:
+            save_cached_snapshot(env_name, key, snapshot)
         print(f"✓ Found {len(snapshot['tables'])} tables in {env_name}")
         return snapshot
         
@@ -193,6 +284,12 @@ def get_schema_snapshot(env_name):
         print(f"✗ Error fetching schema for {env_name}: {e}")
         return None
 
+def get_schema_snapshots(envs=ENVIRONMENTS, use_cache=True):
+    """Snapshots of several environments, fetched concurrently: {env: snapshot}"""
+    with ThreadPoolExecutor(max_workers=len(envs)) as pool:
+        results = list(pool.map(lambda env: get_schema_snapshot(env, use_cache), envs))
+    return {env: snapshot for env, snapshot in zip(envs, results) if snapshot}
+
 def compare_schemas(snapshots):
     """Compare schemas across environments"""
     comparison = {
@@ -415,16 +512,16 @@ def generate_report(comparison, snapshots):
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description='Compare schemas across DEV, UAT and PROD')
+    parser.add_argument('--no-cache', action='store_true', help='Fetch full snapshots even if the catalog is unchanged')
+    args = parser.parse_args()
+
     print("\nDatabase Schema Comparison Tool")
     print("=" * 80)
     print()
     
     # Fetch schemas
-    snapshots = {}
-    for env in ['DEV', 'UAT', 'PROD']:
-        snapshot = get_schema_snapshot(env)
-        if snapshot:
-            snapshots[env] = snapshot
+    snapshots = get_schema_snapshots(ENVIRONMENTS, use_cache=not args.no_cache)
     
     if not snapshots:
         print("\n✗ No schemas fetched. Check database connections.")
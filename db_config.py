@@ -1,7 +1,10 @@
 import os
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
+from metrics import observe_query
+from slow_query_log import slow_query_log
 
 load_dotenv()
 
@@ -17,6 +20,8 @@ def get_chemlink_env_connection():
         return get_chemlink_dev_db_connection()
     elif app_env == 'kube':
         return get_chemlink_kube_db_connection()
+    elif app_env == 'local':
+        return get_chemlink_local_db_connection()
     else:  # default to uat/staging
         return get_chemlink_db_connection()
 
@@ -29,6 +34,8 @@ def get_engagement_db_connection():
         return get_engagement_prd_db_connection()
     elif app_env == 'kube':
         return get_engagement_kube_db_connection()
+    elif app_env == 'local':
+        return get_engagement_local_db_connection()
     else:  # default to uat/staging
         return get_engagement_uat_db_connection()
 
@@ -104,6 +111,13 @@ def get_engagement_kube_db_connection():
 
 def get_kratos_db_connection():
     """Get connection to Kratos identity database (default: production)"""
+    load_dotenv(override=True)
+    if os.getenv('APP_ENV', 'uat').lower() == 'local':
+        return get_kratos_local_db_connection()
+    return get_kratos_prd_db_connection()
+
+def get_kratos_prd_db_connection():
+    """Get connection to the configured Kratos database (KRATOS_DB_* or KRATOS_PRD_DB_*)"""
     host = os.getenv('KRATOS_DB_HOST') or os.getenv('KRATOS_PRD_DB_HOST')
     if not host:
         raise RuntimeError("KRATOS_DB_HOST or KRATOS_PRD_DB_HOST must be configured")
@@ -116,13 +130,84 @@ def get_kratos_db_connection():
         password=os.getenv('KRATOS_DB_PASSWORD', os.getenv('KRATOS_PRD_DB_PASSWORD'))
     )
 
-def execute_query(connection, query, params=None):
+def _get_local_db_connection(name_var, default_name):
+    return psycopg2.connect(
+        host=os.getenv('LOCAL_DB_HOST', 'localhost'),
+        port=os.getenv('LOCAL_DB_PORT', 5432),
+        database=os.getenv(name_var, default_name),
+        user=os.getenv('LOCAL_DB_USER', 'postgres'),
+        password=os.getenv('LOCAL_DB_PASSWORD', 'postgres')
+    )
+
+def get_chemlink_local_db_connection():
+    """Get connection to the local synthetic ChemLink database (synthetic_data.py)"""
+    return _get_local_db_connection('LOCAL_CHEMLINK_DB_NAME', 'chemlink_local')
+
+def get_engagement_local_db_connection():
+    """Get connection to the local synthetic Engagement database (synthetic_data.py)"""
+    return _get_local_db_connection('LOCAL_ENGAGEMENT_DB_NAME', 'engagement_local')
+
+def get_kratos_local_db_connection():
+    """Get connection to the local synthetic Kratos database (synthetic_data.py)"""
+    return _get_local_db_connection('LOCAL_KRATOS_DB_NAME', 'kratos_local')
+
+def get_analytics_db_connection():
+    """Connect to local analytics database for V2"""
+    return psycopg2.connect(
+        host=os.getenv('ANALYTICS_DB_HOST', 'localhost'),
+        database='chemlink_analytics',
+        user=os.getenv('ANALYTICS_DB_USER', 'postgres'),
+        password=os.getenv('ANALYTICS_DB_PASSWORD', 'postgres'),
+        cursor_factory=RealDictCursor
+    )
+
+# (host variable, connection factory) per query target and environment, for
+# tools that check every environment rather than the one APP_ENV selects
+ENVIRONMENT_CONNECTIONS = {
+    'chemlink': {
+        'dev': ('CHEMLINK_DEV_DB_HOST', get_chemlink_dev_db_connection),
+        'uat': ('CHEMLINK_DB_HOST', get_chemlink_db_connection),
+        'prod': ('CHEMLINK_PRD_DB_HOST', get_chemlink_prd_db_connection),
+        'kube': ('CHEMLINK_KUBE_DB_HOST', get_chemlink_kube_db_connection),
+        'local': ('LOCAL_DB_HOST', get_chemlink_local_db_connection),
+    },
+    'engagement': {
+        'uat': ('ENGAGEMENT_DB_HOST', get_engagement_uat_db_connection),
+        'prod': ('ENGAGEMENT_PRD_DB_HOST', get_engagement_prd_db_connection),
+        'kube': ('ENGAGEMENT_KUBE_DB_HOST', get_engagement_kube_db_connection),
+        'local': ('LOCAL_DB_HOST', get_engagement_local_db_connection),
+    },
+    'kratos': {
+        'prod': (('KRATOS_DB_HOST', 'KRATOS_PRD_DB_HOST'), get_kratos_prd_db_connection),
+        'local': ('LOCAL_DB_HOST', get_kratos_local_db_connection),
+    },
+    'analytics': {'local': (None, get_analytics_db_connection)},
+}
+
+def configured_environments(target):
+    """{env: connection factory} for the environments of `target` with a host configured"""
+    configured = {}
+    for env, (host_vars, connect) in ENVIRONMENT_CONNECTIONS[target].items():
+        if isinstance(host_vars, str):
+            host_vars = (host_vars,)
+        if host_vars is None or any(os.getenv(var) for var in host_vars):
+            configured[env] = connect
+    return configured
+
+def execute_query(connection, query, params=None, query_id='adhoc', database=None):
     """Execute a query and return results as list of dictionaries"""
+    database = database or connection.info.dbname
+    started = time.perf_counter()
     try:
         with connection.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute(query, params)
-            return cursor.fetchall()
+            results = cursor.fetchall()
+        elapsed = time.perf_counter() - started
+        observe_query(query_id, database, elapsed, len(results))
+        slow_query_log.check(query_id, database, query, params, elapsed)
+        return results
     except Exception as e:
+        observe_query(query_id, database, time.perf_counter() - started)
         print(f"Database error: {e}")
         raise
     finally:
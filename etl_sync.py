@@ -0,0 +1,1077 @@
+#!/usr/bin/env python3
+"""
+Incremental ETL Sync
+Populates the chemlink_analytics staging layer and the daily/monthly aggregates
+
+Each source table has a watermark (its updated_at/created_at column) stored in
+staging.sync_watermarks. A sync only extracts rows changed since the last
+watermark, upserts them into staging.<source>_<table>, and recomputes just the
+days and months those rows touch in aggregates.daily_metrics and
+aggregates.monthly_metrics. Watermarks record the APP_ENV they were synced
+from; after switching environments only --full is allowed.
+
+Usage:
+    python etl_sync.py                          # Incremental sync of every table
+    python etl_sync.py --full                   # COPY-reload staging, rebuild everything
+    python etl_sync.py --tables chemlink_persons engagement_posts
+"""
+
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+from functools import partial
+
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+from bulk_loader import copy_tables
+from db_config import (
+    get_chemlink_env_connection,
+    get_engagement_db_connection,
+    get_kratos_db_connection,
+    get_analytics_db_connection,
+)
+from partition_manager import ensure_partitions, retention_start
+
+SOURCE_CONNECTIONS = {
+    'chemlink': get_chemlink_env_connection,
+    'engagement': get_engagement_db_connection,
+    'kratos': get_kratos_db_connection,
+}
+
+# Staging tables, keyed by their name in the staging schema.
+#   columns:       (name, type) pairs; the extract casts to these types
+#   watermark:     column compared against the stored watermark
+#   event_columns: timestamp columns whose dates feed the daily aggregates
+SYNC_TABLES = {
+    'chemlink_persons': {
+        'source': 'chemlink',
+        'table': 'persons',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': ['created_at', 'updated_at'],
+        'columns': [
+            ('id', 'bigint'), ('person_id', 'text'), ('first_name', 'text'),
+            ('last_name', 'text'), ('email', 'text'), ('has_finder', 'boolean'),
+            ('headline_description', 'text'), ('linked_in_url', 'text'),
+            ('location_id', 'bigint'), ('company_id', 'bigint'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_view_access': {
+        'source': 'chemlink',
+        'table': 'view_access',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': ['created_at'],
+        'columns': [
+            ('id', 'bigint'), ('person_id', 'bigint'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_query_votes': {
+        'source': 'chemlink',
+        'table': 'query_votes',
+        'key': 'id',
+        # query_votes has no deleted_at/updated_at (see ANALYTICS_DB_CONTEXT.md)
+        'watermark': 'created_at',
+        'event_columns': ['created_at'],
+        'columns': [
+            ('id', 'bigint'), ('voter_id', 'bigint'), ('type', 'text'), ('created_at', 'timestamp'),
+        ],
+    },
+    'chemlink_collections': {
+        'source': 'chemlink',
+        'table': 'collections',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': ['created_at'],
+        'columns': [
+            ('id', 'bigint'), ('person_id', 'bigint'), ('privacy', 'text'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_experiences': {
+        'source': 'chemlink',
+        'table': 'experiences',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': [],
+        'columns': [
+            ('id', 'bigint'), ('person_id', 'bigint'), ('company_id', 'bigint'),
+            ('role_id', 'bigint'), ('project_id', 'bigint'), ('start_date', 'date'), ('end_date', 'date'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_education': {
+        'source': 'chemlink',
+        'table': 'education',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': [],
+        'columns': [
+            ('id', 'bigint'), ('person_id', 'bigint'), ('school_id', 'bigint'),
+            ('degree_id', 'bigint'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_person_languages': {
+        'source': 'chemlink',
+        'table': 'person_languages',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': [],
+        'columns': [
+            ('id', 'bigint'), ('person_id', 'bigint'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_embeddings': {
+        'source': 'chemlink',
+        'table': 'embeddings',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': [],
+        # Only the ownership columns; the vectors stay in the source DB
+        'columns': [
+            ('id', 'bigint'), ('person_id', 'bigint'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_companies': {
+        'source': 'chemlink',
+        'table': 'companies',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': [],
+        'columns': [
+            ('id', 'bigint'), ('name', 'text'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'chemlink_roles': {
+        'source': 'chemlink',
+        'table': 'roles',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': [],
+        'columns': [
+            ('id', 'bigint'), ('title', 'text'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'engagement_persons': {
+        'source': 'engagement',
+        'table': 'persons',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': [],
+        'columns': [
+            ('id', 'text'), ('external_id', 'text'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'engagement_posts': {
+        'source': 'engagement',
+        'table': 'posts',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': ['created_at'],
+        'columns': [
+            ('id', 'text'), ('person_id', 'text'), ('type', 'text'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'engagement_comments': {
+        'source': 'engagement',
+        'table': 'comments',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': ['created_at'],
+        'columns': [
+            ('id', 'text'), ('post_id', 'text'), ('person_id', 'text'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'), ('deleted_at', 'timestamp'),
+        ],
+    },
+    'kratos_sessions': {
+        'source': 'kratos',
+        'table': 'sessions',
+        'key': 'id',
+        'watermark': 'updated_at',
+        'event_columns': ['authenticated_at'],
+        'columns': [
+            ('id', 'text'), ('identity_id', 'text'), ('authenticated_at', 'timestamp'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp'),
+        ],
+    },
+}
+
+# Re-read a small window before each watermark; upserts make the overlap harmless
+WATERMARK_OVERLAP = timedelta(minutes=5)
+BATCH_SIZE = 5000
+
+STAGING_SETUP_SQL = """
+    CREATE SCHEMA IF NOT EXISTS staging;
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+
+    CREATE TABLE IF NOT EXISTS staging.sync_watermarks (
+        table_name TEXT PRIMARY KEY,
+        watermark TIMESTAMP,
+        rows_synced BIGINT NOT NULL DEFAULT 0,
+        synced_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        source_env TEXT
+    );
+
+    -- Last staged change each Python aggregate builder has consumed
+    CREATE TABLE IF NOT EXISTS aggregates.builder_watermarks (
+        builder TEXT PRIMARY KEY,
+        watermark TIMESTAMP,
+        built_at TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+
+    CREATE TABLE IF NOT EXISTS aggregates.daily_metrics (
+        metric_date DATE PRIMARY KEY,
+        new_signups INTEGER NOT NULL DEFAULT 0,
+        new_finder_signups INTEGER NOT NULL DEFAULT 0,
+        new_standard_signups INTEGER NOT NULL DEFAULT 0,
+        total_users_cumulative INTEGER NOT NULL DEFAULT 0,
+        dau INTEGER NOT NULL DEFAULT 0,
+        active_posters INTEGER NOT NULL DEFAULT 0,
+        active_commenters INTEGER NOT NULL DEFAULT 0,
+        active_voters INTEGER NOT NULL DEFAULT 0,
+        active_collectors INTEGER NOT NULL DEFAULT 0,
+        engagement_rate NUMERIC(7, 2),
+        posts_created INTEGER NOT NULL DEFAULT 0,
+        comments_created INTEGER NOT NULL DEFAULT 0,
+        votes_cast INTEGER NOT NULL DEFAULT 0,
+        collections_created INTEGER NOT NULL DEFAULT 0,
+        views_given INTEGER NOT NULL DEFAULT 0,
+        social_engagement_rate NUMERIC(7, 2)
+    ) PARTITION BY RANGE (metric_date);
+
+    CREATE TABLE IF NOT EXISTS aggregates.monthly_metrics (
+        metric_month DATE PRIMARY KEY,
+        new_signups INTEGER NOT NULL DEFAULT 0,
+        total_users_end_of_month INTEGER NOT NULL DEFAULT 0,
+        growth_rate_pct NUMERIC(9, 2),
+        mau INTEGER NOT NULL DEFAULT 0,
+        avg_dau NUMERIC(9, 2),
+        finder_mau INTEGER NOT NULL DEFAULT 0,
+        standard_mau INTEGER NOT NULL DEFAULT 0,
+        activation_rate NUMERIC(7, 2),
+        total_posts INTEGER NOT NULL DEFAULT 0,
+        total_comments INTEGER NOT NULL DEFAULT 0,
+        total_votes INTEGER NOT NULL DEFAULT 0,
+        total_collections INTEGER NOT NULL DEFAULT 0,
+        avg_activities_per_user NUMERIC(9, 2),
+        avg_engagement_score NUMERIC(9, 2)
+    );
+
+    -- Per-hour, per-actor event counts behind the ?from=&to=&granularity=
+    -- routes (time_windows.py). Additive counts roll up to any coarser
+    -- bucket; distinct actors are counted over the rows in range.
+    CREATE TABLE IF NOT EXISTS aggregates.activity_rollup_hourly (
+        bucket_hour TIMESTAMP NOT NULL,
+        activity_type TEXT NOT NULL,
+        actor TEXT NOT NULL,
+        event_count INTEGER NOT NULL,
+        PRIMARY KEY (bucket_hour, activity_type, actor)
+    );
+"""
+
+# Engagement persons link to ChemLink through external_id, which may hold
+# either the ChemLink uuid (persons.person_id) or the numeric persons.id
+STAGING_VIEWS_SQL = """
+    CREATE OR REPLACE VIEW staging.engagement_person_map AS
+    SELECT ep.id AS engagement_person_id,
+           COALESCE(by_uuid.id, by_id.id) AS chemlink_id
+    FROM staging.engagement_persons ep
+    LEFT JOIN staging.chemlink_persons by_uuid ON by_uuid.person_id = ep.external_id
+    LEFT JOIN staging.chemlink_persons by_id ON by_id.id::text = ep.external_id
+    WHERE ep.deleted_at IS NULL;
+
+    CREATE OR REPLACE VIEW staging.activity_events AS
+    SELECT person_id, created_at AS activity_at, 'view' AS activity_type
+    FROM staging.chemlink_view_access WHERE deleted_at IS NULL
+    UNION ALL
+    SELECT voter_id, created_at, 'vote'
+    FROM staging.chemlink_query_votes
+    UNION ALL
+    SELECT person_id, created_at, 'collection'
+    FROM staging.chemlink_collections WHERE deleted_at IS NULL
+    UNION ALL
+    SELECT id, updated_at, 'profile_update'
+    FROM staging.chemlink_persons WHERE deleted_at IS NULL AND updated_at != created_at
+    UNION ALL
+    SELECT m.chemlink_id, po.created_at, 'post'
+    FROM staging.engagement_posts po
+    LEFT JOIN staging.engagement_person_map m ON m.engagement_person_id = po.person_id
+    WHERE po.deleted_at IS NULL
+    UNION ALL
+    SELECT m.chemlink_id, c.created_at, 'comment'
+    FROM staging.engagement_comments c
+    LEFT JOIN staging.engagement_person_map m ON m.engagement_person_id = c.person_id
+    WHERE c.deleted_at IS NULL;
+"""
+
+RECOMPUTE_DAILY_SQL = """
+    WITH days AS (
+        SELECT unnest(%(days)s::date[]) AS metric_date
+    ),
+    signups AS (
+        SELECT
+            DATE(created_at) AS metric_date,
+            COUNT(*) AS new_signups,
+            COUNT(*) FILTER (WHERE has_finder) AS new_finder_signups,
+            COUNT(*) FILTER (WHERE NOT COALESCE(has_finder, false)) AS new_standard_signups
+        FROM staging.chemlink_persons
+        WHERE deleted_at IS NULL
+          AND created_at >= %(start)s AND created_at < %(end)s
+        GROUP BY DATE(created_at)
+    ),
+    activity AS (
+        SELECT
+            DATE(activity_at) AS metric_date,
+            COUNT(DISTINCT person_id) AS dau,
+            COUNT(DISTINCT person_id) FILTER (WHERE activity_type = 'post') AS active_posters,
+            COUNT(DISTINCT person_id) FILTER (WHERE activity_type = 'comment') AS active_commenters,
+            COUNT(DISTINCT person_id) FILTER (WHERE activity_type = 'vote') AS active_voters,
+            COUNT(DISTINCT person_id) FILTER (WHERE activity_type = 'collection') AS active_collectors,
+            COUNT(DISTINCT person_id) FILTER (WHERE activity_type IN ('post', 'comment')) AS social_users,
+            COUNT(*) FILTER (WHERE activity_type = 'post') AS posts_created,
+            COUNT(*) FILTER (WHERE activity_type = 'comment') AS comments_created,
+            COUNT(*) FILTER (WHERE activity_type = 'vote') AS votes_cast,
+            COUNT(*) FILTER (WHERE activity_type = 'collection') AS collections_created,
+            COUNT(*) FILTER (WHERE activity_type = 'view') AS views_given
+        FROM staging.activity_events
+        WHERE activity_at >= %(start)s AND activity_at < %(end)s
+        GROUP BY DATE(activity_at)
+    )
+    INSERT INTO aggregates.daily_metrics (
+        metric_date, new_signups, new_finder_signups, new_standard_signups,
+        dau, active_posters, active_commenters, active_voters, active_collectors,
+        posts_created, comments_created, votes_cast, collections_created, views_given,
+        social_engagement_rate
+    )
+    SELECT
+        d.metric_date,
+        COALESCE(s.new_signups, 0),
+        COALESCE(s.new_finder_signups, 0),
+        COALESCE(s.new_standard_signups, 0),
+        COALESCE(a.dau, 0),
+        COALESCE(a.active_posters, 0),
+        COALESCE(a.active_commenters, 0),
+        COALESCE(a.active_voters, 0),
+        COALESCE(a.active_collectors, 0),
+        COALESCE(a.posts_created, 0),
+        COALESCE(a.comments_created, 0),
+        COALESCE(a.votes_cast, 0),
+        COALESCE(a.collections_created, 0),
+        COALESCE(a.views_given, 0),
+        ROUND(a.social_users * 100.0 / NULLIF(a.dau, 0), 2)
+    FROM days d
+    LEFT JOIN signups s ON s.metric_date = d.metric_date
+    LEFT JOIN activity a ON a.metric_date = d.metric_date
+    ON CONFLICT (metric_date) DO UPDATE SET
+        new_signups = EXCLUDED.new_signups,
+        new_finder_signups = EXCLUDED.new_finder_signups,
+        new_standard_signups = EXCLUDED.new_standard_signups,
+        dau = EXCLUDED.dau,
+        active_posters = EXCLUDED.active_posters,
+        active_commenters = EXCLUDED.active_commenters,
+        active_voters = EXCLUDED.active_voters,
+        active_collectors = EXCLUDED.active_collectors,
+        posts_created = EXCLUDED.posts_created,
+        comments_created = EXCLUDED.comments_created,
+        votes_cast = EXCLUDED.votes_cast,
+        collections_created = EXCLUDED.collections_created,
+        views_given = EXCLUDED.views_given,
+        social_engagement_rate = EXCLUDED.social_engagement_rate;
+"""
+
+# Running totals only depend on new_signups, so rolling them forward from the
+# earliest affected day is a single pass over a few hundred aggregate rows
+ROLL_DAILY_TOTALS_SQL = """
+    WITH base AS (
+        SELECT COUNT(*) AS users_before
+        FROM staging.chemlink_persons
+        WHERE deleted_at IS NULL AND created_at < %(from_day)s
+    ),
+    running AS (
+        SELECT
+            metric_date,
+            (SELECT users_before FROM base)
+                + SUM(new_signups) OVER (ORDER BY metric_date) AS cumulative
+        FROM aggregates.daily_metrics
+        WHERE metric_date >= %(from_day)s
+    )
+    UPDATE aggregates.daily_metrics dm
+    SET total_users_cumulative = r.cumulative,
+        engagement_rate = ROUND(dm.dau * 100.0 / NULLIF(r.cumulative, 0), 2)
+    FROM running r
+    WHERE dm.metric_date = r.metric_date;
+"""
+
+RECOMPUTE_MONTHLY_SQL = """
+    WITH months AS (
+        SELECT unnest(%(months)s::date[]) AS metric_month
+    ),
+    signups AS (
+        SELECT DATE_TRUNC('month', created_at)::date AS metric_month, COUNT(*) AS new_signups
+        FROM staging.chemlink_persons
+        WHERE deleted_at IS NULL
+          AND created_at >= %(start)s AND created_at < %(end)s
+        GROUP BY 1
+    ),
+    user_activity AS (
+        SELECT
+            DATE_TRUNC('month', activity_at)::date AS metric_month,
+            person_id,
+            COUNT(*) AS activities,
+            COUNT(*) FILTER (WHERE activity_type = 'post') AS posts,
+            COUNT(*) FILTER (WHERE activity_type = 'comment') AS comments,
+            COUNT(*) FILTER (WHERE activity_type = 'vote') AS votes,
+            COUNT(*) FILTER (WHERE activity_type = 'collection') AS collections
+        FROM staging.activity_events
+        WHERE activity_at >= %(start)s AND activity_at < %(end)s
+          AND person_id IS NOT NULL
+        GROUP BY 1, 2
+    ),
+    activity AS (
+        SELECT
+            ua.metric_month,
+            COUNT(*) AS mau,
+            COUNT(*) FILTER (WHERE p.has_finder) AS finder_mau,
+            COUNT(*) FILTER (WHERE NOT COALESCE(p.has_finder, false)) AS standard_mau,
+            ROUND(AVG(ua.activities), 2) AS avg_activities_per_user,
+            ROUND(AVG(ua.posts * 3 + ua.comments * 2 + ua.votes + ua.collections), 2) AS avg_engagement_score
+        FROM user_activity ua
+        LEFT JOIN staging.chemlink_persons p ON p.id = ua.person_id
+        GROUP BY ua.metric_month
+    ),
+    daily AS (
+        SELECT
+            DATE_TRUNC('month', metric_date)::date AS metric_month,
+            ROUND(AVG(dau), 2) AS avg_dau,
+            SUM(posts_created) AS total_posts,
+            SUM(comments_created) AS total_comments,
+            SUM(votes_cast) AS total_votes,
+            SUM(collections_created) AS total_collections
+        FROM aggregates.daily_metrics
+        WHERE metric_date >= %(start)s AND metric_date < %(end)s
+        GROUP BY 1
+    )
+    INSERT INTO aggregates.monthly_metrics (
+        metric_month, new_signups, mau, avg_dau, finder_mau, standard_mau,
+        total_posts, total_comments, total_votes, total_collections,
+        avg_activities_per_user, avg_engagement_score
+    )
+    SELECT
+        m.metric_month,
+        COALESCE(s.new_signups, 0),
+        COALESCE(a.mau, 0),
+        d.avg_dau,
+        COALESCE(a.finder_mau, 0),
+        COALESCE(a.standard_mau, 0),
+        COALESCE(d.total_posts, 0),
+        COALESCE(d.total_comments, 0),
+        COALESCE(d.total_votes, 0),
+        COALESCE(d.total_collections, 0),
+        a.avg_activities_per_user,
+        a.avg_engagement_score
+    FROM months m
+    LEFT JOIN signups s ON s.metric_month = m.metric_month
+    LEFT JOIN activity a ON a.metric_month = m.metric_month
+    LEFT JOIN daily d ON d.metric_month = m.metric_month
+    ON CONFLICT (metric_month) DO UPDATE SET
+        new_signups = EXCLUDED.new_signups,
+        mau = EXCLUDED.mau,
+        avg_dau = EXCLUDED.avg_dau,
+        finder_mau = EXCLUDED.finder_mau,
+        standard_mau = EXCLUDED.standard_mau,
+        total_posts = EXCLUDED.total_posts,
+        total_comments = EXCLUDED.total_comments,
+        total_votes = EXCLUDED.total_votes,
+        total_collections = EXCLUDED.total_collections,
+        avg_activities_per_user = EXCLUDED.avg_activities_per_user,
+        avg_engagement_score = EXCLUDED.avg_engagement_score;
+"""
+
+# Actors are ChemLink person ids, engagement person ids without a ChemLink
+# match (prefixed) and Kratos identity ids
+RECOMPUTE_ROLLUP_SQL = """
+    DELETE FROM aggregates.activity_rollup_hourly
+    WHERE bucket_hour >= %(start)s AND bucket_hour < %(end)s
+      AND bucket_hour::date = ANY(%(days)s::date[]);
+
+    INSERT INTO aggregates.activity_rollup_hourly (bucket_hour, activity_type, actor, event_count)
+    SELECT DATE_TRUNC('hour', event_at), activity_type, actor, COUNT(*)
+    FROM (
+        SELECT created_at AS event_at, 'signup' AS activity_type, id::text AS actor
+        FROM staging.chemlink_persons
+        WHERE deleted_at IS NULL AND created_at >= %(start)s AND created_at < %(end)s
+        UNION ALL
+        SELECT updated_at, 'profile_update', id::text
+        FROM staging.chemlink_persons
+        WHERE deleted_at IS NULL AND updated_at != created_at
+          AND updated_at >= %(start)s AND updated_at < %(end)s
+        UNION ALL
+        SELECT created_at, 'view', person_id::text
+        FROM staging.chemlink_view_access
+        WHERE deleted_at IS NULL AND created_at >= %(start)s AND created_at < %(end)s
+        UNION ALL
+        SELECT created_at, 'vote', voter_id::text
+        FROM staging.chemlink_query_votes
+        WHERE created_at >= %(start)s AND created_at < %(end)s
+        UNION ALL
+        SELECT created_at, 'collection', person_id::text
+        FROM staging.chemlink_collections
+        WHERE deleted_at IS NULL AND created_at >= %(start)s AND created_at < %(end)s
+        UNION ALL
+        SELECT po.created_at, 'post', COALESCE(m.chemlink_id::text, 'engagement:' || po.person_id)
+        FROM staging.engagement_posts po
+        LEFT JOIN staging.engagement_person_map m ON m.engagement_person_id = po.person_id
+        WHERE po.deleted_at IS NULL AND po.created_at >= %(start)s AND po.created_at < %(end)s
+        UNION ALL
+        SELECT c.created_at, 'comment', COALESCE(m.chemlink_id::text, 'engagement:' || c.person_id)
+        FROM staging.engagement_comments c
+        LEFT JOIN staging.engagement_person_map m ON m.engagement_person_id = c.person_id
+        WHERE c.deleted_at IS NULL AND c.created_at >= %(start)s AND c.created_at < %(end)s
+        UNION ALL
+        SELECT authenticated_at, 'session', identity_id
+        FROM staging.kratos_sessions
+        WHERE authenticated_at >= %(start)s AND authenticated_at < %(end)s
+    ) events
+    WHERE actor IS NOT NULL AND event_at::date = ANY(%(days)s::date[])
+    GROUP BY 1, 2, 3;
+"""
+
+# Starts one month early so LAG() sees the month before the first affected one
+ROLL_MONTHLY_TOTALS_SQL = """
+    WITH base AS (
+        SELECT COUNT(*) AS users_before
+        FROM staging.chemlink_persons
+        WHERE deleted_at IS NULL AND created_at < %(prev_month)s
+    ),
+    running AS (
+        SELECT
+            metric_month,
+            mau,
+            (SELECT users_before FROM base)
+                + SUM(new_signups) OVER (ORDER BY metric_month) AS total_users,
+            ROUND((new_signups - LAG(new_signups) OVER (ORDER BY metric_month)) * 100.0 /
+                  NULLIF(LAG(new_signups) OVER (ORDER BY metric_month), 0), 2) AS growth_rate_pct
+        FROM aggregates.monthly_metrics
+        WHERE metric_month >= %(prev_month)s
+    )
+    UPDATE aggregates.monthly_metrics mm
+    SET total_users_end_of_month = r.total_users,
+        growth_rate_pct = r.growth_rate_pct,
+        activation_rate = ROUND(r.mau * 100.0 / NULLIF(r.total_users, 0), 2)
+    FROM running r
+    WHERE mm.metric_month = r.metric_month
+      AND mm.metric_month >= %(from_month)s;
+"""
+
+
+# When the row was last written to staging, which is what aggregate builders track
+STAGED_AT_COLUMN = ('staged_at', 'TIMESTAMP NOT NULL DEFAULT clock_timestamp()')
+# APP_ENV a table's watermark (and so its staged rows) came from
+SOURCE_ENV_COLUMN = ('source_env', 'TEXT')
+
+
+def staging_columns(spec):
+    """(name, type) of every column of a staging table, staged_at included"""
+    return spec['columns'] + [STAGED_AT_COLUMN]
+
+
+def staging_table_sql(name, spec):
+    """DDL for one staging table"""
+    columns = ',\n        '.join(f"{col} {col_type}" for col, col_type in staging_columns(spec))
+    return f"""
+    CREATE TABLE IF NOT EXISTS staging.{name} (
+        {columns},
+        PRIMARY KEY ({spec['key']})
+    );"""
+
+
+def staging_index_sql(name, spec):
+    """Indexes the aggregate recompute and the builders rely on"""
+    statements = [
+        f"CREATE INDEX IF NOT EXISTS {name}_{spec['watermark']}_idx ON staging.{name} ({spec['watermark']});",
+        f"CREATE INDEX IF NOT EXISTS {name}_staged_at_idx ON staging.{name} (staged_at);",
+    ]
+    for column in spec['event_columns']:
+        if column != spec['watermark']:
+            statements.append(f"CREATE INDEX IF NOT EXISTS {name}_{column}_idx ON staging.{name} ({column});")
+    return '\n'.join(statements)
+
+
+def missing_staging_columns(conn):
+    """{staging table: [(column, type)]} for columns added to a spec after its table was created"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = 'staging';"
+        )
+        existing = {(row['table_name'], row['column_name']) for row in cursor.fetchall()}
+    missing = {}
+    for name, spec in SYNC_TABLES.items():
+        columns = [(col, col_type) for col, col_type in staging_columns(spec) if (name, col) not in existing]
+        if columns:
+            missing[name] = columns
+    if ('sync_watermarks', SOURCE_ENV_COLUMN[0]) not in existing:
+        missing['sync_watermarks'] = [SOURCE_ENV_COLUMN]
+    return missing
+
+
+def migrate_staging(conn, missing):
+    """
+    Add missing columns; backfilled by the next --full (staged_at is set for
+    existing rows, so builders see every row once; watermarks without a
+    source_env refuse incremental syncs until then). ALTER TABLE locks the
+    table exclusively, so this only runs for tables that need it.
+    """
+    with conn.cursor() as cursor:
+        for name, columns in missing.items():
+            cursor.execute(
+                f"ALTER TABLE staging.{name} "
+                + ', '.join(f"ADD COLUMN IF NOT EXISTS {col} {col_type}" for col, col_type in columns)
+                + ';'
+            )
+            print(f"✓ Added {', '.join(col for col, _ in columns)} to staging.{name}")
+
+
+def ensure_staging(conn):
+    """
+    Create staging tables, watermark table, views and aggregate tables if
+    missing. Run by etl_sync.sync in its own short transaction; builders only
+    check the result (require_staging), since this DDL locks staging tables.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(STAGING_SETUP_SQL)
+        for name, spec in SYNC_TABLES.items():
+            cursor.execute(staging_table_sql(name, spec))
+    missing = missing_staging_columns(conn)
+    if missing:
+        migrate_staging(conn, missing)
+    with conn.cursor() as cursor:
+        for name, spec in SYNC_TABLES.items():
+            cursor.execute(staging_index_sql(name, spec))
+        cursor.execute(STAGING_VIEWS_SQL)
+
+
+def require_staging(conn):
+    """
+    Raise unless etl_sync.py has created staging as this code expects. Only
+    reads the catalog, so aggregate builders can call it inside their own
+    transaction without locking staging tables.
+    """
+    missing = sorted(missing_staging_columns(conn))
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('aggregates.builder_watermarks') IS NOT NULL AS present;")
+        if not cursor.fetchone()['present']:
+            missing.append('aggregates.builder_watermarks')
+    if missing:
+        raise RuntimeError(f"Staging is missing or out of date ({', '.join(missing)}); run python etl_sync.py first")
+
+
+def utc_source_connection(source):
+    """
+    Source connection whose timestamptz -> timestamp casts give UTC, so staged
+    timestamps (and the hourly rollup, see time_windows.ROLLUP_TZ) are naive UTC
+    """
+    conn = SOURCE_CONNECTIONS[source]()
+    with conn.cursor() as cursor:
+        cursor.execute("SET TIME ZONE 'UTC';")
+    # Commit so the setting outlives this transaction and set_session still works
+    conn.commit()
+    return conn
+
+
+def select_list(spec):
+    """Source columns cast to the staging column types"""
+    return ', '.join(f"{col}::{col_type}" for col, col_type in spec['columns'])
+
+
+def extract_query(spec):
+    """Incremental SELECT for one source table"""
+    return f"""
+        SELECT {select_list(spec)}
+        FROM {spec['table']}
+        WHERE %(watermark)s::timestamp IS NULL OR {spec['watermark']} >= %(watermark)s
+        ORDER BY {spec['watermark']};
+    """
+
+
+def source_env():
+    """APP_ENV the source connections use (db_config reloads .env on every connection)"""
+    load_dotenv(override=True)
+    return os.getenv('APP_ENV', 'uat').lower()
+
+
+def check_source_env(conn, tables, env):
+    """
+    Raise if any of `tables` was last synced from another environment. Their
+    watermarks (and staged rows) belong to that environment's sources, so an
+    incremental sync would mix the two; only --full replaces them.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT table_name, source_env FROM staging.sync_watermarks "
+            "WHERE table_name = ANY(%s) AND source_env IS DISTINCT FROM %s ORDER BY table_name;",
+            (list(tables), env),
+        )
+        mismatched = cursor.fetchall()
+    if mismatched:
+        details = ', '.join(f"{row['table_name']} from {row['source_env'] or 'unknown'}" for row in mismatched)
+        raise RuntimeError(
+            f"Staging was synced from another environment ({details}); "
+            f"run python etl_sync.py --full to reload it from {env}"
+        )
+
+
+def get_watermarks(conn):
+    """Load per-table watermarks as {table_name: datetime}"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT table_name, watermark FROM staging.sync_watermarks;")
+        return {row['table_name']: row['watermark'] for row in cursor.fetchall()}
+
+
+def get_builder_watermark(conn, builder):
+    """Staged-change watermark an aggregate builder last consumed (None before its first run)"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT watermark FROM aggregates.builder_watermarks WHERE builder = %s;", (builder,))
+        row = cursor.fetchone()
+    return row['watermark'] if row else None
+
+
+def set_builder_watermark(conn, builder, watermark):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO aggregates.builder_watermarks (builder, watermark, built_at)
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (builder) DO UPDATE SET
+                watermark = COALESCE(EXCLUDED.watermark, aggregates.builder_watermarks.watermark),
+                built_at = EXCLUDED.built_at;
+            """,
+            (builder, watermark),
+        )
+
+
+def changed_persons(conn, sources, since):
+    """
+    Persons with rows staged after `since` in the given tables.
+
+    `sources` maps staging table -> person id column. Changes are tracked by
+    staged_at rather than the source timestamps, so a row whose updated_at is
+    older than the watermark but reaches staging later (a lagging table or a
+    late commit) is still picked up. Returns (person_ids, watermark), to be
+    stored with set_builder_watermark once the builder has committed. The
+    watermark is now, or the start of the oldest transaction still writing to
+    this database if that is earlier: rows such a transaction has staged can
+    carry an earlier staged_at but aren't visible until it commits.
+    """
+    person_ids = set()
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT LEAST(NOW(), MIN(xact_start))::timestamp AS watermark
+            FROM pg_stat_activity
+            WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_xid IS NOT NULL;
+        """)
+        watermark = cursor.fetchone()['watermark']
+        for table, person_column in sources.items():
+            cursor.execute(
+                f"""
+                SELECT array_agg(DISTINCT {person_column}) AS person_ids
+                FROM staging.{table}
+                WHERE %(since)s::timestamp IS NULL OR staged_at >= %(since)s;
+                """,
+                {'since': since},
+            )
+            row = cursor.fetchone()
+            person_ids.update(pid for pid in row['person_ids'] or [] if pid is not None)
+    return person_ids, watermark
+
+
+def open_ended_persons(conn, builder):
+    """
+    Persons holding an experience with no end_date, when `builder` last ran
+    before today (empty otherwise).
+
+    Tenure in an ongoing role is measured up to today, so it grows every day
+    without any staged change; builders that report it rescore these persons
+    alongside changed_persons.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT array_agg(DISTINCT e.person_id) AS person_ids
+            FROM staging.chemlink_experiences e
+            WHERE e.end_date IS NULL AND e.deleted_at IS NULL
+              AND e.role_id IS NOT NULL AND e.start_date IS NOT NULL
+              AND EXISTS (
+                  SELECT 1 FROM aggregates.builder_watermarks
+                  WHERE builder = %s AND built_at::date < CURRENT_DATE
+              );
+            """,
+            (builder,),
+        )
+        row = cursor.fetchone()
+    return {pid for pid in row['person_ids'] or [] if pid is not None}
+
+
+def event_dates(rows, positions):
+    """Collect the calendar dates of the given timestamp columns across rows"""
+    dates = set()
+    for row in rows:
+        for pos in positions:
+            if row[pos] is not None:
+                dates.add(row[pos].date())
+    return dates
+
+
+def sync_table(analytics_conn, name, spec, watermark, env):
+    """
+    Upsert rows changed since `watermark` into staging.<name>.
+
+    Returns (rows_synced, new_watermark, affected_dates). Affected dates include
+    the event dates of both the incoming rows and the staged rows they replace,
+    so moved or soft-deleted activity is removed from the old day too.
+    """
+    column_names = [col for col, _ in spec['columns']]
+    key_pos = column_names.index(spec['key'])
+    watermark_pos = column_names.index(spec['watermark'])
+    event_positions = [column_names.index(col) for col in spec['event_columns']]
+    event_list = ', '.join(spec['event_columns'])
+
+    upsert_sql = f"""
+        INSERT INTO staging.{name} ({', '.join(column_names)})
+        VALUES %s
+        ON CONFLICT ({spec['key']}) DO UPDATE SET
+            {', '.join(f'{col} = EXCLUDED.{col}' for col in column_names if col != spec['key'])},
+            staged_at = clock_timestamp()
+    """
+
+    since = watermark - WATERMARK_OVERLAP if watermark else None
+    source_conn = utc_source_connection(spec['source'])
+    rows_synced = 0
+    new_watermark = watermark
+    affected = set()
+    try:
+        with source_conn.cursor(name=f"sync_{name}") as source_cursor, \
+                analytics_conn.cursor() as target_cursor:
+            source_cursor.itersize = BATCH_SIZE
+            source_cursor.execute(extract_query(spec), {'watermark': since})
+            while True:
+                batch = source_cursor.fetchmany(BATCH_SIZE)
+                if not batch:
+                    break
+
+                if event_positions:
+                    affected |= event_dates(batch, event_positions)
+                    target_cursor.execute(
+                        f"SELECT {event_list} FROM staging.{name} WHERE {spec['key']} = ANY(%s);",
+                        ([row[key_pos] for row in batch],),
+                    )
+                    previous = [tuple(row.values()) for row in target_cursor.fetchall()]
+                    affected |= event_dates(previous, range(len(event_positions)))
+
+                execute_values(target_cursor, upsert_sql, batch, page_size=1000)
+                rows_synced += len(batch)
+                batch_max = batch[-1][watermark_pos]
+                if batch_max and (new_watermark is None or batch_max > new_watermark):
+                    new_watermark = batch_max
+    finally:
+        source_conn.close()
+
+    with analytics_conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO staging.sync_watermarks (table_name, watermark, rows_synced, synced_at, source_env)
+            VALUES (%s, %s, %s, NOW(), %s)
+            ON CONFLICT (table_name) DO UPDATE SET
+                watermark = EXCLUDED.watermark,
+                rows_synced = staging.sync_watermarks.rows_synced + EXCLUDED.rows_synced,
+                synced_at = EXCLUDED.synced_at,
+                source_env = EXCLUDED.source_env;
+            """,
+            (name, new_watermark, rows_synced, env),
+        )
+    return rows_synced, new_watermark, affected
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def recompute_aggregates(conn, affected_days):
+    """Recompute daily and monthly aggregates for the affected days and their months"""
+    if not affected_days:
+        return
+    today = date.today()
+    # Days older than the partition retention horizon live in the archive schema
+    horizon = retention_start(conn, 'aggregates.daily_metrics') or date.min
+    days = sorted(d for d in affected_days if horizon <= d <= today)
+    if not days:
+        return
+    ensure_partitions(conn, 'aggregates.daily_metrics', days[0], days[-1])
+    start = datetime.combine(days[0], datetime.min.time())
+    end = datetime.combine(days[-1] + timedelta(days=1), datetime.min.time())
+
+    # A month's growth rate depends on the previous month, so touching month M
+    # also invalidates M + 1
+    months = {month_start(d) for d in days}
+    months |= {next_month(m) for m in months if next_month(m) <= today}
+    months = sorted(months)
+    month_range_start = datetime.combine(months[0], datetime.min.time())
+    month_range_end = datetime.combine(next_month(months[-1]), datetime.min.time())
+
+    with conn.cursor() as cursor:
+        cursor.execute(RECOMPUTE_DAILY_SQL, {'days': days, 'start': start, 'end': end})
+        cursor.execute(ROLL_DAILY_TOTALS_SQL, {'from_day': days[0]})
+        cursor.execute(RECOMPUTE_ROLLUP_SQL, {'days': days, 'start': start, 'end': end})
+        cursor.execute(RECOMPUTE_MONTHLY_SQL, {
+            'months': months, 'start': month_range_start, 'end': month_range_end,
+        })
+        prev_month = month_start(months[0] - timedelta(days=1))
+        cursor.execute(ROLL_MONTHLY_TOTALS_SQL, {'prev_month': prev_month, 'from_month': months[0]})
+    print(f"✓ Recomputed {len(days)} days ({days[0]} → {days[-1]}) and {len(months)} months")
+
+
+def days_since(first):
+    """Every calendar day from `first` through today"""
+    return {first + timedelta(days=i) for i in range((date.today() - first).days + 1)}
+
+
+def available_sources():
+    """{source: bool}, False for sources db_config has no settings for (e.g. Kratos)"""
+    available = {}
+    for source, factory in SOURCE_CONNECTIONS.items():
+        try:
+            factory().close()
+            available[source] = True
+        except RuntimeError as e:
+            print(f"✗ Skipping {source} tables: {e}")
+            available[source] = False
+    return available
+
+
+def incremental_load(conn, tables, env):
+    """Upsert changed rows for each table; returns the set of affected days"""
+    available = available_sources()
+    tables = [name for name in tables if available[SYNC_TABLES[name]['source']]]
+    check_source_env(conn, tables, env)
+    watermarks = get_watermarks(conn)
+    affected_days = set()
+
+    for name in tables:
+        spec = SYNC_TABLES[name]
+        previous = watermarks.get(name)
+        started = time.time()
+        rows, new_watermark, affected = sync_table(conn, name, spec, previous, env)
+        affected_days |= affected
+        print(f"✓ {name}: {rows} rows in {time.time() - started:.2f}s "
+              f"(watermark {previous} → {new_watermark})")
+
+        # Nothing staged before a table's first sync, so every day it covers counts
+        if previous is None and affected:
+            affected_days |= days_since(min(affected))
+
+    # Keep the daily series contiguous up to today
+    last_synced = [wm.date() for wm in watermarks.values() if wm]
+    if last_synced:
+        affected_days |= days_since(min(last_synced))
+    return affected_days
+
+
+def bulk_load(conn, tables, workers, env):
+    """
+    Reload staging tables with COPY (see bulk_loader.py) and reset watermarks.
+
+    Returns every day from the earliest staged event through today, since a
+    full reload can change any of them.
+    """
+    available = available_sources()
+    jobs = {
+        name: {
+            'source_factory': partial(utc_source_connection, SYNC_TABLES[name]['source']),
+            'source_query': f"SELECT {select_list(SYNC_TABLES[name])} FROM {SYNC_TABLES[name]['table']}",
+            'target_table': f"staging.{name}",
+            'columns': [col for col, _ in SYNC_TABLES[name]['columns']],
+        }
+        for name in tables
+        if available[SYNC_TABLES[name]['source']]
+    }
+    results = copy_tables(jobs, workers=workers)
+
+    with conn.cursor() as cursor:
+        for name, (rows, _) in results.items():
+            cursor.execute(
+                f"""
+                INSERT INTO staging.sync_watermarks (table_name, watermark, rows_synced, synced_at, source_env)
+                SELECT %s, MAX({SYNC_TABLES[name]['watermark']}), %s, NOW(), %s FROM staging.{name}
+                ON CONFLICT (table_name) DO UPDATE SET
+                    watermark = EXCLUDED.watermark,
+                    rows_synced = EXCLUDED.rows_synced,
+                    synced_at = EXCLUDED.synced_at,
+                    source_env = EXCLUDED.source_env;
+                """,
+                (name, rows, env),
+            )
+        cursor.execute("""
+            SELECT LEAST(
+                (SELECT MIN(created_at) FROM staging.chemlink_persons),
+                (SELECT MIN(activity_at) FROM staging.activity_events)
+            )::date AS first_day;
+        """)
+        first_day = cursor.fetchone()['first_day']
+    return days_since(first_day) if first_day else set()
+
+
+def sync(tables=None, full=False, workers=4):
+    """Run one incremental sync (or a full COPY reload) and recompute the affected aggregates"""
+    tables = tables or list(SYNC_TABLES)
+    env = source_env()
+    conn = get_analytics_db_connection()
+    try:
+        ensure_staging(conn)
+        # Bulk loader workers use their own connections and must see the DDL
+        conn.commit()
+
+        if full:
+            affected_days = bulk_load(conn, tables, workers, env)
+        else:
+            affected_days = incremental_load(conn, tables, env)
+
+        recompute_aggregates(conn, affected_days)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental sync into chemlink_analytics')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore watermarks and reload every table with COPY')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Parallel table transfers for --full (default: 4)')
+    parser.add_argument('--tables', nargs='+', choices=list(SYNC_TABLES),
+                        help='Only sync these staging tables')
+    args = parser.parse_args()
+
+    started = time.time()
+    sync(tables=args.tables, full=args.full, workers=args.workers)
+    print(f"\n✓ Sync finished in {time.time() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
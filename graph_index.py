@@ -0,0 +1,265 @@
+"""
+In-process per-user index for the graph aggregates
+
+Serves /v2/api/graph/connection-recommendations/<user_id> and
+/v2/api/graph/skills-matching/<user_id> from memory. Each aggregate table is
+loaded once, sorted by user, into contiguous NumPy columns plus an offsets
+array: a lookup is one binary search over the distinct user ids and a slice.
+
+A loaded snapshot is never mutated. Reloads build a new snapshot in a
+background thread and swap it in with a single reference assignment, so
+readers always see one complete version. Reloads are triggered when the
+tables' change fingerprint (see refresh_scheduler.input_fingerprint) moves,
+checked at most every CHECK_INTERVAL seconds. Until the first snapshot is
+ready lookups return None and the routes fall back to SQL.
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+
+from db_config import get_analytics_db_connection
+from refresh_scheduler import input_fingerprint
+
+CHECK_INTERVAL = 30  # seconds between fingerprint checks
+NUMERIC_SCALE = 2  # digits after the point of the Decimal columns below
+
+# name -> table, user column, ORDER BY within a user, and (column, dtype) pairs.
+# dtype None marks a text column, stored dictionary-encoded (codes + vocabulary)
+# since titles and reasons repeat heavily. Decimal marks a NUMERIC(p, 2) column,
+# stored exactly as int64 hundredths and returned as Decimal so responses match
+# the SQL fallback ("12.50", not 12.5).
+INDEXED_TABLES = {
+    'connection_recommendations': {
+        'table': 'aggregates.connection_recommendations',
+        'user_column': 'user_id',
+        'order_by': 'recommendation_score DESC, recommended_user_id',
+        'columns': [
+            ('recommended_user_id', np.int64),
+            ('recommendation_score', Decimal),
+            ('common_companies', np.int32),
+            ('common_roles', np.int32),
+            ('common_schools', np.int32),
+            ('recommendation_reason', None),
+        ],
+    },
+    'skills_matching': {
+        'table': 'aggregates.skills_matching_scores',
+        'user_column': 'user_id',
+        'order_by': 'proficiency_score DESC, role_id',
+        'columns': [
+            ('role_id', np.int64),
+            ('role_title', None),
+            ('experience_years', Decimal),
+            ('proficiency_score', Decimal),
+            ('similar_user_count', np.int32),
+        ],
+    },
+}
+
+
+class UserTable:
+    """One aggregate table laid out as per-user slices of contiguous columns"""
+
+    def __init__(self, spec, rows):
+        user_ids = np.array([row[spec['user_column']] for row in rows], dtype=np.int64)
+        # Rows arrive sorted by user, so each user's slice is [offsets[i], offsets[i + 1])
+        self.user_column = spec['user_column']
+        self.keys, starts = np.unique(user_ids, return_index=True)
+        self.offsets = np.append(starts, len(user_ids)).astype(np.int64)
+        self.columns = {}
+        self.vocabularies = {}
+        self.numeric = set()
+        for name, dtype in spec['columns']:
+            values = [row[name] for row in rows]
+            if dtype is None:
+                vocabulary = {}
+                self.columns[name] = np.array(
+                    [vocabulary.setdefault(v, len(vocabulary)) for v in values], dtype=np.int32
+                )
+                self.vocabularies[name] = list(vocabulary)
+            elif dtype is Decimal:
+                self.columns[name] = np.array(
+                    [0 if v is None else int(v.scaleb(NUMERIC_SCALE)) for v in values], dtype=np.int64
+                )
+                self.numeric.add(name)
+            else:
+                self.columns[name] = np.array([0 if v is None else v for v in values], dtype=dtype)
+
+    def lookup(self, user_id, limit=None):
+        """Rows for one user as dicts, in the table's ORDER BY"""
+        pos = np.searchsorted(self.keys, user_id)
+        if pos == len(self.keys) or self.keys[pos] != user_id:
+            return []
+        start, end = int(self.offsets[pos]), int(self.offsets[pos + 1])
+        if limit is not None:
+            end = min(end, start + limit)
+        names = list(self.columns)
+        values = []
+        for name in names:
+            column = self.columns[name][start:end].tolist()
+            if name in self.vocabularies:
+                vocabulary = self.vocabularies[name]
+                column = [vocabulary[code] for code in column]
+            elif name in self.numeric:
+                column = [Decimal(v).scaleb(-NUMERIC_SCALE) for v in column]
+            values.append(column)
+        return [
+            {self.user_column: user_id, **dict(zip(names, row))}
+            for row in zip(*values)
+        ]
+
+    def memory_bytes(self):
+        total = self.keys.nbytes + self.offsets.nbytes
+        total += sum(column.nbytes for column in self.columns.values())
+        for vocabulary in self.vocabularies.values():
+            total += sys.getsizeof(vocabulary) + sum(sys.getsizeof(v) for v in vocabulary)
+        return total
+
+    def stats(self):
+        return {
+            'users': len(self.keys),
+            'rows': int(self.offsets[-1]) if len(self.offsets) else 0,
+            'memory_bytes': self.memory_bytes(),
+        }
+
+
+class SnapshotIndex:
+    """
+    Immutable in-memory snapshot of some analytics tables, rebuilt when they change.
+
+    Subclasses list the tables they read in `relations()` and build the
+    snapshot payload in `build(conn)`.
+    """
+
+    name = 'snapshot-index'
+
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._snapshot = None  # {'data', 'fingerprint', 'loaded_at', 'load_ms'}
+        self._last_check = 0.0
+        self._reloading = threading.Lock()
+
+    def relations(self):
+        raise NotImplementedError
+
+    def build(self, conn):
+        raise NotImplementedError
+
+    def _fingerprint(self, conn):
+        return input_fingerprint(conn, self.relations())
+
+    def load(self):
+        """Build a complete new snapshot and swap it in"""
+        started = time.time()
+        conn = get_analytics_db_connection()
+        try:
+            fingerprint = self._fingerprint(conn)
+            data = self.build(conn)
+        finally:
+            conn.close()
+        self._snapshot = {
+            'data': data,
+            'fingerprint': fingerprint,
+            'loaded_at': datetime.now().isoformat(),
+            'load_ms': int((time.time() - started) * 1000),
+        }
+        self._last_check = time.time()
+        return self._snapshot
+
+    def _reload_if_changed(self):
+        try:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                conn = get_analytics_db_connection()
+                try:
+                    if self._fingerprint(conn) == snapshot['fingerprint']:
+                        self._last_check = time.time()
+                        return
+                finally:
+                    conn.close()
+            self.load()
+        except Exception as e:
+            print(f"{self.name} reload failed: {e}")
+            self._last_check = time.time()
+        finally:
+            self._reloading.release()
+
+    def after_fork(self):
+        """Keep the inherited snapshot but not the reload lock (its thread stayed in the parent)"""
+        self._reloading = threading.Lock()
+
+    def maybe_refresh(self):
+        """Start a background reload check if the last one is older than check_interval"""
+        if time.time() - self._last_check < self.check_interval and self._snapshot is not None:
+            return
+        if self._reloading.acquire(blocking=False):
+            threading.Thread(target=self._reload_if_changed, name=f'{self.name}-reload', daemon=True).start()
+
+    def current(self):
+        """The current snapshot's data (refreshing in the background if due), or None"""
+        self.maybe_refresh()
+        snapshot = self._snapshot
+        return None if snapshot is None else snapshot['data']
+
+    def snapshot_stats(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'loaded': False}
+        return {
+            'loaded': True,
+            'loaded_at': snapshot['loaded_at'],
+            'load_ms': snapshot['load_ms'],
+            'fingerprint': snapshot['fingerprint'],
+        }
+
+
+class GraphIndex(SnapshotIndex):
+    """Holds the current snapshot of every indexed table and reloads it when they change"""
+
+    name = 'graph-index'
+
+    def __init__(self, tables=INDEXED_TABLES, check_interval=CHECK_INTERVAL):
+        super().__init__(check_interval)
+        self.tables = tables
+
+    def relations(self):
+        return [spec['table'] for spec in self.tables.values()]
+
+    def build(self, conn):
+        tables = {}
+        with conn.cursor() as cursor:
+            for name, spec in self.tables.items():
+                cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS present;", (spec['table'],))
+                if not cursor.fetchone()['present']:
+                    continue
+                columns = [spec['user_column']] + [col for col, _ in spec['columns']]
+                cursor.execute(
+                    f"SELECT {', '.join(columns)} FROM {spec['table']} "
+                    f"ORDER BY {spec['user_column']}, {spec['order_by']};"
+                )
+                tables[name] = UserTable(spec, cursor.fetchall())
+        return tables
+
+    def lookup(self, name, user_id, limit=None):
+        """Rows for one user from the current snapshot, or None if the table isn't loaded"""
+        tables = self.current()
+        if tables is None or name not in tables:
+            return None
+        return tables[name].lookup(user_id, limit)
+
+    def stats(self):
+        stats = self.snapshot_stats()
+        if not stats['loaded']:
+            return stats
+        tables = {name: table.stats() for name, table in self._snapshot['data'].items()}
+        stats['memory_bytes'] = sum(t['memory_bytes'] for t in tables.values())
+        stats['tables'] = tables
+        return stats
+
+
+graph_index = GraphIndex()
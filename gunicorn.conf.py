@@ -0,0 +1,107 @@
+"""
+Gunicorn settings for the dashboard (see wsgi.py)
+
+Every setting can be overridden from the environment. Each worker keeps up to
+query_engine.MAX_IDLE idle connections per database and opens up to `threads`
+at once, so the database sees at most about workers × threads connections per
+target under load.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+    GUNICORN_WORKERS=4 GUNICORN_THREADS=8 gunicorn -c gunicorn.conf.py wsgi:app
+    kill -HUP $(cat gunicorn.pid)          # Graceful reload
+"""
+
+import multiprocessing
+import os
+import time
+
+from gunicorn.workers.gthread import ThreadWorker
+
+
+class DrainingThreadWorker(ThreadWorker):
+    """
+    gthread worker that drains on a graceful stop (SIGTERM; old workers get one
+    on every SIGHUP reload). The stock worker closes its poller at once, which
+    drops connections it accepted but hadn't read yet. This one stops accepting,
+    answers every open connection once with `Connection: close` and exits when
+    none are left (or after graceful_timeout).
+    """
+
+    drain_deadline = None
+
+    def handle_exit(self, sig, frame):
+        if self.drain_deadline is None:
+            self.drain_deadline = time.time() + self.cfg.graceful_timeout
+
+    def murder_keepalived(self):
+        super().murder_keepalived()
+        if self.drain_deadline is None:
+            return
+        if self.max_keepalived:
+            self.max_keepalived = 0  # close connections after their current response
+            with self._lock:
+                for sock in self.sockets:
+                    self.poller.unregister(sock)
+        if self.nr_conns == 0 or time.time() > self.drain_deadline:
+            self.alive = False
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+# Requests mostly wait on Postgres, so threads carry the concurrency and
+# workers add CPU for JSON encoding and the in-process aggregations
+workers = int(os.getenv('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = DrainingThreadWorker
+preload_app = True
+
+# Some uncached source queries take tens of seconds on production volumes
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+# No max_requests: a recycled worker loses its pools and result cache, and
+# gthread's autorestart drops the connections it has accepted
+
+pidfile = os.getenv('GUNICORN_PIDFILE', 'gunicorn.pid')
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    import wsgi
+    wsgi.start()
+
+
+def on_exit(server):
+    import wsgi
+    wsgi.stop()
+
+
+def when_ready(server):
+    import wsgi
+    wsgi.preload()
+
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.after_fork()
+
+
+def post_worker_init(worker):
+    import wsgi
+    wsgi.warm_up()
+
+
+def worker_exit(server, worker):
+    import wsgi
+    wsgi.worker_exit()
+
+
+def child_exit(server, worker):
+    import wsgi
+    wsgi.child_exit(worker.pid)
+
+
+def on_reload(server):
+    import wsgi
+    wsgi.reload()
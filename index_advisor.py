@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Index Advisor
+Proposes partial and covering indexes from the predicates of the dashboard's
+queries, estimates what each would save and checks it against the indexes
+each environment already has
+
+Sources:
+    - every executable SQL_QUERIES entry for the target
+    - with --stats N, the N most expensive statements in pg_stat_statements
+      (when the extension is installed in that environment)
+
+Each SELECT block is reduced to, per table: equality columns, the first
+range column (>, >=, <, <=, BETWEEN), join keys and IS NULL filters. A
+proposal keys on the equality columns then the range column (or the join
+keys), is partial on the IS NULL filters (e.g. WHERE deleted_at IS NULL) and
+INCLUDEs up to MAX_INCLUDE other columns the block reads from that table so
+it can answer with an index-only scan.
+
+Proposals are matched against the environment's existing indexes (from
+compare_schemas.py: live, or from a saved schema_comparison_data_*.json with
+--inventory for the databases it snapshots: ChemLink dev, Engagement uat/prod). For the rest, the benefit is the drop in estimated cost of the
+motivating queries with the index present: a hypothetical index when hypopg
+is installed, or with --materialize (not in prod) a real index built inside
+a transaction that is rolled back.
+
+Usage:
+    python index_advisor.py                          # Every target and configured environment
+    python index_advisor.py --target engagement --env uat
+    python index_advisor.py --stats 20               # Also mine pg_stat_statements
+    python index_advisor.py --inventory schema_comparison_data_20251030_103436.json
+    python index_advisor.py --materialize            # Estimate without hypopg (non-prod only)
+    python index_advisor.py --json advice.json
+"""
+
+import argparse
+import json
+import re
+from collections import OrderedDict
+
+from compare_schemas import SNAPSHOT_SOURCES, get_all_indexes
+from db_config import configured_environments
+from plan_checker import executable_queries, plan_params
+from psycopg2 import sql as pgsql
+
+MAX_INCLUDE = 3
+DEFAULT_MIN_BENEFIT = 0.05
+
+STATEMENTS_SQL = """
+    SELECT queryid::text AS queryid, query, calls, total_exec_time
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+      AND query ILIKE 'select%%'
+    ORDER BY total_exec_time DESC
+    LIMIT %s;
+"""
+
+COLUMNS_SQL = """
+    SELECT table_schema, table_name, column_name
+    FROM information_schema.columns
+    WHERE table_schema NOT IN ('pg_catalog', 'information_schema');
+"""
+
+CLAUSE_END = r'\b(?:where|group\s+by|having|order\s+by|limit|offset|window)\b'
+NOT_ALIASES = {'on', 'where', 'left', 'right', 'inner', 'outer', 'full', 'cross', 'join', 'group',
+               'order', 'limit', 'using', 'natural', 'lateral', 'union', 'having', 'window'}
+COLUMN_REF = r'(?:([a-z_]\w*)\.)?([a-z_]\w*)'
+
+
+# ----------------------------------------------------------------------------
+# Predicate extraction
+# ----------------------------------------------------------------------------
+
+def _strip(sql):
+    """Lower-case SQL without comments, string literals or trailing semicolons"""
+    sql = re.sub(r'--[^\n]*', ' ', sql)
+    sql = re.sub(r"'(?:[^']|'')*'", "'_'", sql)
+    sql = re.sub(r'%\(\w+\)s|%s|\$\d+', ' $p ', sql)
+    return sql.lower().strip().rstrip(';')
+
+
+def _split_top(text, pattern):
+    """Split on a regex only where it occurs outside parentheses"""
+    parts, depth, start, i = [], 0, 0, 0
+    regex = re.compile(pattern)
+    while i < len(text):
+        ch = text[i]
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0:
+            m = regex.match(text, i)
+            if m and (i == 0 or not (text[i - 1].isalnum() or text[i - 1] == '_')):
+                parts.append(text[start:i])
+                start = i = m.end()
+                continue
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _flatten(text, groups):
+    """Replace parenthesized subqueries with (#n) placeholders; returns this level's text"""
+    out, i = [], 0
+    while i < len(text):
+        if text[i] == '(':
+            depth, j = 1, i + 1
+            while j < len(text) and depth:
+                depth += {'(': 1, ')': -1}.get(text[j], 0)
+                j += 1
+            inner = text[i + 1:j - 1]
+            if re.match(r'\s*(?:select|with)\b', inner):
+                groups.append(inner)
+                out.append(f'(#{len(groups) - 1})')
+            else:
+                out.append('(' + _flatten(inner, groups) + ')')
+            i = j
+        else:
+            out.append(text[i])
+            i += 1
+    return ''.join(out)
+
+
+def select_blocks(sql):
+    """Every SELECT block of a statement, with its subqueries replaced by placeholders"""
+    pending, blocks = [_strip(sql)], []
+    while pending:
+        groups = []
+        level = _flatten(pending.pop(), groups)
+        pending.extend(groups)
+        for part in _split_top(level, r'(?:union(?:\s+all)?|except|intersect)\b'):
+            for piece in _split_top(part, r'select\b'):
+                if re.search(r'\bfrom\b', piece):
+                    blocks.append('select ' + piece)
+    return blocks
+
+
+def _conjuncts(text):
+    text = re.sub(r'\bbetween\s+(.+?)\s+and\s+', r'between \1 __and__ ', text)
+    return [c.strip().replace('__and__', 'and') for c in _split_top(text, r'and\b') if c.strip()]
+
+
+def block_usage(block, ctes):
+    """
+    {table: {'eq', 'range', 'join', 'null', 'refs'}} for one SELECT block.
+    `refs` holds (alias or None, name) for every identifier, resolved later
+    against the table's real columns.
+    """
+    m = re.search(r'\bfrom\b(.*)', block, re.S)
+    if not m:
+        return {}
+    after_from = m.group(1)
+    end = re.search(CLAUSE_END, after_from)
+    from_part = after_from[:end.start()] if end else after_from
+    rest = after_from[end.start():] if end else ''
+
+    aliases = {}
+    for table, alias in re.findall(r'(?:^|\bjoin\b|,)\s*([a-z_][\w.]*)(?:\s+(?:as\s+)?([a-z_]\w*))?', from_part):
+        if table in ctes or table in NOT_ALIASES or table == 'lateral':
+            continue
+        alias = alias if alias and alias not in NOT_ALIASES else table.split('.')[-1]
+        aliases[alias] = table
+        aliases.setdefault(table, table)
+    tables = set(aliases.values())
+    if not tables:
+        return {}
+
+    def owner(alias):
+        if alias:
+            return aliases.get(alias)
+        return next(iter(tables)) if len(tables) == 1 else None
+
+    usage = {table: {'eq': [], 'range': [], 'join': [], 'null': [], 'refs': set()} for table in tables}
+
+    conditions = re.findall(r'\bon\b(.*?)(?=\b(?:left|right|inner|full|cross)?\s*\bjoin\b|$)', from_part, re.S)
+    where = re.search(r'\bwhere\b(.*?)(?=' + CLAUSE_END.replace('where|', '') + '|$)', rest, re.S)
+    if where:
+        conditions.append(where.group(1))
+
+    for condition in conditions:
+        for conj in _conjuncts(condition):
+            if re.search(r'\bor\b', re.sub(r'\([^()]*\)', '', conj)):
+                continue
+            if m := re.fullmatch(COLUMN_REF + r'\s+is\s+null', conj):
+                if (table := owner(m.group(1))):
+                    usage[table]['null'].append(m.group(2))
+            elif m := re.fullmatch(COLUMN_REF + r'\s*=\s*' + COLUMN_REF, conj):
+                for alias, column in ((m.group(1), m.group(2)), (m.group(3), m.group(4))):
+                    if alias and (table := owner(alias)):
+                        usage[table]['join'].append(column)
+            elif m := re.fullmatch(COLUMN_REF + r'\s*(?:=|=\s*any\b|\s+in\b)\s*(.+)', conj, re.S):
+                if (table := owner(m.group(1))):
+                    usage[table]['eq'].append(m.group(2))
+            elif m := re.fullmatch(COLUMN_REF + r'\s*(?:>=|>|<=|<|\s+between\b)\s*(.+)', conj, re.S):
+                if re.fullmatch(COLUMN_REF, m.group(3).strip()):
+                    continue
+                if (table := owner(m.group(1))):
+                    usage[table]['range'].append(m.group(2))
+
+    for alias, name in re.findall(COLUMN_REF, block):
+        if alias and alias in aliases:
+            usage[aliases[alias]]['refs'].add(name)
+        elif not alias and len(tables) == 1:
+            usage[next(iter(tables))]['refs'].add(name)
+    return usage
+
+
+def proposals_for(sql, source, columns):
+    """Index proposals (dicts) for one statement; `columns` maps table -> its real columns"""
+    text = _strip(sql)
+    ctes = set(re.findall(r'(?:\bwith\b|,)\s*([a-z_]\w*)\s+as\s*\(', text))
+    found = []
+    for block in select_blocks(sql):
+        for table, use in block_usage(block, ctes).items():
+            qualified = table if '.' in table else f'public.{table}'
+            real = columns.get(qualified)
+            if not real:
+                continue
+            pick = lambda names: list(OrderedDict.fromkeys(n for n in names if n in real))
+            eq, ranges, joins, nulls = pick(use['eq']), pick(use['range']), pick(use['join']), pick(use['null'])
+            keys = eq + ranges[:1] if eq or ranges else joins[:1]
+            keys = list(OrderedDict.fromkeys(keys))
+            if not keys:
+                continue
+            include = sorted(n for n in use['refs'] if n in real and n not in keys and n not in nulls)
+            found.append({
+                'table': qualified,
+                'keys': keys,
+                'include': include if len(include) <= MAX_INCLUDE else [],
+                'where': sorted(nulls),
+                'sources': [source],
+            })
+    return found
+
+
+def merge(proposals):
+    merged = OrderedDict()
+    for p in proposals:
+        key = (p['table'], tuple(p['keys']), tuple(p['where']))
+        if key not in merged:
+            merged[key] = dict(p, include=list(p['include']), sources=list(p['sources']))
+            continue
+        existing = merged[key]
+        include = sorted(set(existing['include']) | set(p['include']))
+        existing['include'] = include if len(include) <= MAX_INCLUDE else []
+        existing['sources'] = list(OrderedDict.fromkeys(existing['sources'] + p['sources']))
+    return list(merged.values())
+
+
+# ----------------------------------------------------------------------------
+# Inventory cross-check
+# ----------------------------------------------------------------------------
+
+def parse_index(definition):
+    """(keys, include, where predicates) of a pg_indexes.indexdef"""
+    d = definition.lower()
+    keys = re.search(r'using \w+ \((.*?)\)(?: include| where|$)', d)
+    include = re.search(r' include \((.*?)\)', d)
+    where = re.search(r' where (.*)$', d)
+    split = lambda text: [c.strip().strip('"').split(' ')[0] for c in text.split(',')] if text else []
+    predicates = []
+    if where:
+        predicates = sorted(p.strip('() ') for p in re.split(r'\band\b', where.group(1)))
+    return split(keys.group(1) if keys else ''), split(include.group(1) if include else ''), predicates
+
+
+def match_existing(proposal, indexes):
+    """
+    Status against [(name, definition)]: 'exists' (same keys, filter and
+    columns), 'not_covering' (an index already serves the keys but the query
+    still visits the heap) or 'missing'; plus the matching index name
+    """
+    wanted_where = sorted(f"{column} is null" for column in proposal['where'])
+    serving = None
+    for name, definition in indexes:
+        keys, include, where = parse_index(definition)
+        if keys[:len(proposal['keys'])] != proposal['keys'] or (where and where != wanted_where):
+            continue
+        if set(proposal['include']) <= set(keys) | set(include) and where == wanted_where:
+            return 'exists', name
+        serving = serving or name
+    return ('not_covering', serving) if serving else ('missing', None)
+
+
+def load_inventory(path, target, env):
+    """
+    {schema.table: [(name, definition)]} from a compare_schemas.py JSON dump,
+    or None when the dump has no snapshot of this target's database in `env`
+    """
+    with open(path) as f:
+        snapshots = json.load(f)['snapshots']
+    for name, source in SNAPSHOT_SOURCES.items():
+        snapshot = snapshots.get(name)
+        if source == (target, env) and snapshot and snapshot.get('tables'):
+            return {table: [(idx['name'], idx['definition']) for idx in info.get('indexes', [])]
+                    for table, info in snapshot['tables'].items()}
+    return None
+
+
+def live_inventory(conn):
+    indexes = get_all_indexes(conn)
+    conn.rollback()
+    return indexes
+
+
+# ----------------------------------------------------------------------------
+# Benefit estimation
+# ----------------------------------------------------------------------------
+
+def index_name(proposal):
+    table = proposal['table'].split('.')[-1]
+    suffix = '_live' if proposal['where'] == ['deleted_at'] else ('_partial' if proposal['where'] else '')
+    return f"{table}_{'_'.join(proposal['keys'])}{suffix}_idx"[:63]
+
+
+def index_ddl(proposal, concurrently=True, name=True):
+    schema, table = proposal['table'].split('.', 1)
+    ddl = "CREATE INDEX " + ("CONCURRENTLY " if concurrently else "")
+    ddl += (pgsql.Identifier(index_name(proposal)).string + " " if name else "")
+    ddl += f"ON {schema}.{table} ({', '.join(proposal['keys'])})"
+    if proposal['include']:
+        ddl += f" INCLUDE ({', '.join(proposal['include'])})"
+    if proposal['where']:
+        ddl += " WHERE " + ' AND '.join(f"{column} IS NULL" for column in proposal['where'])
+    return ddl
+
+
+def first_value(row):
+    return row[0] if isinstance(row, tuple) else next(iter(row.values()))
+
+
+def estimated_cost(cursor, statement):
+    text, params, generic = statement
+    options = 'GENERIC_PLAN, FORMAT JSON' if generic else 'FORMAT JSON'
+    cursor.execute("SAVEPOINT advisor_explain")
+    try:
+        cursor.execute(f"EXPLAIN ({options}) {text.strip().rstrip(';')}", params)
+        plan = first_value(cursor.fetchone())
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT advisor_explain")
+        return None
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return plan[0]['Plan']['Total Cost']
+
+
+def estimate(conn, proposals, statements, method):
+    """Fill proposal['benefit'] (fraction of the motivating queries' cost saved)"""
+    with conn.cursor() as cursor:
+        before = {source: estimated_cost(cursor, statement) for source, statement in statements.items()}
+        for proposal in proposals:
+            if proposal['status'] == 'exists':
+                continue
+            sources = [s for s in proposal['sources'] if before.get(s) is not None]
+            if not sources:
+                continue
+            cursor.execute("SAVEPOINT advisor_index")
+            try:
+                if method == 'hypopg':
+                    cursor.execute("SELECT * FROM hypopg_create_index(%s)", (index_ddl(proposal, False, False),))
+                else:
+                    cursor.execute(index_ddl(proposal, concurrently=False, name=False))
+                after = {s: estimated_cost(cursor, statements[s]) for s in sources}
+            finally:
+                if method == 'hypopg':
+                    cursor.execute("SELECT hypopg_reset()")
+                cursor.execute("ROLLBACK TO SAVEPOINT advisor_index")
+            total_before = sum(before[s] for s in sources)
+            total_after = sum(after[s] if after[s] is not None else before[s] for s in sources)
+            proposal['benefit'] = max(0.0, round(1 - total_after / total_before, 3)) if total_before else 0.0
+            proposal['cost_before'] = round(total_before, 1)
+            proposal['cost_after'] = round(total_after, 1)
+    conn.rollback()
+
+
+# ----------------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------------
+
+def has_extension(conn, name):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", (name,))
+        found = cursor.fetchone() is not None
+    conn.rollback()
+    return found
+
+
+def table_columns(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(COLUMNS_SQL)
+        rows = cursor.fetchall()
+    conn.rollback()
+    columns = {}
+    for row in rows:
+        schema, table, column = (row['table_schema'], row['table_name'], row['column_name']) \
+            if isinstance(row, dict) else row
+        columns.setdefault(f"{schema}.{table}", set()).add(column)
+    return columns
+
+
+def advise(target, env, connect, args):
+    conn = connect()
+    try:
+        columns = table_columns(conn)
+        statements, proposals = {}, []
+        for query_id, entry in executable_queries().items():
+            if entry['target'] != target:
+                continue
+            statements[query_id] = (entry['query'], plan_params(entry), False)
+            proposals.extend(proposals_for(entry['query'], query_id, columns))
+
+        if args.stats:
+            if has_extension(conn, 'pg_stat_statements'):
+                generic = conn.server_version >= 160000
+                with conn.cursor() as cursor:
+                    cursor.execute(STATEMENTS_SQL, (args.stats,))
+                    rows = cursor.fetchall()
+                conn.rollback()
+                for row in rows:
+                    row = dict(row) if isinstance(row, dict) else dict(zip(('queryid', 'query', 'calls', 'total_exec_time'), row))
+                    source = f"pgss:{row['queryid']}"
+                    parametrized = bool(re.search(r'\$\d', row['query']))
+                    if not parametrized or generic:
+                        statements[source] = (row['query'], None, parametrized)
+                    proposals.extend(proposals_for(row['query'], source, columns))
+            else:
+                print(f"  • {target}/{env}: pg_stat_statements not installed, using registered queries only")
+
+        proposals = merge(proposals)
+        inventory = load_inventory(args.inventory, target, env) if args.inventory else None
+        if inventory is None:
+            inventory = live_inventory(conn)
+        for proposal in proposals:
+            indexes = inventory.get(proposal['table'], [])
+            proposal['status'], proposal['existing'] = match_existing(proposal, indexes)
+            proposal['ddl'] = index_ddl(proposal)
+
+        method = None
+        if has_extension(conn, 'hypopg'):
+            method = 'hypopg'
+        elif args.materialize and env != 'prod':
+            method = 'materialize'
+        if method:
+            conn.autocommit = False
+            estimate(conn, proposals, statements, method)
+        return proposals, method
+    finally:
+        conn.close()
+
+
+def report(target, env, proposals, method, min_benefit):
+    print(f"\n{target}/{env}: {len(proposals)} candidate indexes"
+          f" (benefit: {method or 'not estimated; install hypopg or pass --materialize'})")
+    for p in sorted(proposals, key=lambda p: (p['status'] != 'missing', -p.get('benefit', 0))):
+        label = f"{p['table']} ({', '.join(p['keys'])})"
+        if p['status'] == 'exists':
+            print(f"  ✓ {label} covered by {p['existing']}")
+            continue
+        benefit = p.get('benefit')
+        if benefit is not None and benefit < min_benefit:
+            print(f"  • {label}: no meaningful benefit ({benefit:.0%})")
+            continue
+        if p['status'] == 'not_covering' and benefit is None:
+            print(f"  • {label} served by {p['existing']} (not covering)")
+            continue
+        gain = f"{benefit:>4.0%}" if benefit is not None else '   ?'
+        note = f" (replaces {p['existing']} for these queries)" if p['status'] == 'not_covering' else ''
+        print(f"  + {gain} {p['ddl']};{note}")
+        print(f"         -- {', '.join(p['sources'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Propose indexes for the dashboard queries')
+    parser.add_argument('--target', help='chemlink, engagement, kratos or analytics (default: all)')
+    parser.add_argument('--env', help='Comma-separated environments (default: all configured)')
+    parser.add_argument('--stats', type=int, default=0, help='Also use the top N pg_stat_statements entries')
+    parser.add_argument('--inventory', help='compare_schemas.py JSON output to check existing indexes against')
+    parser.add_argument('--materialize', action='store_true',
+                        help='Without hypopg, build candidates in a rolled-back transaction (never in prod)')
+    parser.add_argument('--min-benefit', type=float, default=DEFAULT_MIN_BENEFIT,
+                        help='Smallest cost reduction worth proposing (default 0.05)')
+    parser.add_argument('--json', help='Also write the proposals to this file')
+    args = parser.parse_args()
+
+    targets = [args.target] if args.target else sorted({e['target'] for e in executable_queries().values()})
+    envs = set(args.env.split(',')) if args.env else None
+    results = {}
+    for target in targets:
+        for env, connect in configured_environments(target).items():
+            if envs and env not in envs:
+                continue
+            try:
+                proposals, method = advise(target, env, connect, args)
+            except Exception as e:
+                print(f"\n✗ {target}/{env}: {str(e).strip().splitlines()[0]}")
+                continue
+            report(target, env, proposals, method, args.min_benefit)
+            results[f"{target}/{env}"] = proposals
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Proposals written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""
+In-process latency and volume metrics, exposed at /metrics in the Prometheus
+text format (version 0.0.4)
+
+Recorded per request: route latency and response bytes. Per query: latency,
+rows returned and errors, plus connection acquire time per database and
+result-cache hits and misses per query id. Every series also carries the
+APP_ENV it was served from. Histograms have fixed buckets, so an observation
+is a bisect plus a few additions under a lock.
+
+The registry lives in each process. Under gunicorn, share() points every
+worker at one directory: each writes its registry there every
+SHARE_INTERVAL seconds (and on exit), and /metrics sums the files there.
+When a worker has exited the master folds its file into one retired file
+(retire), so counters keep growing across reloads and worker restarts no
+matter which worker answers the scrape, and the directory doesn't grow.
+
+Usage:
+    from metrics import instrument_app
+    instrument_app(app)          # route metrics + GET /metrics
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SHARE_INTERVAL = 1.0  # seconds between a worker's writes to the shared directory
+RETIRED_FILE = 'retired.json'  # summed counts of workers that have exited
+LOCK_FILE = '.lock'  # held shared while summing the directory, exclusive while retiring
+
+_shared_dir = None
+_shared_path = None
+_flush_lock = threading.Lock()
+_pending_retire = []  # worker pids waiting for retire (master only)
+_retiring = False
+
+
+def environment():
+    """APP_ENV label (db_config reloads .env on every connection)"""
+    return os.getenv('APP_ENV', 'uat').lower()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    @staticmethod
+    def merge(total, values):
+        for key, value in values.items():
+            total[key] = total.get(key, 0) + value
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        items = sorted((self.snapshot() if values is None else values).items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: [list(s[0]), s[1], s[2]] for key, s in self._series.items()}
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    @staticmethod
+    def merge(total, series):
+        for key, (counts, value_sum, count) in series.items():
+            merged = total.get(key)
+            if merged is None:
+                total[key] = [list(counts), value_sum, count]
+                continue
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += value_sum
+            merged[2] += count
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        items = sorted((self.snapshot() if series is None else series).items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), counts):
+                cumulative += n
+                le = bound if bound == '+Inf' else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+route_latency = Histogram(
+    'dashboard_route_duration_seconds', 'Time to serve a request, by route template',
+    ['route', 'method', 'status', 'env'])
+response_bytes = Histogram(
+    'dashboard_response_bytes', 'Serialized response body size', ['route', 'env'], BYTE_BUCKETS)
+query_latency = Histogram(
+    'dashboard_query_duration_seconds', 'Query execution time including fetch',
+    ['query', 'database', 'env'])
+query_rows = Histogram(
+    'dashboard_query_rows', 'Rows returned per query', ['query', 'database', 'env'], ROW_BUCKETS)
+query_errors = Counter(
+    'dashboard_query_errors_total', 'Queries that raised', ['query', 'database', 'env'])
+connection_acquire = Histogram(
+    'dashboard_connection_acquire_seconds', 'Time to get a database connection (new or pooled)',
+    ['database', 'env'])
+cache_requests = Counter(
+    'dashboard_cache_requests_total', 'Result cache lookups', ['query', 'result', 'env'])
+
+REGISTRY = [route_latency, response_bytes, query_latency, query_rows, query_errors,
+            connection_acquire, cache_requests]
+
+
+def timed_connect(database, connect):
+    """Call `connect` and record how long it took"""
+    started = time.perf_counter()
+    conn = connect()
+    connection_acquire.observe(time.perf_counter() - started, database=database, env=environment())
+    return conn
+
+
+def observe_query(query, database, seconds, rows=None):
+    """Record one query; rows=None records an error"""
+    env = environment()
+    if rows is None:
+        query_errors.inc(query=query, database=database, env=env)
+        return
+    query_latency.observe(seconds, query=query, database=database, env=env)
+    query_rows.observe(rows, query=query, database=database, env=env)
+
+
+def observe_cache(query, hit):
+    cache_requests.inc(query=query, result='hit' if hit else 'miss', env=environment())
+
+
+def query_seconds_total():
+    """Total time spent in queries so far, across every series (benchmarks diff this)"""
+    with query_latency._lock:
+        return sum(series[1] for series in query_latency._series.values())
+
+
+def share(directory):
+    """
+    Write this process's registry to `directory` and serve /metrics summed over
+    every file there. Call once in the gunicorn master, before workers fork.
+    """
+    global _shared_dir
+    os.makedirs(directory, exist_ok=True)
+    _shared_dir = directory
+    _new_shared_path()
+
+
+def shared_dir():
+    return _shared_dir
+
+
+def _new_shared_path():
+    # pid alone could be reused by a later worker and overwrite a retired one's totals
+    global _shared_path
+    _shared_path = os.path.join(_shared_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+
+
+def after_fork():
+    """In a forked worker: drop the parent's counts (they are in its own file) and start writing"""
+    for metric in REGISTRY:
+        metric.clear()
+    if _shared_dir is None:
+        return
+    _new_shared_path()
+
+    def flush_periodically():
+        while True:
+            time.sleep(SHARE_INTERVAL)
+            try:
+                flush()
+            except OSError as e:
+                print(f"✗ Metrics not shared: {e}")
+
+    threading.Thread(target=flush_periodically, name='metrics-share', daemon=True).start()
+
+
+def _write(path, series):
+    """Atomically write {metric name: series} to `path`"""
+    data = {name: [[list(key), value] for key, value in values.items()] for name, values in series.items()}
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _add_file(merged, path):
+    """Add the counts in one shared file to `merged`; False if it is gone or half-written"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    for metric in REGISTRY:
+        metric.merge(merged[metric.name], {tuple(key): value for key, value in data.get(metric.name, [])})
+    return True
+
+
+def _directory_lock(mode):
+    """Open and flock the shared directory's lock file; close the returned file to release it"""
+    lock = open(os.path.join(_shared_dir, LOCK_FILE), 'a')
+    fcntl.flock(lock, mode)
+    return lock
+
+
+def flush():
+    """Write this process's registry to its file in the shared directory (no-op unless shared)"""
+    if _shared_path is None:
+        return
+    with _flush_lock:
+        _write(_shared_path, {metric.name: metric.snapshot() for metric in REGISTRY})
+
+
+def retire(pid):
+    """
+    In the master, once worker `pid` has exited: fold its file into the retired
+    file and delete it. The exclusive lock keeps scrapes from counting it twice
+    or not at all while the two files change.
+    """
+    global _retiring
+    if _shared_dir is None:
+        return
+    _pending_retire.append(pid)
+    if _retiring:
+        # gunicorn reaps workers in its SIGCHLD handler, which can interrupt an
+        # earlier retire; taking the lock again here would wait on ourselves
+        return
+    _retiring = True
+    try:
+        with _directory_lock(fcntl.LOCK_EX):
+            while _pending_retire:
+                _retire_files(_pending_retire.pop())
+    finally:
+        _retiring = False
+
+
+def _retire_files(pid):
+    prefix = f"{pid}-"
+    filenames = [name for name in os.listdir(_shared_dir) if name.startswith(prefix)]
+    if not filenames:
+        return
+    retired_path = os.path.join(_shared_dir, RETIRED_FILE)
+    retired = {metric.name: {} for metric in REGISTRY}
+    _add_file(retired, retired_path)
+    for filename in filenames:
+        if filename.endswith('.json'):
+            _add_file(retired, os.path.join(_shared_dir, filename))
+    _write(retired_path, retired)
+    for filename in filenames:
+        os.remove(os.path.join(_shared_dir, filename))
+
+
+def _merged():
+    """{metric name: series} summed over every process's file in the shared directory"""
+    flush()
+    merged = {metric.name: {} for metric in REGISTRY}
+    with _directory_lock(fcntl.LOCK_SH):
+        for filename in os.listdir(_shared_dir):
+            if filename.endswith('.json'):
+                _add_file(merged, os.path.join(_shared_dir, filename))
+    return merged
+
+
+def render():
+    merged = _merged() if _shared_dir is not None else {}
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render(merged.get(metric.name)))
+    return '\n'.join(lines) + '\n'
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    env = environment()
+    route_latency.observe(time.perf_counter() - started, route=route, method=request.method,
+                          status=str(response.status_code), env=env)
+    if response.content_length is not None:
+        response_bytes.observe(response.content_length, route=route, env=env)
+    return response
+
+
+def instrument_app(app):
+    """Time every request and serve the registry at GET /metrics"""
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.add_url_rule('/metrics', 'metrics', lambda: Response(render(), content_type=CONTENT_TYPE))
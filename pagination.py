@@ -0,0 +1,220 @@
+"""
+Keyset pagination and field projection for the graph list endpoints
+
+Each paged table lists its light columns, its heavy array columns and a sort
+key that ends in a unique row identity. A page is the next `limit` rows after
+the cursor in that order, found with a range condition on the sort key
+rather than OFFSET, so page N costs the same as page 1 given an index on the
+sort key. The cursor is the last row's sort key, base64-encoded JSON, and is
+returned in the X-Next-Cursor response header so the body stays a plain list.
+
+Heavy array columns are left out unless named in ?fields=. A single row's
+arrays can be fetched (and sliced) separately through expand_array().
+"""
+
+import base64
+import json
+from decimal import Decimal
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_SLICE_SIZE = 1000
+MAX_SLICE_SIZE = 10000
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+# name -> table, light columns, heavy (array) columns, sort key as
+# (column, direction, SQL type), row identity, optional static filter.
+# The location/alumni/project tables are built outside this repo; their sort
+# key assumes the identity columns are NOT NULL.
+PAGED_TABLES = {
+    'company-network': {
+        'table': 'aggregates.company_network_map',
+        'columns': ['company_id_1', 'company_id_2', 'company_name_1', 'company_name_2',
+                    'shared_employee_count', 'network_strength_score'],
+        'heavy': ['employee_ids'],
+        'sort': [('shared_employee_count', 'desc', 'integer'),
+                 ('company_id_1', 'asc', 'bigint'),
+                 ('company_id_2', 'asc', 'bigint')],
+        'key': ['company_id_1', 'company_id_2'],
+    },
+    'career-paths': {
+        'table': 'aggregates.career_path_patterns',
+        'columns': ['path_vector', 'role_sequence', 'user_count', 'avg_years_per_role'],
+        'heavy': ['user_ids'],
+        'sort': [('user_count', 'desc', 'integer'),
+                 ('path_vector', 'asc', 'bigint[]')],
+        'key': ['path_vector'],
+    },
+    'location-networks': {
+        'table': 'aggregates.location_based_networks',
+        'columns': ['location_id', 'country', 'user_count',
+                    'company_diversity_score', 'role_diversity_score'],
+        'heavy': ['top_companies', 'top_roles'],
+        'sort': [('user_count', 'desc', 'bigint'),
+                 ('location_id', 'asc', 'bigint')],
+        'key': ['location_id'],
+    },
+    'alumni-networks': {
+        'table': 'aggregates.alumni_networks',
+        'columns': ['school_id', 'school_name', 'degree_id', 'degree_name', 'alumni_count',
+                    'graduation_year_min', 'graduation_year_max'],
+        'heavy': ['current_companies', 'current_roles'],
+        'sort': [('alumni_count', 'desc', 'bigint'),
+                 ('school_id', 'asc', 'bigint'),
+                 ('degree_id', 'asc', 'bigint')],
+        'key': ['school_id', 'degree_id'],
+        'where': 'alumni_count > 0',
+    },
+    'project-collaborations': {
+        'table': 'aggregates.project_collaboration_graph',
+        'columns': ['project_id', 'project_name', 'company_id', 'company_name',
+                    'user_count', 'collaboration_strength'],
+        'heavy': ['role_ids'],
+        'sort': [('user_count', 'desc', 'bigint'),
+                 ('project_id', 'asc', 'bigint')],
+        'key': ['project_id'],
+        'where': 'user_count > 0',
+    },
+}
+
+
+class PageError(ValueError):
+    """Bad cursor, limit, field or key in a paged request"""
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_json_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, spec):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PageError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(spec['sort']):
+        raise PageError('Invalid cursor')
+    return values
+
+
+def page_size(limit, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if limit is None:
+        return default
+    if limit < 1:
+        raise PageError('limit must be positive')
+    return min(limit, maximum)
+
+
+def projection(spec, fields):
+    """Requested output columns; heavy columns only when asked for"""
+    available = spec['columns'] + spec['heavy']
+    if not fields:
+        return list(spec['columns'])
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in available]
+    if unknown:
+        raise PageError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(available)})")
+    return [column for column in available if column in requested]
+
+
+def keyset_condition(sort, values):
+    """
+    Rows strictly after `values` in `sort` order, as (sql, params).
+
+    The leading column is also bounded on its own (<= for DESC, >= for ASC) so
+    the planner can start an index range scan there.
+    """
+    def compare(column, direction, sql_type, value, strict=True):
+        op = ('<' if direction == 'desc' else '>') + ('' if strict else '=')
+        return f"{column} {op} %s::{sql_type}", [value]
+
+    branches, params = [], []
+    for i, (column, direction, sql_type) in enumerate(sort):
+        parts = [f"{c} = %s::{t}" for c, _, t in sort[:i]]
+        branch_params = list(values[:i])
+        clause, clause_params = compare(column, direction, sql_type, values[i])
+        branches.append(' AND '.join(parts + [clause]))
+        params.extend(branch_params + clause_params)
+
+    lead, lead_params = compare(*sort[0], values[0], strict=False)
+    return f"{lead} AND ({' OR '.join(f'({b})' for b in branches)})", lead_params + params
+
+
+def page_query(spec, fields=None, cursor=None, limit=None):
+    """
+    SQL and params for one page; fetches limit + 1 rows to detect a next page.
+
+    Returns (sql, params, output columns, page size).
+    """
+    output = projection(spec, fields)
+    size = page_size(limit)
+    sort_columns = [column for column, _, _ in spec['sort']]
+    selected = output + [column for column in sort_columns if column not in output]
+
+    conditions, params = [], []
+    if spec.get('where'):
+        conditions.append(spec['where'])
+    if cursor:
+        clause, clause_params = keyset_condition(spec['sort'], decode_cursor(cursor, spec))
+        conditions.append(clause)
+        params.extend(clause_params)
+
+    sql = f"SELECT {', '.join(selected)} FROM {spec['table']}"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    sql += " ORDER BY " + ', '.join(f"{column} {direction.upper()}" for column, direction, _ in spec['sort'])
+    sql += f" LIMIT {size + 1};"
+    return sql, params, output, size
+
+
+def paginate(spec, rows, output, size):
+    """Trim the extra row and project; returns (rows, next cursor or None)"""
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor([rows[-1][column] for column, _, _ in spec['sort']])
+    return [{column: row[column] for column in output} for row in rows], next_cursor
+
+
+def parse_key(spec, args):
+    """Row identity from query args; array-typed key columns are comma-separated"""
+    types = {column: sql_type for column, _, sql_type in spec['sort']}
+    key = []
+    for column in spec['key']:
+        raw = args.get(column)
+        if raw is None:
+            raise PageError(f"Missing key: {column}")
+        try:
+            if types.get(column, '').endswith('[]'):
+                key.append([int(part) for part in raw.split(',') if part])
+            else:
+                key.append(int(raw))
+        except ValueError:
+            raise PageError(f"Invalid key: {column}")
+    return key
+
+
+def expand_query(spec, field, key, offset=0, limit=None):
+    """
+    SQL and params returning one slice of a heavy array column for one row,
+    plus the array's total length.
+    """
+    if field not in spec['heavy']:
+        raise PageError(f"Unknown array field: {field} (available: {', '.join(spec['heavy'])})")
+    if offset < 0:
+        raise PageError('offset must not be negative')
+    size = page_size(limit, DEFAULT_SLICE_SIZE, MAX_SLICE_SIZE)
+    types = {column: sql_type for column, _, sql_type in spec['sort']}
+    where = ' AND '.join(f"{column} = %s::{types[column]}" for column in spec['key'])
+    sql = (
+        f"SELECT {field}[%s:%s] AS items, COALESCE(cardinality({field}), 0) AS total "
+        f"FROM {spec['table']} WHERE {where};"
+    )
+    return sql, [offset + 1, offset + size] + list(key), size
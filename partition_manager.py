@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Partition Manager
+Monthly range partitions for the time-series tables in chemlink_analytics
+
+PARTITIONED_TABLES declares every partitioned table, its partition key and
+its retention. Maintenance creates partitions `premake` months ahead of the
+current month and, when `retain_months` is set, detaches older partitions
+into the archive schema (they stay queryable there and can be re-attached).
+
+Queries that compare the partition key against a literal or a bound
+parameter (not CURRENT_DATE arithmetic) are pruned at plan time, so a "last
+30 days" read touches at most two partitions however much history piles up.
+New event tables (e.g. the user_sessions table from
+design-docs/SESSION_TRACKING_DATA_DESIGN.md) only need a registry entry.
+
+Usage:
+    python partition_manager.py                        # Create upcoming partitions, archive expired ones
+    python partition_manager.py --migrate              # Convert existing plain tables to partitioned
+    python partition_manager.py --list                 # Show partitions and row estimates
+    python partition_manager.py --retain-months 24     # Override retention for this run
+"""
+
+import argparse
+import re
+from datetime import date
+
+from db_config import get_analytics_db_connection
+
+ARCHIVE_SCHEMA = 'archive'
+
+# table -> column (DATE partition key), key (primary key columns, must include
+# the partition key), premake (months created ahead), retain_months (None keeps all)
+PARTITIONED_TABLES = {
+    'aggregates.daily_metrics': {
+        'column': 'metric_date',
+        'key': ['metric_date'],
+        'premake': 3,
+        'retain_months': None,
+    },
+}
+
+RANGE_BOUND_RE = re.compile(r"FOR VALUES FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+PARTITIONS_QUERY = """
+    SELECT
+        c.oid::regclass::text AS partition,
+        pg_get_expr(c.relpartbound, c.oid) AS bound,
+        GREATEST(c.reltuples, 0)::bigint AS row_estimate
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = %s::regclass;
+"""
+
+
+def split_name(table):
+    schema, name = table.split('.')
+    return schema, name
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    """First day of the month `months` away from `day`'s month"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    """aggregates.daily_metrics + 2025-10 -> aggregates.daily_metrics_p2025_10"""
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partitioned(conn, table):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);",
+            (table,),
+        )
+        row = cursor.fetchone()
+    return bool(row) and row['relkind'] == 'p'
+
+
+def archived_months(conn, table):
+    """Months of `table` whose partitions have been moved to the archive schema"""
+    _, name = split_name(table)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relkind = 'r' AND c.relname LIKE %s;
+            """,
+            (ARCHIVE_SCHEMA, f"{name}\\_p%"),
+        )
+        names = [row['relname'] for row in cursor.fetchall()]
+    pattern = re.compile(rf"{re.escape(name)}_p(\d{{4}})_(\d{{2}})")
+    return sorted(
+        date(int(match.group(1)), int(match.group(2)), 1)
+        for match in map(pattern.fullmatch, names) if match
+    )
+
+
+def retention_start(conn, table, today=None):
+    """
+    First day still kept in the live table, or None when nothing is archived.
+
+    Follows what has actually been archived (a --retain-months run may go
+    further than the registry) and never goes back before an archived month,
+    so callers don't recreate a partition that already sits in the archive.
+    """
+    horizons = []
+    archived = archived_months(conn, table)
+    if archived:
+        horizons.append(add_months(archived[-1], 1))
+    retain = PARTITIONED_TABLES.get(table, {}).get('retain_months')
+    if retain is not None:
+        horizons.append(add_months(month_start(today or date.today()), -retain))
+    return max(horizons) if horizons else None
+
+
+def list_partitions(conn, table):
+    """Return [{partition, start, end, row_estimate}] ordered by range start"""
+    with conn.cursor() as cursor:
+        cursor.execute(PARTITIONS_QUERY, (table,))
+        rows = cursor.fetchall()
+    partitions = []
+    for row in rows:
+        match = RANGE_BOUND_RE.match(row['bound'])
+        if not match:
+            continue
+        partitions.append({
+            'partition': row['partition'],
+            'start': date.fromisoformat(match.group(1)),
+            'end': date.fromisoformat(match.group(2)),
+            'row_estimate': row['row_estimate'],
+        })
+    return sorted(partitions, key=lambda p: p['start'])
+
+
+def create_partition(conn, table, month):
+    """Create the partition holding `month` if it doesn't exist yet"""
+    name = partition_name(table, month)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s);",
+            (month.isoformat(), add_months(month, 1).isoformat()),
+        )
+    return name
+
+
+def ensure_partitions(conn, table, first_day, last_day):
+    """
+    Make sure every month from first_day through last_day has a partition.
+
+    No-op for tables that haven't been migrated yet, and months before the
+    retention horizon are skipped. Returns the partitions that had to be created.
+    """
+    if not is_partitioned(conn, table):
+        return []
+    existing = {p['start'] for p in list_partitions(conn, table)}
+    created = []
+    month = max(month_start(first_day), retention_start(conn, table) or date.min)
+    while month <= last_day:
+        if month not in existing:
+            created.append(create_partition(conn, table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def archive_partitions(conn, table, retain_months, today=None):
+    """Detach partitions that end before the retention horizon and move them to the archive schema"""
+    horizon = add_months(month_start(today or date.today()), -retain_months)
+    archived = []
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA};")
+        for partition in list_partitions(conn, table):
+            if partition['end'] > horizon:
+                continue
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {partition['partition']};")
+            cursor.execute(f"ALTER TABLE {partition['partition']} SET SCHEMA {ARCHIVE_SCHEMA};")
+            archived.append(partition['partition'])
+    return archived
+
+
+def migrate(conn, table, today=None):
+    """
+    Convert a plain table into a monthly-partitioned one in a single transaction.
+
+    Rows are copied into a new partitioned table that then replaces the old
+    one; writers are blocked for the duration. Returns False if the table
+    was already partitioned.
+    """
+    if is_partitioned(conn, table):
+        return False
+    spec = PARTITIONED_TABLES[table]
+    schema, name = split_name(table)
+    staging_name = f"{name}_partitioned"
+    new_table = f"{schema}.{staging_name}"
+    today = today or date.today()
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE;")
+        cursor.execute(f"SELECT MIN({spec['column']}) AS first_day FROM {table};")
+        first_day = cursor.fetchone()['first_day'] or today
+
+        cursor.execute(f"""
+            CREATE TABLE {new_table} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            PARTITION BY RANGE ({spec['column']});
+        """)
+        cursor.execute(f"ALTER TABLE {new_table} ADD PRIMARY KEY ({', '.join(spec['key'])});")
+        month = month_start(first_day)
+        last_month = add_months(month_start(today), spec['premake'])
+        while month <= last_month:
+            # Partitions are named after the final table, not the temporary one
+            cursor.execute(
+                f"CREATE TABLE {partition_name(table, month)} PARTITION OF {new_table} "
+                f"FOR VALUES FROM (%s) TO (%s);",
+                (month.isoformat(), add_months(month, 1).isoformat()),
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(f"INSERT INTO {new_table} SELECT * FROM {table};")
+        moved = cursor.rowcount
+        cursor.execute(f"DROP TABLE {table};")
+        cursor.execute(f"ALTER TABLE {new_table} RENAME TO {name};")
+        cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {staging_name}_pkey TO {name}_pkey;")
+    print(f"✓ Migrated {table}: {moved} rows into monthly partitions from {month_start(first_day)}")
+    return True
+
+
+def maintain(tables=None, retain_months=None, today=None, do_migrate=False):
+    """Create upcoming partitions and archive expired ones for every registered table"""
+    today = today or date.today()
+    conn = get_analytics_db_connection()
+    try:
+        for table in tables or PARTITIONED_TABLES:
+            spec = PARTITIONED_TABLES[table]
+            if do_migrate:
+                migrate(conn, table, today)
+            if not is_partitioned(conn, table):
+                print(f"✗ {table} is not partitioned yet (run with --migrate)")
+                continue
+
+            created = ensure_partitions(
+                conn, table, month_start(today), add_months(month_start(today), spec['premake'])
+            )
+            print(f"✓ {table}: created {len(created)} upcoming partitions")
+
+            retain = retain_months if retain_months is not None else spec['retain_months']
+            if retain is not None:
+                archived = archive_partitions(conn, table, retain, today)
+                print(f"✓ {table}: archived {len(archived)} partitions to {ARCHIVE_SCHEMA}")
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def show_partitions(tables=None):
+    conn = get_analytics_db_connection()
+    try:
+        for table in tables or PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                print(f"{table}: not partitioned")
+                continue
+            partitions = list_partitions(conn, table)
+            print(f"{table}: {len(partitions)} partitions")
+            for p in partitions:
+                print(f"  {p['partition']:<45} {p['start']} → {p['end']}  ~{p['row_estimate']} rows")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage monthly partitions in chemlink_analytics')
+    parser.add_argument('--tables', nargs='+', choices=sorted(PARTITIONED_TABLES),
+                        help='Only manage these tables (default: all registered)')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Convert plain tables into partitioned tables first')
+    parser.add_argument('--retain-months', type=int,
+                        help='Archive partitions older than this many months')
+    parser.add_argument('--list', action='store_true', help='List partitions and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        show_partitions(args.tables)
+        return
+    maintain(args.tables, args.retain_months, do_migrate=args.migrate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Checker
+EXPLAINs every executable SQL_QUERIES entry in every environment and compares
+the plans against a stored baseline
+
+For each query and environment it records the estimated total cost, the plan
+node types and any sequential scans on tables with at least --large-table
+rows (pg_class.reltuples). A query regresses when its cost grows by more than
+--max-regression (a fraction of the baseline cost), when it picks up a seq
+scan on a large table the baseline did not have, or when it no longer plans
+at all (e.g. a table or column missing in that environment). Any regression
+makes the run exit non-zero.
+
+Windowed entries are planned over their default window; other placeholders
+use SAMPLE_PARAMS. Environments whose credentials are not configured are
+skipped.
+
+Usage:
+    python plan_checker.py                          # Check against plan_baseline.json
+    python plan_checker.py --env uat,prod           # Only these environments
+    python plan_checker.py --update-baseline        # Record current plans as the baseline
+    python plan_checker.py --max-regression 0.25 --large-table 50000
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+
+from db_config import configured_environments
+from query_engine import window_params
+from sql_queries import SQL_QUERIES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plan_baseline.json')
+DEFAULT_MAX_REGRESSION = 0.5
+DEFAULT_LARGE_TABLE_ROWS = 10000
+
+# Values for placeholders that are not part of a window
+SAMPLE_PARAMS = {'user_id': 1, 'company_ids': [1], 'granularity': 'month'}
+
+RELTUPLES_SQL = """
+    SELECT relname, MAX(reltuples)::bigint AS reltuples
+    FROM pg_class
+    WHERE relname = ANY(%s) AND relkind IN ('r', 'p', 'm')
+    GROUP BY relname;
+"""
+
+
+def executable_queries():
+    return {query_id: entry for query_id, entry in SQL_QUERIES.items() if entry.get('target')}
+
+
+def plan_params(entry):
+    params = dict(SAMPLE_PARAMS)
+    if entry.get('window'):
+        params.update(window_params(entry, {})[0])
+    return {name: params[name] for name in entry.get('params', [])}
+
+
+def walk(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk(child)
+
+
+def explain(conn, entry):
+    """Top-level plan node of EXPLAIN (FORMAT JSON), run in a rolled-back transaction"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {entry['query'].strip().rstrip(';')}", plan_params(entry))
+            row = cursor.fetchone()
+    finally:
+        conn.rollback()
+    plan = row[0] if isinstance(row, tuple) else next(iter(row.values()))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def summarize(conn, plan, large_table_rows):
+    """Cost, node type counts and large-table seq scans of one plan"""
+    nodes = list(walk(plan))
+    node_types = {}
+    for node in nodes:
+        node_types[node['Node Type']] = node_types.get(node['Node Type'], 0) + 1
+
+    scanned = sorted({node['Relation Name'] for node in nodes
+                      if node['Node Type'] == 'Seq Scan' and 'Relation Name' in node})
+    sizes = {}
+    if scanned:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(RELTUPLES_SQL, (scanned,))
+                for row in cursor.fetchall():
+                    values = list(row.values()) if isinstance(row, dict) else row
+                    sizes[values[0]] = values[1]
+        finally:
+            conn.rollback()
+
+    return {
+        'total_cost': plan['Total Cost'],
+        'node_types': dict(sorted(node_types.items())),
+        'seq_scans': [table for table in scanned if sizes.get(table, 0) >= large_table_rows],
+    }
+
+
+def check_environment(target, env, connect, queries, large_table_rows):
+    """{query_id: summary or {'error': ...}} for the queries on one target/environment"""
+    try:
+        conn = connect()
+    except Exception as e:
+        print(f"  ✗ {target}/{env}: not reachable ({str(e).strip().splitlines()[0]})")
+        return None
+    results = {}
+    try:
+        for query_id, entry in queries.items():
+            try:
+                results[query_id] = summarize(conn, explain(conn, entry), large_table_rows)
+            except Exception as e:
+                results[query_id] = {'error': str(e).strip().splitlines()[0]}
+    finally:
+        conn.close()
+    return results
+
+
+def collect(envs, large_table_rows):
+    """{'<target>/<env>': {query_id: summary}} for every reachable environment"""
+    by_target = {}
+    for query_id, entry in executable_queries().items():
+        by_target.setdefault(entry['target'], {})[query_id] = entry
+
+    plans = {}
+    for target, queries in sorted(by_target.items()):
+        for env, connect in configured_environments(target).items():
+            if envs and env not in envs:
+                continue
+            print(f"Planning {len(queries)} {target} queries in {env}...")
+            results = check_environment(target, env, connect, queries, large_table_rows)
+            if results is not None:
+                plans[f"{target}/{env}"] = results
+    return plans
+
+
+def compare(plans, baseline, max_regression):
+    """(regressions, notes) as printable lines"""
+    regressions, notes = [], []
+    for key, results in sorted(plans.items()):
+        known = baseline.get(key, {})
+        for query_id, current in sorted(results.items()):
+            label = f"{key} {query_id}"
+            previous = known.get(query_id)
+            if 'error' in current:
+                if previous is not None and 'error' in previous:
+                    notes.append(f"{label}: still does not plan: {current['error']}")
+                else:
+                    regressions.append(f"{label}: does not plan: {current['error']}")
+                continue
+            if previous is None or 'error' in previous:
+                notes.append(f"{label}: no baseline (cost {current['total_cost']:.1f})")
+                continue
+            before, after = previous['total_cost'], current['total_cost']
+            if after > before * (1 + max_regression) and after - before > 1:
+                regressions.append(f"{label}: cost {before:.1f} → {after:.1f} (+{(after / max(before, 0.01) - 1) * 100:.0f}%)")
+            new_scans = sorted(set(current['seq_scans']) - set(previous['seq_scans']))
+            if new_scans:
+                regressions.append(f"{label}: new seq scan on {', '.join(new_scans)}")
+            if current['node_types'] != previous['node_types']:
+                added = sorted(set(current['node_types']) - set(previous['node_types']))
+                removed = sorted(set(previous['node_types']) - set(current['node_types']))
+                if added or removed:
+                    notes.append(f"{label}: plan shape changed (+{', '.join(added) or '-'} / -{', '.join(removed) or '-'})")
+    return regressions, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check SQL_QUERIES plans against a baseline')
+    parser.add_argument('--env', help='Comma-separated environments (default: all configured)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write current plans as the baseline')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                        help='Allowed cost growth as a fraction of the baseline (default 0.5)')
+    parser.add_argument('--large-table', type=int, default=DEFAULT_LARGE_TABLE_ROWS,
+                        help='Row count from which a seq scan is flagged (default 10000)')
+    args = parser.parse_args()
+
+    envs = set(args.env.split(',')) if args.env else None
+    plans = collect(envs, args.large_table)
+    if not plans:
+        print("\n✗ No environment reachable. Check database credentials.")
+        sys.exit(1)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f).get('plans', {})
+        baseline.update(plans)
+        with open(args.baseline, 'w') as f:
+            json.dump({'updated_at': datetime.now().isoformat(timespec='seconds'), 'plans': baseline},
+                      f, indent=2, sort_keys=True, default=lambda v: v.isoformat() if isinstance(v, date) else str(v))
+        errors = sum(1 for results in plans.values() for r in results.values() if 'error' in r)
+        print(f"\n✓ Baseline written to {args.baseline} ({len(plans)} environments, {errors} queries not planning)")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n✗ No baseline at {args.baseline}; run with --update-baseline first")
+        sys.exit(1)
+    with open(args.baseline) as f:
+        baseline = json.load(f)['plans']
+
+    regressions, notes = compare(plans, baseline, args.max_regression)
+    print()
+    for line in notes:
+        print(f"  • {line}")
+    for line in regressions:
+        print(f"  ✗ {line}")
+    checked = sum(len(results) for results in plans.values())
+    if regressions:
+        print(f"\n✗ {len(regressions)} plan regressions in {checked} query plans")
+        sys.exit(1)
+    print(f"\n✓ {checked} query plans within {args.max_regression:.0%} of baseline")
+
+
+if __name__ == '__main__':
+    main()
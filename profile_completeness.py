@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Profile Completeness Builder
+Maintains aggregates.profile_completeness: one row per live person with their
+experience/education/language/embedding counts, completeness score and status
+
+Backs /api/profile/completion-rate and /api/new-users/daily, which used to
+run four correlated COUNT(*) subqueries per person against the source DB.
+The score is the one those routes computed: one point each for a headline
+(over 10 characters), LinkedIn URL, location, company, and at least one
+experience, education and language entry.
+
+Incremental runs only recount persons whose row or child rows changed in
+staging since the last build (see etl_sync.changed_persons); persons deleted
+since are removed.
+
+Usage:
+    python profile_completeness.py             # Incremental (full on first run)
+    python profile_completeness.py --rebuild   # Recount every person
+"""
+
+import argparse
+import time
+
+from db_config import get_analytics_db_connection
+from etl_sync import changed_persons, get_builder_watermark, require_staging, set_builder_watermark
+
+BUILDER = 'profile_completeness'
+
+CHANGE_SOURCES = {
+    'chemlink_persons': 'id',
+    'chemlink_experiences': 'person_id',
+    'chemlink_education': 'person_id',
+    'chemlink_person_languages': 'person_id',
+    'chemlink_embeddings': 'person_id',
+}
+
+CREATE_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+    CREATE TABLE IF NOT EXISTS aggregates.profile_completeness (
+        person_id BIGINT PRIMARY KEY,
+        full_name TEXT,
+        email TEXT,
+        has_finder BOOLEAN,
+        created_at TIMESTAMP,
+        has_headline BOOLEAN NOT NULL,
+        has_linkedin BOOLEAN NOT NULL,
+        has_location BOOLEAN NOT NULL,
+        has_company BOOLEAN NOT NULL,
+        experience_count INTEGER NOT NULL,
+        education_count INTEGER NOT NULL,
+        language_count INTEGER NOT NULL,
+        embedding_count INTEGER NOT NULL,
+        completeness_score SMALLINT NOT NULL,
+        profile_status TEXT NOT NULL,
+        computed_at TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    CREATE INDEX IF NOT EXISTS profile_completeness_score_idx
+        ON aggregates.profile_completeness (completeness_score DESC, embedding_count DESC, person_id);
+    CREATE INDEX IF NOT EXISTS profile_completeness_created_idx
+        ON aggregates.profile_completeness (created_at);
+
+    -- Incremental runs count child rows for a handful of persons at a time
+    CREATE INDEX IF NOT EXISTS chemlink_experiences_person_id_idx ON staging.chemlink_experiences (person_id);
+    CREATE INDEX IF NOT EXISTS chemlink_education_person_id_idx ON staging.chemlink_education (person_id);
+    CREATE INDEX IF NOT EXISTS chemlink_person_languages_person_id_idx ON staging.chemlink_person_languages (person_id);
+    CREATE INDEX IF NOT EXISTS chemlink_embeddings_person_id_idx ON staging.chemlink_embeddings (person_id);
+"""
+
+# %(ids)s is NULL for a full build. Each child table is counted once with
+# GROUP BY rather than probed per person.
+UPSERT_SQL = """
+    WITH people AS (
+        SELECT *
+        FROM staging.chemlink_persons
+        WHERE deleted_at IS NULL
+          AND (%(ids)s::bigint[] IS NULL OR id = ANY(%(ids)s::bigint[]))
+    ),
+    experience_counts AS (
+        SELECT person_id, COUNT(*) AS n FROM staging.chemlink_experiences
+        WHERE deleted_at IS NULL AND person_id IN (SELECT id FROM people)
+        GROUP BY person_id
+    ),
+    education_counts AS (
+        SELECT person_id, COUNT(*) AS n FROM staging.chemlink_education
+        WHERE deleted_at IS NULL AND person_id IN (SELECT id FROM people)
+        GROUP BY person_id
+    ),
+    language_counts AS (
+        SELECT person_id, COUNT(*) AS n FROM staging.chemlink_person_languages
+        WHERE deleted_at IS NULL AND person_id IN (SELECT id FROM people)
+        GROUP BY person_id
+    ),
+    embedding_counts AS (
+        SELECT person_id, COUNT(*) AS n FROM staging.chemlink_embeddings
+        WHERE deleted_at IS NULL AND person_id IN (SELECT id FROM people)
+        GROUP BY person_id
+    ),
+    counted AS (
+        SELECT
+            p.id AS person_id,
+            p.first_name || ' ' || p.last_name AS full_name,
+            p.email,
+            p.has_finder,
+            p.created_at,
+            COALESCE(p.headline_description IS NOT NULL AND LENGTH(p.headline_description) > 10, FALSE)
+                AS has_headline,
+            p.linked_in_url IS NOT NULL AS has_linkedin,
+            p.location_id IS NOT NULL AS has_location,
+            p.company_id IS NOT NULL AS has_company,
+            COALESCE(ex.n, 0) AS experience_count,
+            COALESCE(ed.n, 0) AS education_count,
+            COALESCE(la.n, 0) AS language_count,
+            COALESCE(em.n, 0) AS embedding_count
+        FROM people p
+        LEFT JOIN experience_counts ex ON ex.person_id = p.id
+        LEFT JOIN education_counts ed ON ed.person_id = p.id
+        LEFT JOIN language_counts la ON la.person_id = p.id
+        LEFT JOIN embedding_counts em ON em.person_id = p.id
+    )
+    INSERT INTO aggregates.profile_completeness (
+        person_id, full_name, email, has_finder, created_at,
+        has_headline, has_linkedin, has_location, has_company,
+        experience_count, education_count, language_count, embedding_count,
+        completeness_score, profile_status, computed_at
+    )
+    SELECT
+        person_id, full_name, email, has_finder, created_at,
+        has_headline, has_linkedin, has_location, has_company,
+        experience_count, education_count, language_count, embedding_count,
+        has_headline::int + has_linkedin::int + has_location::int + has_company::int +
+            (experience_count > 0)::int + (education_count > 0)::int + (language_count > 0)::int,
+        CASE
+            WHEN embedding_count > 0 THEN 'FINDER_ENABLED'
+            WHEN experience_count > 0 OR education_count > 0 THEN 'BUILDER_ONLY'
+            ELSE 'BASIC_PROFILE'
+        END,
+        NOW()
+    FROM counted
+    ON CONFLICT (person_id) DO UPDATE SET
+        full_name = EXCLUDED.full_name,
+        email = EXCLUDED.email,
+        has_finder = EXCLUDED.has_finder,
+        created_at = EXCLUDED.created_at,
+        has_headline = EXCLUDED.has_headline,
+        has_linkedin = EXCLUDED.has_linkedin,
+        has_location = EXCLUDED.has_location,
+        has_company = EXCLUDED.has_company,
+        experience_count = EXCLUDED.experience_count,
+        education_count = EXCLUDED.education_count,
+        language_count = EXCLUDED.language_count,
+        embedding_count = EXCLUDED.embedding_count,
+        completeness_score = EXCLUDED.completeness_score,
+        profile_status = EXCLUDED.profile_status,
+        computed_at = EXCLUDED.computed_at;
+"""
+
+DELETE_GONE_SQL = """
+    DELETE FROM aggregates.profile_completeness pc
+    WHERE pc.person_id = ANY(%(ids)s::bigint[])
+      AND NOT EXISTS (
+          SELECT 1 FROM staging.chemlink_persons p
+          WHERE p.id = pc.person_id AND p.deleted_at IS NULL
+      );
+"""
+
+
+def build(rebuild=False):
+    """Bring aggregates.profile_completeness up to date (full when `rebuild` or first run)"""
+    started = time.time()
+    conn = get_analytics_db_connection()
+    try:
+        require_staging(conn)
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_TABLE_SQL)
+
+        since = None if rebuild else get_builder_watermark(conn, BUILDER)
+        changed, watermark = changed_persons(conn, CHANGE_SOURCES, since)
+
+        with conn.cursor() as cursor:
+            if since is None:
+                cursor.execute("TRUNCATE aggregates.profile_completeness;")
+                cursor.execute(UPSERT_SQL, {'ids': None})
+                written = cursor.rowcount
+                removed = 0
+            elif not changed:
+                print("✓ No profile changes since last build")
+                conn.commit()
+                return
+            else:
+                ids = sorted(changed)
+                cursor.execute(DELETE_GONE_SQL, {'ids': ids})
+                removed = cursor.rowcount
+                cursor.execute(UPSERT_SQL, {'ids': ids})
+                written = cursor.rowcount
+
+        set_builder_watermark(conn, BUILDER, watermark)
+        conn.commit()
+        mode = 'Rebuilt' if since is None else f"Updated ({len(changed)} changed persons)"
+        print(f"✓ {mode}: {written} profiles written, {removed} removed "
+              f"in {time.time() - started:.2f}s")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain aggregates.profile_completeness')
+    parser.add_argument('--rebuild', action='store_true', help='Recount every person')
+    args = parser.parse_args()
+    build(rebuild=args.rebuild)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+In-process TTL cache for query results
+
+Entries expire individually, so callers can keep results for closed time
+windows much longer than for windows that still include the current bucket.
+The least recently stored entry is evicted once maxsize is reached.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 512
+
+
+class TTLCache:
+    """Thread-safe mapping of key -> value with a per-entry time to live"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(True, value) for a live entry, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+query_cache = TTLCache()
@@ -0,0 +1,295 @@
+"""
+Registry-driven query execution
+
+SQL_QUERIES (sql_queries.py) is the single source of the dashboard SQL. An
+entry with a `target` is executable:
+
+    target        chemlink | engagement | kratos | analytics
+    params        names of the %(name)s placeholders, in PREPARE order
+    cache_ttl     seconds to cache results (0 disables caching)
+    source_tables relations the query reads
+    window        optional default time window ({'granularity', 'buckets',
+                  'allowed'}); fills window_start/window_end/granularity and
+                  previous_start from ?from=&to=&granularity=
+
+Connections are pooled per target and APP_ENV, in autocommit mode so they
+never sit idle in a transaction. Each entry is PREPAREd once per pooled
+connection and then run with EXECUTE, so repeat requests skip parsing and
+planning. Pools remember the process that opened them; after a fork the
+child drops the inherited connections instead of sharing the parent's
+sockets.
+"""
+
+import os
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import RealDictCursor
+
+from db_config import (
+    get_analytics_db_connection,
+    get_chemlink_env_connection,
+    get_engagement_db_connection,
+    get_kratos_db_connection,
+)
+from metrics import observe_cache, observe_query, timed_connect
+from query_cache import query_cache
+from slow_query_log import slow_query_log
+from sql_queries import SQL_QUERIES
+from time_windows import CLOSED_WINDOW_TTL, cache_ttl, parse_window, shift
+
+TARGETS = {
+    'chemlink': get_chemlink_env_connection,
+    'engagement': get_engagement_db_connection,
+    'kratos': get_kratos_db_connection,
+    'analytics': get_analytics_db_connection,
+}
+
+MAX_IDLE = 4  # idle connections kept per pool
+
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+_env_mtime = None
+
+PLACEHOLDER = re.compile(r'%\((\w+)\)s')
+
+
+class QueryError(ValueError):
+    """Unknown or non-executable query id, or missing parameters"""
+
+
+def current_env():
+    """APP_ENV as db_config sees it (.env is re-read when it changes, so switch_env.sh applies live)"""
+    global _env_mtime
+    try:
+        mtime = os.stat(ENV_FILE).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime != _env_mtime:
+        if mtime is not None:
+            load_dotenv(ENV_FILE, override=True)
+        _env_mtime = mtime
+    return os.getenv('APP_ENV', 'uat').lower()
+
+
+class ConnectionPool:
+    """Idle connections for one target/environment plus the statements prepared on each"""
+
+    def __init__(self, factory, max_idle=MAX_IDLE):
+        self.factory = factory
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self._idle = []
+        self._prepared = {}  # id(connection) -> set of statement names
+
+    def _check_pid(self):
+        # Inherited connections share the parent's sockets; forget them
+        # without closing (closing would end the parent's sessions)
+        if self.pid != os.getpid():
+            with self._lock:
+                if self.pid != os.getpid():
+                    self._reset()
+
+    def acquire(self):
+        self._check_pid()
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed:
+                    return conn
+                self._prepared.pop(id(conn), None)
+        conn = self.factory()
+        conn.autocommit = True
+        with self._lock:
+            self._prepared[id(conn)] = set()
+        return conn
+
+    def release(self, conn, discard=False):
+        with self._lock:
+            if discard or conn.closed or len(self._idle) >= self.max_idle or self.pid != os.getpid():
+                self._prepared.pop(id(conn), None)
+                keep = False
+            else:
+                self._idle.append(conn)
+                keep = True
+        if not keep and not conn.closed:
+            conn.close()
+
+    def is_prepared(self, conn, name):
+        return name in self._prepared.get(id(conn), ())
+
+    def mark_prepared(self, conn, name):
+        with self._lock:
+            self._prepared.setdefault(id(conn), set()).add(name)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle, self._prepared = self._idle, [], {}
+        for conn in idle:
+            if not conn.closed:
+                conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(target):
+    key = (target, current_env())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(TARGETS[target])
+        return _pools[key]
+
+
+def reset_pools():
+    """Drop every pool (call in a freshly forked worker before first use)"""
+    with _pools_lock:
+        _pools.clear()
+
+
+def warm_pools(targets=None):
+    """Open one pooled connection per target; {target: error message} for those that failed"""
+    failed = {}
+    for target in targets or TARGETS:
+        pool = pool_for(target)
+        try:
+            conn = timed_connect(target, pool.acquire)
+        except Exception as e:
+            failed[target] = str(e).strip().splitlines()[0]
+            continue
+        pool.release(conn)
+    return failed
+
+
+def registered(query_id):
+    entry = SQL_QUERIES.get(query_id)
+    if entry is None:
+        raise QueryError(f"Unknown query: {query_id}")
+    if not entry.get('target'):
+        raise QueryError(f"Query {query_id} is documentation only (its route runs several queries)")
+    return entry
+
+
+def statement(query_id, entry):
+    """(statement name, PREPARE body with $n placeholders)"""
+    order = {name: i + 1 for i, name in enumerate(entry.get('params', []))}
+    undeclared = set(PLACEHOLDER.findall(entry['query'])) - set(order)
+    if undeclared:
+        raise QueryError(f"Query {query_id} uses undeclared params: {', '.join(sorted(undeclared))}")
+    body = PLACEHOLDER.sub(lambda m: f"${order[m.group(1)]}", entry['query']).rstrip().rstrip(';')
+    # The hash keeps an edited query from reusing a stale prepared statement
+    return f"q_{query_id}_{zlib.crc32(body.encode()):08x}", body
+
+
+def execute(query_id, params=None):
+    """Run a registered query on a pooled connection; returns rows as dicts (uncached)"""
+    entry = registered(query_id)
+    params = params or {}
+    missing = [name for name in entry.get('params', []) if name not in params]
+    if missing:
+        raise QueryError(f"Query {query_id} needs params: {', '.join(missing)}")
+    values = [params[name] for name in entry.get('params', [])]
+    name, body = statement(query_id, entry)
+    pool = pool_for(entry['target'])
+
+    for attempt in range(2):
+        conn = timed_connect(entry['target'], pool.acquire)
+        started = time.perf_counter()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                if not pool.is_prepared(conn, name):
+                    cursor.execute(f"PREPARE {name} AS {body}")
+                    pool.mark_prepared(conn, name)
+                if values:
+                    cursor.execute(f"EXECUTE {name}({', '.join(['%s'] * len(values))})", values)
+                else:
+                    cursor.execute(f"EXECUTE {name}")
+                rows = cursor.fetchall()
+        except psycopg2.extensions.QueryCanceledError:
+            # Statement timeout: the database is already struggling, don't run it again
+            pool.release(conn)
+            observe_query(query_id, entry['target'], time.perf_counter() - started)
+            raise
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Dropped connection: retry once on a fresh one
+            pool.release(conn, discard=True)
+            if attempt:
+                observe_query(query_id, entry['target'], time.perf_counter() - started)
+                raise
+            continue
+        except Exception:
+            pool.release(conn)
+            observe_query(query_id, entry['target'], time.perf_counter() - started)
+            raise
+        pool.release(conn)
+        elapsed = time.perf_counter() - started
+        observe_query(query_id, entry['target'], elapsed, len(rows))
+        slow_query_log.check(query_id, entry['target'], entry['query'], params, elapsed)
+        break
+
+    if entry['target'] == 'analytics':
+        # Same rendering as app.execute_analytics_query
+        for row in rows:
+            for key, value in row.items():
+                if isinstance(value, datetime):
+                    row[key] = value.isoformat()
+    return rows
+
+
+def window_params(entry, args):
+    """Window placeholders for an entry with a default window, from request args"""
+    spec = entry['window']
+    window = parse_window(
+        args, spec['granularity'], spec['buckets'],
+        allowed=spec.get('allowed', ('hour', 'day', 'week', 'month')),
+    )
+    params = {
+        'granularity': window.granularity,
+        'window_start': window.start,
+        'window_end': window.end,
+        'previous_start': shift(window.start, window.granularity, -1),
+    }
+    if window.granularity == 'day' and spec.get('dates'):
+        params = {key: value.date() if isinstance(value, datetime) else value for key, value in params.items()}
+    return params, window
+
+
+def run(query_id, args=None, params=None):
+    """
+    Run a registered query with caching. `args` (request args) supply the
+    window for windowed entries; `params` supply everything else.
+    """
+    entry = registered(query_id)
+    params = dict(params or {})
+    ttl = entry.get('cache_ttl', 0)
+    if entry.get('window'):
+        window_values, window = window_params(entry, args or {})
+        params.update(window_values)
+        if ttl and cache_ttl(window) == CLOSED_WINDOW_TTL:
+            ttl = max(ttl, CLOSED_WINDOW_TTL)
+    used = {name: params[name] for name in entry.get('params', []) if name in params}
+    if not ttl:
+        return execute(query_id, used)
+    key = (query_id, current_env(), tuple(sorted((k, repr(v)) for k, v in used.items())))
+    hit, rows = query_cache.get(key)
+    observe_cache(query_id, hit)
+    if not hit:
+        rows = execute(query_id, used)
+        query_cache.set(key, rows, ttl)
+    return rows
+
+
+def timed(query_id, params=None):
+    """(rows, seconds) for one uncached execution, for benchmarks keyed by query id"""
+    started = time.perf_counter()
+    rows = execute(query_id, params)
+    return rows, time.perf_counter() - started
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Connection Recommendations Builder
+Populates aggregates.connection_recommendations ("People You Should Know")
+from the staging layer, without Neo4j
+
+Experiences and education are loaded once into sparse user×company,
+user×role and user×school incidence matrices. For a block of users at a time,
+A[block]·Aᵀ gives the shared companies/roles/schools with every other user;
+the three products are combined into a weighted score and only the top K
+candidates per user are kept and bulk-written.
+
+Incremental runs only recompute users whose experiences or education changed
+since the last build, users who currently list one of them, and users who now
+share a company, role or school with one of them.
+
+Usage:
+    python recommendations.py                  # Incremental (full on first run)
+    python recommendations.py --full           # Recompute every user
+    python recommendations.py --top-k 25
+"""
+
+import argparse
+import time
+
+import numpy as np
+from psycopg2.extras import execute_values
+from scipy import sparse
+
+from db_config import get_analytics_db_connection
+from etl_sync import changed_persons, get_builder_watermark, require_staging, set_builder_watermark
+
+BUILDER = 'connection_recommendations'
+TOP_K = 50
+BLOCK_SIZE = 2000  # users per sparse product; bounds memory for popular companies
+
+# Shared companies say more about a professional connection than shared role titles
+WEIGHTS = {'companies': 3.0, 'schools': 2.0, 'roles': 1.0}
+
+CHANGE_SOURCES = {
+    'chemlink_experiences': 'person_id',
+    'chemlink_education': 'person_id',
+    'chemlink_persons': 'id',
+}
+
+INCIDENCE_QUERIES = {
+    'companies': """
+        SELECT DISTINCT e.person_id, e.company_id AS item_id
+        FROM staging.chemlink_experiences e
+        JOIN staging.chemlink_persons p ON p.id = e.person_id AND p.deleted_at IS NULL
+        WHERE e.deleted_at IS NULL AND e.company_id IS NOT NULL;
+    """,
+    'roles': """
+        SELECT DISTINCT e.person_id, e.role_id AS item_id
+        FROM staging.chemlink_experiences e
+        JOIN staging.chemlink_persons p ON p.id = e.person_id AND p.deleted_at IS NULL
+        WHERE e.deleted_at IS NULL AND e.role_id IS NOT NULL;
+    """,
+    'schools': """
+        SELECT DISTINCT ed.person_id, ed.school_id AS item_id
+        FROM staging.chemlink_education ed
+        JOIN staging.chemlink_persons p ON p.id = ed.person_id AND p.deleted_at IS NULL
+        WHERE ed.deleted_at IS NULL AND ed.school_id IS NOT NULL;
+    """,
+}
+
+CREATE_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+    CREATE TABLE IF NOT EXISTS aggregates.connection_recommendations (
+        user_id BIGINT NOT NULL,
+        recommended_user_id BIGINT NOT NULL,
+        recommendation_score NUMERIC(10, 2) NOT NULL,
+        common_companies INTEGER NOT NULL DEFAULT 0,
+        common_roles INTEGER NOT NULL DEFAULT 0,
+        common_schools INTEGER NOT NULL DEFAULT 0,
+        recommendation_reason TEXT,
+        computed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (user_id, recommended_user_id)
+    );
+    CREATE INDEX IF NOT EXISTS connection_recommendations_user_score_idx
+        ON aggregates.connection_recommendations (user_id, recommendation_score DESC);
+    CREATE INDEX IF NOT EXISTS connection_recommendations_score_idx
+        ON aggregates.connection_recommendations (recommendation_score DESC);
+    CREATE INDEX IF NOT EXISTS connection_recommendations_recommended_idx
+        ON aggregates.connection_recommendations (recommended_user_id);
+"""
+
+
+def load_incidence(conn):
+    """
+    Build binary CSR incidence matrices over a shared user axis.
+
+    Returns (user_ids, {'companies': M, 'roles': M, 'schools': M}) where
+    user_ids is sorted and row i of every matrix belongs to user_ids[i].
+    """
+    pairs = {}
+    with conn.cursor() as cursor:
+        for name, query in INCIDENCE_QUERIES.items():
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            pairs[name] = (
+                np.array([row['person_id'] for row in rows], dtype=np.int64),
+                np.array([row['item_id'] for row in rows], dtype=np.int64),
+            )
+
+    user_ids = np.unique(np.concatenate([persons for persons, _ in pairs.values()]))
+    matrices = {}
+    for name, (persons, items) in pairs.items():
+        item_ids, cols = np.unique(items, return_inverse=True)
+        rows = np.searchsorted(user_ids, persons)
+        matrices[name] = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(user_ids), len(item_ids)),
+        )
+    return user_ids, matrices
+
+
+def rows_for(user_ids, ids):
+    """Row indexes of the given person ids, skipping ids without a row"""
+    rows = np.searchsorted(user_ids, ids)
+    present = rows < len(user_ids)
+    present[present] = user_ids[rows[present]] == ids[present]
+    return rows[present]
+
+
+def neighbours(matrices, rows):
+    """Row indexes of every user sharing at least one item with the given rows"""
+    found = np.zeros(0, dtype=np.int64)
+    for matrix in matrices.values():
+        held = np.zeros(matrix.shape[1], dtype=np.int32)
+        held[matrix[rows].indices] = 1
+        found = np.union1d(found, np.flatnonzero(matrix @ held))
+    return found
+
+
+def reason(companies, roles, schools):
+    parts = []
+    if companies:
+        parts.append(f"{companies} shared compan{'y' if companies == 1 else 'ies'}")
+    if schools:
+        parts.append(f"{schools} shared school{'' if schools == 1 else 's'}")
+    if roles:
+        parts.append(f"{roles} shared role{'' if roles == 1 else 's'}")
+    return ', '.join(parts)
+
+
+def score_block(user_ids, matrices, block, top_k):
+    """
+    Score users `block` (row indexes) against everyone and keep the top K each.
+
+    Returns parallel arrays (user, candidate, score, companies, roles, schools).
+    """
+    n_users = len(user_ids)
+    keys, which, counts = [], [], []
+    for position, (name, matrix) in enumerate(matrices.items()):
+        product = (matrix[block] @ matrix.T).tocoo()
+        keys.append(product.row.astype(np.int64) * n_users + product.col)
+        which.append(np.full(product.nnz, position, dtype=np.int8))
+        counts.append(product.data)
+    keys = np.concatenate(keys)
+    which = np.concatenate(which)
+    counts = np.concatenate(counts)
+
+    # Merge the three products into one entry per (user, candidate) pair
+    pair_keys, inverse = np.unique(keys, return_inverse=True)
+    per_matrix = {
+        name: np.bincount(inverse[which == position], weights=counts[which == position],
+                          minlength=len(pair_keys)).astype(np.int64)
+        for position, name in enumerate(matrices)
+    }
+    block_row = pair_keys // n_users
+    candidate = pair_keys % n_users
+    score = sum(WEIGHTS[name] * per_matrix[name] for name in matrices)
+
+    not_self = candidate != block[block_row]
+    block_row, candidate, score = block_row[not_self], candidate[not_self], score[not_self]
+    per_matrix = {name: values[not_self] for name, values in per_matrix.items()}
+
+    # Top K per user: order by (user, score desc, candidate id) and keep each
+    # user's first K entries
+    order = np.lexsort((user_ids[candidate], -score, block_row))
+    sorted_rows = block_row[order]
+    first = np.searchsorted(sorted_rows, sorted_rows, side='left')
+    keep = order[np.arange(len(order)) - first < top_k]
+
+    return (
+        user_ids[block[block_row[keep]]],
+        user_ids[candidate[keep]],
+        score[keep],
+        per_matrix['companies'][keep],
+        per_matrix['roles'][keep],
+        per_matrix['schools'][keep],
+    )
+
+
+def write_block(cursor, result):
+    users, candidates, scores, companies, roles, schools = result
+    rows = [
+        (int(u), int(c), round(float(s), 2), int(co), int(r), int(sc), reason(co, r, sc))
+        for u, c, s, co, r, sc in zip(users, candidates, scores, companies, roles, schools)
+    ]
+    execute_values(
+        cursor,
+        """
+        INSERT INTO aggregates.connection_recommendations
+            (user_id, recommended_user_id, recommendation_score,
+             common_companies, common_roles, common_schools, recommendation_reason)
+        VALUES %s
+        """,
+        rows,
+        page_size=5000,
+    )
+    return len(rows)
+
+
+def build(full=False, top_k=TOP_K, block_size=BLOCK_SIZE):
+    """Recompute connection recommendations (incrementally unless `full` or first run)"""
+    started = time.time()
+    conn = get_analytics_db_connection()
+    try:
+        require_staging(conn)
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_TABLE_SQL)
+
+        since = None if full else get_builder_watermark(conn, BUILDER)
+        changed, watermark = changed_persons(conn, CHANGE_SOURCES, since)
+        if since is not None and not changed:
+            print("✓ No profile changes since last build")
+            conn.commit()
+            return
+
+        user_ids, matrices = load_incidence(conn)
+        print(f"✓ Loaded {len(user_ids)} users: " + ', '.join(
+            f"{m.shape[1]} {name} ({m.nnz} links)" for name, m in matrices.items()
+        ))
+
+        with conn.cursor() as cursor:
+            if since is None:
+                cursor.execute("TRUNCATE aggregates.connection_recommendations;")
+                targets = np.arange(len(user_ids))
+            else:
+                changed_ids = np.array(sorted(changed), dtype=np.int64)
+                cursor.execute(
+                    "SELECT DISTINCT user_id FROM aggregates.connection_recommendations "
+                    "WHERE recommended_user_id = ANY(%s);",
+                    (changed_ids.tolist(),),
+                )
+                listing = np.array([row['user_id'] for row in cursor.fetchall()], dtype=np.int64)
+                affected = np.union1d(changed_ids, listing)
+                affected = np.union1d(
+                    affected, user_ids[neighbours(matrices, rows_for(user_ids, changed_ids))]
+                )
+                cursor.execute(
+                    "DELETE FROM aggregates.connection_recommendations WHERE user_id = ANY(%s);",
+                    (affected.tolist(),),
+                )
+                targets = rows_for(user_ids, affected)
+                print(f"✓ {len(changed)} changed users → recomputing {len(targets)} users")
+
+            written = 0
+            for start in range(0, len(targets), block_size):
+                block = targets[start:start + block_size]
+                written += write_block(cursor, score_block(user_ids, matrices, block, top_k))
+
+        set_builder_watermark(conn, BUILDER, watermark)
+        conn.commit()
+        print(f"✓ Wrote {written} recommendations for {len(targets)} users "
+              f"in {time.time() - started:.2f}s")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build aggregates.connection_recommendations')
+    parser.add_argument('--full', action='store_true', help='Recompute every user')
+    parser.add_argument('--top-k', type=int, default=TOP_K,
+                        help=f'Recommendations kept per user (default: {TOP_K})')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help=f'Users scored per sparse product (default: {BLOCK_SIZE})')
+    args = parser.parse_args()
+    build(full=args.full, top_k=args.top_k, block_size=args.block_size)
+
+
+if __name__ == '__main__':
+    main()
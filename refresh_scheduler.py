@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Aggregate Refresh Scheduler
+Refreshes the aggregates.* relations behind /v2/api in dependency order
+
+AGGREGATE_DAG declares every aggregate relation, the relations it reads from
+and the aggregates it depends on. Independent branches run in parallel; each
+node is refreshed as soon as its dependencies finish:
+
+  - materialized views use REFRESH MATERIALIZED VIEW CONCURRENTLY when they
+    have a usable unique index (readers are never blocked), plain REFRESH
+    otherwise
+  - tables with a Python builder run that builder
+  - tables maintained elsewhere (etl_sync.py) are left alone
+
+Every run is recorded in aggregates.refresh_log with its duration, row count
+and an input fingerprint. A node is skipped when none of its inputs changed
+since its last successful refresh.
+
+Usage:
+    python refresh_scheduler.py                          # Refresh whatever changed
+    python refresh_scheduler.py --force                  # Refresh everything
+    python refresh_scheduler.py --only aggregates.monthly_metrics
+    python refresh_scheduler.py --dry-run                # Show the plan only
+"""
+
+import argparse
+import hashlib
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+from db_config import get_analytics_db_connection
+
+ACTIVITY_INPUTS = [
+    'staging.chemlink_view_access',
+    'staging.chemlink_query_votes',
+    'staging.chemlink_collections',
+    'staging.chemlink_persons',
+    'staging.engagement_posts',
+    'staging.engagement_comments',
+    'staging.engagement_persons',
+]
+
+PROFILE_INPUTS = [
+    'staging.chemlink_persons',
+    'staging.chemlink_experiences',
+    'staging.chemlink_education',
+]
+
+# relation -> inputs (any relation read), depends_on (aggregates refreshed first),
+# builder ("module:function" for tables built in Python, optional)
+AGGREGATE_DAG = {
+    'aggregates.daily_metrics': {
+        'inputs': ACTIVITY_INPUTS,
+        'depends_on': [],
+    },
+    'aggregates.monthly_metrics': {
+        'inputs': ACTIVITY_INPUTS + ['aggregates.daily_metrics'],
+        'depends_on': ['aggregates.daily_metrics'],
+    },
+    'aggregates.user_engagement_levels': {
+        'inputs': ACTIVITY_INPUTS,
+        'depends_on': ['aggregates.daily_metrics'],
+    },
+    'aggregates.cohort_retention': {
+        'inputs': ACTIVITY_INPUTS,
+        'depends_on': [],
+        'builder': 'retention:build',
+    },
+    'aggregates.connection_recommendations': {
+        'inputs': PROFILE_INPUTS,
+        'depends_on': [],
+        'builder': 'recommendations:build',
+    },
+    'aggregates.company_network_map': {
+        'inputs': PROFILE_INPUTS + ['staging.chemlink_companies'],
+        'depends_on': [],
+        'builder': 'company_network:build',
+    },
+    'aggregates.skills_matching_scores': {
+        'inputs': PROFILE_INPUTS + ['staging.chemlink_roles'],
+        'depends_on': [],
+        'builder': 'skills_matching:build',
+    },
+    'aggregates.career_path_patterns': {
+        'inputs': PROFILE_INPUTS + ['staging.chemlink_roles'],
+        'depends_on': [],
+        'builder': 'career_paths:build',
+    },
+    'aggregates.profile_completeness': {
+        'inputs': PROFILE_INPUTS + ['staging.chemlink_person_languages', 'staging.chemlink_embeddings'],
+        'depends_on': [],
+        'builder': 'profile_completeness:build',
+    },
+    'aggregates.location_based_networks': {
+        'inputs': PROFILE_INPUTS,
+        'depends_on': [],
+    },
+    'aggregates.alumni_networks': {
+        'inputs': PROFILE_INPUTS,
+        'depends_on': [],
+    },
+    'aggregates.project_collaboration_graph': {
+        'inputs': PROFILE_INPUTS,
+        'depends_on': [],
+    },
+}
+
+REFRESH_LOG_SQL = """
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+    CREATE TABLE IF NOT EXISTS aggregates.refresh_log (
+        id BIGSERIAL PRIMARY KEY,
+        relation TEXT NOT NULL,
+        status TEXT NOT NULL,
+        method TEXT,
+        started_at TIMESTAMP NOT NULL,
+        duration_ms INTEGER,
+        row_count BIGINT,
+        input_fingerprint TEXT,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS refresh_log_relation_started_idx
+        ON aggregates.refresh_log (relation, started_at DESC);
+"""
+
+# relfilenode changes on TRUNCATE and non-concurrent REFRESH; the tuple
+# counters catch everything else (upserts, deletes, REFRESH CONCURRENTLY).
+# Partitioned tables have neither, so their leaf partitions are read instead.
+INPUT_STATE_QUERY = """
+    WITH roots AS (
+        SELECT unnest(%s::regclass[]) AS root
+    ),
+    members AS (
+        SELECT root, root AS relid FROM roots
+        UNION
+        SELECT r.root, t.relid
+        FROM roots r, pg_partition_tree(r.root) t
+        WHERE t.isleaf
+    )
+    SELECT
+        m.root::text AS relation,
+        c.oid::regclass::text AS member,
+        c.relfilenode,
+        COALESCE(s.n_tup_ins, 0) AS n_tup_ins,
+        COALESCE(s.n_tup_upd, 0) AS n_tup_upd,
+        COALESCE(s.n_tup_del, 0) AS n_tup_del
+    FROM members m
+    JOIN pg_class c ON c.oid = m.relid
+    LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid;
+"""
+
+RELATION_INFO_QUERY = """
+    SELECT
+        c.relkind,
+        COALESCE(m.ispopulated, true) AS ispopulated,
+        EXISTS (
+            SELECT 1 FROM pg_index i
+            WHERE i.indrelid = c.oid
+              AND i.indisunique AND i.indisvalid
+              AND i.indpred IS NULL AND i.indexprs IS NULL
+        ) AS has_unique_index
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_matviews m ON m.schemaname = n.nspname AND m.matviewname = c.relname
+    WHERE c.oid = to_regclass(%s);
+"""
+
+
+def topological_order(dag):
+    """Return relations with every dependency before its dependents"""
+    order, visiting, done = [], set(), set()
+
+    def visit(node):
+        if node in done:
+            return
+        if node in visiting:
+            raise ValueError(f"Cycle in AGGREGATE_DAG at {node}")
+        visiting.add(node)
+        for dep in dag[node]['depends_on']:
+            visit(dep)
+        visiting.discard(node)
+        done.add(node)
+        order.append(node)
+
+    for node in dag:
+        visit(node)
+    return order
+
+
+def input_fingerprint(conn, relations):
+    """Hash the current change counters of the given relations (missing ones are ignored)"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT r FROM unnest(%s::text[]) AS r WHERE to_regclass(r) IS NOT NULL;", (relations,))
+        existing = [row['r'] for row in cursor.fetchall()]
+        cursor.execute(INPUT_STATE_QUERY, (existing,))
+        state = sorted(
+            (row['relation'], row['member'], row['relfilenode'],
+             row['n_tup_ins'], row['n_tup_upd'], row['n_tup_del'])
+            for row in cursor.fetchall()
+        )
+    return hashlib.md5(repr(state).encode()).hexdigest()
+
+
+def last_fingerprint(conn, relation):
+    """Input fingerprint of the relation's last successful refresh"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT input_fingerprint FROM aggregates.refresh_log
+            WHERE relation = %s AND status = 'refreshed'
+            ORDER BY started_at DESC LIMIT 1;
+            """,
+            (relation,),
+        )
+        row = cursor.fetchone()
+    return row['input_fingerprint'] if row else None
+
+
+def refresh_method(conn, relation, node):
+    """Decide how a relation gets refreshed: concurrent/plain REFRESH, builder, or nothing"""
+    with conn.cursor() as cursor:
+        cursor.execute(RELATION_INFO_QUERY, (relation,))
+        info = cursor.fetchone()
+    if info and info['relkind'] == 'm':
+        # CONCURRENTLY needs a populated view and a plain unique index
+        if info['ispopulated'] and info['has_unique_index']:
+            return 'refresh_concurrently'
+        return 'refresh'
+    if node.get('builder'):
+        return 'builder'
+    return None
+
+
+def run_builder(path):
+    """Import and call a "module:function" builder"""
+    module_name, func_name = path.split(':')
+    getattr(importlib.import_module(module_name), func_name)()
+
+
+def log_refresh(conn, relation, status, method, started_at, duration_ms=None,
+                row_count=None, fingerprint=None, error=None):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO aggregates.refresh_log
+                (relation, status, method, started_at, duration_ms, row_count, input_fingerprint, error)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+            """,
+            (relation, status, method, started_at, duration_ms, row_count, fingerprint, error),
+        )
+    conn.commit()
+
+
+def refresh_node(relation, node, force=False, dry_run=False):
+    """
+    Refresh one relation in its own connection.
+
+    Returns a status: 'refreshed', 'unchanged', 'external' (no refresh method,
+    e.g. maintained by etl_sync.py), 'missing', 'pending' (dry run) or 'failed'.
+    """
+    conn = get_analytics_db_connection()
+    started_at = datetime.now()
+    started = time.time()
+    method = None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS present;", (relation,))
+            present = cursor.fetchone()['present']
+        method = refresh_method(conn, relation, node) if present else None
+        if not present and not node.get('builder'):
+            return 'missing'
+        if present and method is None:
+            return 'external'
+        method = method or 'builder'
+
+        fingerprint = input_fingerprint(conn, node['inputs'])
+        if not force and fingerprint == last_fingerprint(conn, relation):
+            return 'unchanged'
+        if dry_run:
+            print(f"  would {method.replace('_', ' ')} {relation}")
+            return 'pending'
+
+        if method == 'builder':
+            run_builder(node['builder'])
+        else:
+            # REFRESH ... CONCURRENTLY can't run inside a transaction block
+            conn.commit()
+            conn.autocommit = True
+            concurrently = 'CONCURRENTLY ' if method == 'refresh_concurrently' else ''
+            with conn.cursor() as cursor:
+                cursor.execute(f"REFRESH MATERIALIZED VIEW {concurrently}{relation};")
+            conn.autocommit = False
+
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) AS row_count FROM {relation};")
+            row_count = cursor.fetchone()['row_count']
+        duration_ms = int((time.time() - started) * 1000)
+        log_refresh(conn, relation, 'refreshed', method, started_at, duration_ms, row_count, fingerprint)
+        print(f"✓ {relation}: {method} in {duration_ms}ms ({row_count} rows)")
+        return 'refreshed'
+    except Exception as e:
+        conn.rollback()
+        conn.autocommit = False
+        duration_ms = int((time.time() - started) * 1000)
+        log_refresh(conn, relation, 'failed', method, started_at, duration_ms, error=str(e))
+        print(f"✗ {relation}: {e}")
+        return 'failed'
+    finally:
+        conn.close()
+
+
+def run(dag=AGGREGATE_DAG, only=None, force=False, dry_run=False, workers=4):
+    """Refresh the DAG (or the `only` relations and their dependencies)"""
+    conn = get_analytics_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(REFRESH_LOG_SQL)
+        conn.commit()
+    finally:
+        conn.close()
+
+    order = topological_order(dag)
+    if only:
+        wanted = set()
+        stack = list(only)
+        while stack:
+            node = stack.pop()
+            if node not in wanted:
+                wanted.add(node)
+                stack.extend(dag[node]['depends_on'])
+        order = [node for node in order if node in wanted]
+
+    statuses = {}
+    pending = list(order)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for relation in list(pending):
+                deps = dag[relation]['depends_on']
+                if any(statuses.get(dep) in ('failed', 'blocked') for dep in deps):
+                    statuses[relation] = 'blocked'
+                    pending.remove(relation)
+                    print(f"✗ {relation}: blocked by a failed dependency")
+                elif all(dep in statuses or dep not in order for dep in deps):
+                    pending.remove(relation)
+                    future = executor.submit(refresh_node, relation, dag[relation], force, dry_run)
+                    running[future] = relation
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                statuses[running.pop(future)] = future.result()
+
+    for relation in order:
+        if statuses[relation] in ('unchanged', 'external', 'missing'):
+            print(f"- {relation}: {statuses[relation]}")
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh aggregates.* in dependency order')
+    parser.add_argument('--only', nargs='+', choices=list(AGGREGATE_DAG),
+                        help='Refresh these relations (and their dependencies) only')
+    parser.add_argument('--force', action='store_true',
+                        help='Refresh even when inputs are unchanged')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print what would be refreshed without doing it')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Relations refreshed in parallel (default: 4)')
+    args = parser.parse_args()
+
+    statuses = run(only=args.only, force=args.force, dry_run=args.dry_run, workers=args.workers)
+    if any(status in ('failed', 'blocked') for status in statuses.values()):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
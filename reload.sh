@@ -0,0 +1,25 @@
+#!/bin/bash
+
+# Gracefully reload the gunicorn server started by ./start.sh
+# Re-reads .env, reloads the snapshot indexes and replaces the workers one by
+# one without dropping requests. Code changes need ./stop.sh && ./start.sh
+
+PID_FILE="gunicorn.pid"
+
+# Check if PID file exists
+if [ ! -f "$PID_FILE" ]; then
+    echo "gunicorn is not running (no $PID_FILE found)"
+    echo "Start it with ./start.sh"
+    exit 1
+fi
+
+GUNICORN_PID=$(cat "$PID_FILE")
+
+if ! ps -p "$GUNICORN_PID" > /dev/null 2>&1; then
+    echo "gunicorn is not running (stale PID file)"
+    exit 1
+fi
+
+echo "Reloading gunicorn (PID: $GUNICORN_PID)..."
+kill -HUP "$GUNICORN_PID"
+echo "✅ Reload signalled; new workers take over as they boot (see flask_app.log)"
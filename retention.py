@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Cohort Retention Builder
+Populates aggregates.cohort_retention in the analytics DB with weekly and
+monthly retention triangles.
+
+Signup dates and activity days are pulled from the ChemLink DB once, mapped to
+integer day offsets in NumPy arrays, and the whole triangle is computed with
+bincount instead of one self-join per (cohort, period) cell.
+
+Usage:
+    python retention.py                        # Rebuild weekly + monthly triangles
+    python retention.py --granularity month    # Rebuild a single granularity
+"""
+
+import argparse
+from datetime import date
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from db_config import get_chemlink_env_connection, get_analytics_db_connection
+
+GRANULARITIES = ('week', 'month')
+
+SIGNUPS_QUERY = """
+    SELECT id, DATE(created_at) AS signup_date
+    FROM persons
+    WHERE deleted_at IS NULL
+    ORDER BY id;
+"""
+
+# Same activity definition as the comprehensive DAU/MAU queries
+ACTIVITY_QUERY = """
+    SELECT DISTINCT person_id, DATE(activity_date) AS activity_date
+    FROM (
+        SELECT person_id, created_at AS activity_date FROM view_access WHERE deleted_at IS NULL
+        UNION ALL
+        SELECT voter_id AS person_id, created_at AS activity_date FROM query_votes
+        UNION ALL
+        SELECT person_id, created_at AS activity_date FROM collections WHERE deleted_at IS NULL
+        UNION ALL
+        SELECT id AS person_id, updated_at AS activity_date FROM persons
+        WHERE deleted_at IS NULL AND updated_at != created_at
+    ) activity
+    WHERE person_id IS NOT NULL;
+"""
+
+CREATE_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+    CREATE TABLE IF NOT EXISTS aggregates.cohort_retention (
+        granularity TEXT NOT NULL,
+        cohort_start DATE NOT NULL,
+        period_number INTEGER NOT NULL,
+        cohort_size INTEGER NOT NULL,
+        retained_users INTEGER NOT NULL,
+        retention_rate NUMERIC(5, 2),
+        computed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (granularity, cohort_start, period_number)
+    );
+"""
+
+
+def fetch_source_data():
+    """Pull signups and distinct activity days from ChemLink as NumPy arrays"""
+    conn = get_chemlink_env_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(SIGNUPS_QUERY)
+            signups = cursor.fetchall()
+            cursor.execute(ACTIVITY_QUERY)
+            activity = cursor.fetchall()
+    finally:
+        conn.close()
+
+    person_ids = np.array([row[0] for row in signups], dtype=np.int64)
+    signup_days = np.array([row[1] for row in signups], dtype='datetime64[D]').astype(np.int64)
+    activity_person_ids = np.array([row[0] for row in activity], dtype=np.int64)
+    activity_days = np.array([row[1] for row in activity], dtype='datetime64[D]').astype(np.int64)
+    return person_ids, signup_days, activity_person_ids, activity_days
+
+
+def to_buckets(days, granularity):
+    """Map day offsets (days since 1970-01-01) to week or month indexes"""
+    if granularity == 'week':
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday like DATE_TRUNC('week')
+        return (days + 3) // 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def bucket_start(buckets, granularity):
+    """Convert week or month indexes back to their first calendar day"""
+    if granularity == 'week':
+        return (buckets * 7 - 3).astype('datetime64[D]')
+    return buckets.astype('datetime64[M]').astype('datetime64[D]')
+
+
+def compute_retention(person_ids, signup_days, activity_person_ids, activity_days,
+                      granularity, today=None):
+    """
+    Compute the retention triangle for one granularity.
+
+    Returns a dict of equally sized arrays: cohort_start, period_number,
+    cohort_size, retained_users, retention_rate. Only cells that have been
+    observable up to `today` are returned.
+    """
+    if len(person_ids) == 0:
+        return None
+
+    today_day = np.datetime64(today or date.today(), 'D').astype(np.int64)
+    current_bucket = to_buckets(np.array([today_day]), granularity)[0]
+
+    cohorts = to_buckets(signup_days, granularity)
+    first_cohort = cohorts.min()
+    cohort_idx = cohorts - first_cohort
+    n_cohorts = int(current_bucket - first_cohort) + 1
+    n_periods = n_cohorts
+
+    # Resolve activity rows to signup rows (person_ids is sorted by the query)
+    pos = np.searchsorted(person_ids, activity_person_ids)
+    pos[pos == len(person_ids)] = 0
+    matched = person_ids[pos] == activity_person_ids
+    pos = pos[matched]
+
+    periods = to_buckets(activity_days[matched], granularity) - cohorts[pos]
+    valid = (periods >= 0) & (periods < n_periods)
+    pos, periods = pos[valid], periods[valid]
+
+    # A person counts once per period no matter how many active days it contains
+    unique_keys = np.unique(pos * n_periods + periods)
+    unique_pos = unique_keys // n_periods
+    unique_periods = unique_keys % n_periods
+
+    cells = cohort_idx[unique_pos] * n_periods + unique_periods
+    retained = np.bincount(cells, minlength=n_cohorts * n_periods).reshape(n_cohorts, n_periods)
+    cohort_size = np.bincount(cohort_idx, minlength=n_cohorts)
+
+    # Keep observed cells of non-empty cohorts: cohort + period <= current bucket
+    cohort_grid, period_grid = np.indices((n_cohorts, n_periods))
+    observed = (cohort_grid + period_grid < n_cohorts) & (cohort_size[cohort_grid] > 0)
+
+    sizes = cohort_size[cohort_grid[observed]]
+    retained_users = retained[observed]
+    return {
+        'cohort_start': bucket_start(cohort_grid[observed] + first_cohort, granularity),
+        'period_number': period_grid[observed],
+        'cohort_size': sizes,
+        'retained_users': retained_users,
+        'retention_rate': np.round(retained_users * 100.0 / sizes, 2),
+    }
+
+
+def write_retention(conn, granularity, triangle):
+    """Replace one granularity's rows in aggregates.cohort_retention in a single transaction"""
+    rows = list(zip(
+        [granularity] * len(triangle['period_number']),
+        triangle['cohort_start'].tolist(),
+        triangle['period_number'].tolist(),
+        triangle['cohort_size'].tolist(),
+        triangle['retained_users'].tolist(),
+        triangle['retention_rate'].tolist(),
+    ))
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM aggregates.cohort_retention WHERE granularity = %s;", (granularity,))
+        execute_values(
+            cursor,
+            """
+            INSERT INTO aggregates.cohort_retention
+                (granularity, cohort_start, period_number, cohort_size, retained_users, retention_rate)
+            VALUES %s
+            """,
+            rows,
+            page_size=5000,
+        )
+    return len(rows)
+
+
+def build(granularities=GRANULARITIES):
+    """Rebuild aggregates.cohort_retention for the requested granularities"""
+    print("Fetching signups and activity from ChemLink DB...")
+    source = fetch_source_data()
+    print(f"✓ {len(source[0])} persons, {len(source[2])} activity days")
+
+    conn = get_analytics_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_TABLE_SQL)
+        for granularity in granularities:
+            triangle = compute_retention(*source, granularity=granularity)
+            if triangle is None:
+                print(f"✗ No signups found, skipping {granularity}ly retention")
+                continue
+            count = write_retention(conn, granularity, triangle)
+            print(f"✓ Wrote {count} {granularity}ly retention cells")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build aggregates.cohort_retention')
+    parser.add_argument('--granularity', choices=GRANULARITIES,
+                        help='Only rebuild this granularity (default: all)')
+    args = parser.parse_args()
+    build([args.granularity] if args.granularity else GRANULARITIES)
+
+
+if __name__ == '__main__':
+    main()
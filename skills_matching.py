@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Skills Matching Builder
+Populates aggregates.skills_matching_scores (/v2/api/graph/skills-matching)
+
+Per-user features are loaded once into arrays: years and distinct projects
+per role (user×role) and the number of degrees per user. For every
+(user, role) pair a user actually holds:
+
+  - proficiency_score (0-100) blends the user's percentile of years among
+    everyone holding that role, their project percentile in that role and
+    their education, all computed column-wise in one vectorized pass
+  - similar_user_count is the number of other holders of the role whose
+    overall role/years profile has cosine similarity ≥ SIMILARITY_THRESHOLD,
+    computed as (S ≥ t)·H for a chunk of users at a time, where S is the
+    chunk's similarity to everyone and H the user×role holder matrix
+
+Incremental runs rescore users whose experiences or education changed since
+the last build plus everyone holding a role those users held before or hold
+now: no other score or similar count can have moved. Years in an ongoing role
+run to today, so on the first run of each day everyone in one counts as
+changed.
+
+Usage:
+    python skills_matching.py                  # Incremental (full on first run)
+    python skills_matching.py --full           # Rescore every user
+    python skills_matching.py --chunk-size 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from psycopg2.extras import execute_values
+from scipy import sparse
+
+from db_config import get_analytics_db_connection
+from etl_sync import (
+    changed_persons, get_builder_watermark, open_ended_persons, require_staging, set_builder_watermark
+)
+
+BUILDER = 'skills_matching_scores'
+CHUNK_SIZE = 2000              # users per similarity product
+SIMILARITY_THRESHOLD = 0.5     # cosine similarity of role/years profiles
+YEARS_WEIGHT, PROJECTS_WEIGHT, EDUCATION_WEIGHT = 0.6, 0.25, 0.15
+EDUCATION_CAP = 3              # degrees beyond this don't raise the score
+
+CHANGE_SOURCES = {
+    'chemlink_experiences': 'person_id',
+    'chemlink_education': 'person_id',
+    'chemlink_persons': 'id',
+}
+
+ROLE_FEATURES_QUERY = """
+    SELECT
+        e.person_id,
+        e.role_id,
+        SUM(GREATEST(COALESCE(e.end_date, CURRENT_DATE) - e.start_date, 0)) / 365.25 AS years,
+        COUNT(DISTINCT e.project_id) AS projects
+    FROM staging.chemlink_experiences e
+    JOIN staging.chemlink_persons p ON p.id = e.person_id AND p.deleted_at IS NULL
+    WHERE e.deleted_at IS NULL AND e.role_id IS NOT NULL AND e.start_date IS NOT NULL
+    GROUP BY e.person_id, e.role_id;
+"""
+
+EDUCATION_QUERY = """
+    SELECT person_id, COUNT(DISTINCT COALESCE(degree_id, -id)) AS degrees
+    FROM staging.chemlink_education
+    WHERE deleted_at IS NULL
+    GROUP BY person_id;
+"""
+
+CREATE_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS aggregates;
+    CREATE TABLE IF NOT EXISTS aggregates.skills_matching_scores (
+        user_id BIGINT NOT NULL,
+        role_id BIGINT NOT NULL,
+        role_title TEXT,
+        experience_years NUMERIC(6, 2) NOT NULL,
+        project_count INTEGER NOT NULL DEFAULT 0,
+        proficiency_score NUMERIC(5, 2) NOT NULL,
+        similar_user_count INTEGER NOT NULL DEFAULT 0,
+        computed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (user_id, role_id)
+    );
+    CREATE INDEX IF NOT EXISTS skills_matching_scores_proficiency_idx
+        ON aggregates.skills_matching_scores (proficiency_score DESC);
+"""
+
+
+def load_features(conn):
+    """
+    Load per-user features.
+
+    Returns (user_ids, role_ids, years, projects, degrees): years and projects
+    are CSR user×role matrices with identical sparsity, degrees a dense
+    per-user vector.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(ROLE_FEATURES_QUERY)
+        role_rows = cursor.fetchall()
+        cursor.execute(EDUCATION_QUERY)
+        education = {row['person_id']: row['degrees'] for row in cursor.fetchall()}
+
+    persons = np.array([row['person_id'] for row in role_rows], dtype=np.int64)
+    roles = np.array([row['role_id'] for row in role_rows], dtype=np.int64)
+    user_ids, rows = np.unique(persons, return_inverse=True)
+    role_ids, cols = np.unique(roles, return_inverse=True)
+    shape = (len(user_ids), len(role_ids))
+
+    # One (person, role) per query row, so a CSR of row numbers gives the
+    # layout both feature matrices share
+    layout = sparse.csr_matrix((np.arange(1, len(rows) + 1), (rows, cols)), shape=shape)
+    layout.sort_indices()
+    order = layout.data - 1
+    years = np.array([float(row['years']) for row in role_rows], dtype=np.float32)[order]
+    projects = np.array([row['projects'] for row in role_rows], dtype=np.float32)[order]
+    degrees = np.array([education.get(uid, 0) for uid in user_ids.tolist()], dtype=np.float32)
+    return (
+        user_ids,
+        role_ids,
+        sparse.csr_matrix((years, layout.indices, layout.indptr), shape=shape),
+        sparse.csr_matrix((projects, layout.indices, layout.indptr), shape=shape),
+        degrees,
+    )
+
+
+def rows_for(sorted_ids, ids):
+    """Positions of `ids` in `sorted_ids`, skipping ids that aren't there"""
+    rows = np.searchsorted(sorted_ids, ids)
+    present = rows < len(sorted_ids)
+    present[present] = sorted_ids[rows[present]] == ids[present]
+    return rows[present]
+
+
+def column_percentiles(matrix):
+    """
+    Percentile (0-1] of every stored value within its column, aligned with
+    matrix.data (explicit zeros included). Ties share the highest rank.
+    """
+    cols = matrix.indices
+    order = np.lexsort((matrix.data, cols))
+    col_sorted, value_sorted = cols[order], matrix.data[order]
+    starts_group = np.ones(len(order), dtype=bool)
+    starts_group[1:] = (np.diff(col_sorted) != 0) | (np.diff(value_sorted) != 0)
+    group = np.cumsum(starts_group) - 1
+    group_end = np.append(np.flatnonzero(starts_group)[1:], len(order))
+    col_start = np.searchsorted(col_sorted, col_sorted, side='left')
+    counts = np.bincount(cols, minlength=matrix.shape[1])
+
+    percentiles = np.empty(len(order), dtype=np.float64)
+    percentiles[order] = (group_end[group] - col_start) / counts[col_sorted]
+    return percentiles
+
+
+def proficiency(years, projects, degrees):
+    """Proficiency (0-100) for every stored (user, role), as a CSR matrix shaped like `years`"""
+    education = np.minimum(degrees, EDUCATION_CAP) / EDUCATION_CAP
+    row_of_entry = np.repeat(np.arange(years.shape[0]), np.diff(years.indptr))
+    score = 100 * (
+        YEARS_WEIGHT * column_percentiles(years)
+        + PROJECTS_WEIGHT * column_percentiles(projects)
+        + EDUCATION_WEIGHT * education[row_of_entry]
+    )
+    return sparse.csr_matrix((score, years.indices, years.indptr), shape=years.shape)
+
+
+def normalized_profiles(years):
+    """Rows scaled to unit length so row products are cosine similarities"""
+    norms = np.sqrt(np.asarray(years.multiply(years).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ years
+
+
+def similar_users(profiles, rows):
+    """Binary CSR (len(rows) × users) marking users similar to each given row, self excluded"""
+    similarity = (profiles[rows] @ profiles.T).tocoo()
+    keep = (similarity.data >= SIMILARITY_THRESHOLD) & (similarity.col != rows[similarity.row])
+    return sparse.csr_matrix(
+        (np.ones(keep.sum(), dtype=np.float32), (similarity.row[keep], similarity.col[keep])),
+        shape=similarity.shape,
+    )
+
+
+def similar_counts(profiles, holders, rows):
+    """similar_user_count for every role held by `rows`, aligned with holders[rows].data"""
+    chunk_holders = holders[rows]
+    chunk_holders.sort_indices()
+    counts = similar_users(profiles, rows) @ holders
+    # Adding the binary holder pattern keeps every held slot, including zero counts
+    aligned = (chunk_holders + counts.multiply(chunk_holders)).tocsr()
+    aligned.sort_indices()
+    return aligned.data - 1
+
+
+def chunk_output(user_ids, role_ids, years, projects, scores, profiles, holders, rows, titles):
+    """Table rows for the users at row indexes `rows`"""
+    counts = similar_counts(profiles, holders, rows)
+    chunk_years, chunk_projects, chunk_scores = years[rows], projects[rows], scores[rows]
+    entry_rows = np.repeat(rows, np.diff(chunk_years.indptr))
+    output = []
+    for row, col, y, p, s, c in zip(entry_rows.tolist(), chunk_years.indices.tolist(),
+                                     chunk_years.data.tolist(), chunk_projects.data.tolist(),
+                                     chunk_scores.data.tolist(), counts.tolist()):
+        role_id = int(role_ids[col])
+        output.append((int(user_ids[row]), role_id, titles.get(role_id), round(y, 2),
+                       int(p), round(s, 2), int(c)))
+    return output
+
+
+def role_titles(conn, role_ids):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT id, title FROM staging.chemlink_roles WHERE id = ANY(%s);", (role_ids,))
+        return {row['id']: row['title'] for row in cursor.fetchall()}
+
+
+def build(full=False, chunk_size=CHUNK_SIZE):
+    """Rescore skills matching (incrementally unless `full` or first run)"""
+    started = time.time()
+    conn = get_analytics_db_connection()
+    try:
+        require_staging(conn)
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_TABLE_SQL)
+
+        since = None if full else get_builder_watermark(conn, BUILDER)
+        changed, watermark = changed_persons(conn, CHANGE_SOURCES, since)
+        ongoing = open_ended_persons(conn, BUILDER) - changed if since is not None else set()
+        changed |= ongoing
+        if since is not None and not changed:
+            print("✓ No profile changes since last build")
+            conn.commit()
+            return
+
+        user_ids, role_ids, years, projects, degrees = load_features(conn)
+        print(f"✓ Loaded {len(user_ids)} users × {len(role_ids)} roles ({years.nnz} held roles)")
+        scores = proficiency(years, projects, degrees)
+        profiles = normalized_profiles(years)
+        holders = years.copy()
+        holders.data = np.ones_like(holders.data)
+        titles = role_titles(conn, role_ids.tolist())
+
+        with conn.cursor() as cursor:
+            if since is None:
+                cursor.execute("TRUNCATE aggregates.skills_matching_scores;")
+                targets = np.arange(len(user_ids))
+            else:
+                # A role's percentiles and its holders' similar counts can only
+                # move if a changed user held it before or holds it now
+                changed_ids = np.array(sorted(changed), dtype=np.int64)
+                cursor.execute(
+                    "SELECT DISTINCT role_id FROM aggregates.skills_matching_scores WHERE user_id = ANY(%s);",
+                    (changed_ids.tolist(),),
+                )
+                old_roles = np.array([row['role_id'] for row in cursor.fetchall()], dtype=np.int64)
+                changed_rows = rows_for(user_ids, changed_ids)
+                touched_cols = np.union1d(rows_for(role_ids, old_roles), holders[changed_rows].indices)
+                role_holders = np.unique(holders[:, touched_cols].tocoo().row)
+                targets = np.union1d(changed_rows, role_holders).astype(np.int64)
+                cursor.execute(
+                    "DELETE FROM aggregates.skills_matching_scores WHERE user_id = ANY(%s);",
+                    (np.union1d(changed_ids, user_ids[targets]).tolist(),),
+                )
+                print(f"✓ {len(changed) - len(ongoing)} changed and {len(ongoing)} ongoing-role users "
+                      f"→ rescoring {len(targets)} users")
+
+            written = 0
+            for start in range(0, len(targets), chunk_size):
+                rows = chunk_output(user_ids, role_ids, years, projects, scores, profiles, holders,
+                                  targets[start:start + chunk_size], titles)
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO aggregates.skills_matching_scores
+                        (user_id, role_id, role_title, experience_years, project_count,
+                         proficiency_score, similar_user_count)
+                    VALUES %s
+                    """,
+                    rows,
+                    page_size=5000,
+                )
+                written += len(rows)
+
+        set_builder_watermark(conn, BUILDER, watermark)
+        conn.commit()
+        print(f"✓ Wrote {written} skill scores in {time.time() - started:.2f}s")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build aggregates.skills_matching_scores')
+    parser.add_argument('--full', action='store_true', help='Rescore every user')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f'Users per similarity product (default: {CHUNK_SIZE})')
+    args = parser.parse_args()
+    build(full=args.full, chunk_size=args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
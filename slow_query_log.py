@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Slow-Query Log
+Records dashboard queries slower than a threshold and captures their plans
+
+Every query that goes through db_config.execute_query, the query engine or
+execute_analytics_query is checked against SLOW_QUERY_MS. A slow one is
+queued (query id, database, parameters, duration, SQL); a background thread
+writes it to a local SQLite store and, at most once per
+SLOW_QUERY_EXPLAIN_INTERVAL seconds per query id (on-demand plans
+included), re-runs it under EXPLAIN on a fresh connection. Outside prod the
+plan is EXPLAIN (ANALYZE, BUFFERS); in prod it is a plain EXPLAIN unless
+ANALYZE is requested from the command line. Plans are captured inside a
+rolled-back transaction with a statement timeout.
+
+The request path only does a queue put; if the queue is full the entry is
+dropped rather than slowing the request down.
+
+Settings (environment / .env):
+    SLOW_QUERY_MS                 threshold in milliseconds (default 500)
+    SLOW_QUERY_EXPLAIN_INTERVAL   seconds between plans per query id (default 300)
+    SLOW_QUERY_LOG                SQLite file (default slow_queries.sqlite3)
+
+Usage:
+    python slow_query_log.py                          # Worst offenders
+    python slow_query_log.py --limit 5
+    python slow_query_log.py --explain dau --analyze  # Capture a plan now
+"""
+
+import argparse
+import json
+import math
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+DEFAULT_THRESHOLD_MS = 500
+DEFAULT_EXPLAIN_INTERVAL = 300
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slow_queries.sqlite3')
+EXPLAIN_TIMEOUT_MS = 30000
+QUEUE_SIZE = 256
+KEEP_ROWS = 5000  # slow_queries rows kept (oldest are pruned)
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS slow_queries (
+        id INTEGER PRIMARY KEY,
+        query_id TEXT NOT NULL,
+        database TEXT NOT NULL,
+        env TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        params TEXT,
+        sql TEXT NOT NULL,
+        recorded_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS slow_queries_query_idx ON slow_queries (query_id, duration_ms);
+    CREATE TABLE IF NOT EXISTS slow_query_plans (
+        id INTEGER PRIMARY KEY,
+        query_id TEXT NOT NULL,
+        database TEXT NOT NULL,
+        env TEXT NOT NULL,
+        analyzed INTEGER NOT NULL,
+        plan TEXT NOT NULL,
+        captured_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS slow_query_plans_query_idx ON slow_query_plans (query_id, captured_at);
+"""
+
+WORST_SQL = """
+    SELECT query_id, database, env,
+           COUNT(*) AS occurrences,
+           ROUND(MAX(duration_ms), 1) AS max_ms,
+           ROUND(AVG(duration_ms), 1) AS avg_ms,
+           MAX(recorded_at) AS last_seen
+    FROM slow_queries
+    GROUP BY query_id, database, env
+    ORDER BY max_ms DESC
+    LIMIT ?
+"""
+
+
+class PlanTooSoon(Exception):
+    """A plan for this query id was captured less than SLOW_QUERY_EXPLAIN_INTERVAL ago"""
+
+    def __init__(self, query_id, retry_after):
+        super().__init__(f"A plan for {query_id} was taken recently; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def threshold_ms():
+    return float(os.getenv('SLOW_QUERY_MS', DEFAULT_THRESHOLD_MS))
+
+
+def explain_interval():
+    return float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', DEFAULT_EXPLAIN_INTERVAL))
+
+
+def environment():
+    return os.getenv('APP_ENV', 'uat').lower()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _connect(database):
+    # Imported here: db_config imports this module for its execute_query hook
+    from query_engine import TARGETS
+    if database not in TARGETS:
+        raise ValueError(f"No connection for database label {database!r}")
+    return TARGETS[database]()
+
+
+def explain(database, sql, params, analyze):
+    """EXPLAIN (FORMAT JSON) of one query on a fresh connection; nothing is committed"""
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+    conn = _connect(database)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+            cursor.execute(f"EXPLAIN ({options}) {sql.strip().rstrip(';')}", params or None)
+            row = cursor.fetchone()
+        plan = row[0] if isinstance(row, tuple) else next(iter(row.values()))
+        return plan if not isinstance(plan, str) else json.loads(plan)
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+class SlowQueryLog:
+    """Queue of slow queries drained by one writer/EXPLAIN thread"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._last_explain = {}  # query_id -> monotonic time of last plan
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dropped = 0
+
+    def _store(self):
+        conn = sqlite3.connect(self.path or os.getenv('SLOW_QUERY_LOG', DEFAULT_PATH))
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SCHEMA_SQL)
+        return conn
+
+    def _ensure_worker(self):
+        # Also restarts the worker in a forked child, where the thread is gone
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                    self._thread.start()
+
+    def check(self, query_id, database, sql, params, seconds):
+        """Queue the query if it was slow; cheap when it was not"""
+        if query_id == 'adhoc' or seconds * 1000 < threshold_ms():
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(('record', query_id, database, sql, params, seconds, environment()))
+        except queue.Full:
+            self.dropped += 1
+
+    def _reserve_explain(self, query_id):
+        """Claim the query id's plan slot; False if one was taken within the interval"""
+        with self._lock:
+            last = self._last_explain.get(query_id)
+            if last is not None and time.monotonic() - last < explain_interval():
+                return False
+            self._last_explain[query_id] = time.monotonic()
+            return True
+
+    def request_plan(self, query_id, analyze=None):
+        """
+        Queue a plan for the slowest recorded run of `query_id` (on demand).
+
+        `analyze` defaults to the automatic plans' choice: ANALYZE everywhere
+        but prod. Raises PlanTooSoon within SLOW_QUERY_EXPLAIN_INTERVAL of the
+        query id's last plan; returns False without waiting if the queue is full.
+        """
+        if analyze is None:
+            analyze = environment() != 'prod'
+        if not self._reserve_explain(query_id):
+            elapsed = time.monotonic() - self._last_explain[query_id]
+            raise PlanTooSoon(query_id, max(math.ceil(explain_interval() - elapsed), 1))
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(('explain', query_id, analyze))
+        except queue.Full:
+            self.dropped += 1
+            # Nothing will be captured, so don't hold the slot
+            self._last_explain.pop(query_id, None)
+            return False
+        return True
+
+    def capture_plan(self, query_id, analyze):
+        """Capture a plan for the slowest recorded run now, in this thread (CLI); raises on failure"""
+        store = self._store()
+        try:
+            self._explain_recorded(store, query_id, analyze)
+        finally:
+            store.close()
+
+    def _run(self):
+        store = self._store()
+        while True:
+            item = self._queue.get()
+            try:
+                if item[0] == 'record':
+                    self._record(store, *item[1:])
+                else:
+                    self._explain_recorded(store, *item[1:])
+            except Exception as e:
+                print(f"✗ Slow-query log: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _record(self, store, query_id, database, sql, params, seconds, env):
+        now = datetime.now().isoformat(timespec='seconds')
+        params_json = json.dumps(params, default=_json_default) if params is not None else None
+        with store:
+            cursor = store.execute(
+                "INSERT INTO slow_queries (query_id, database, env, duration_ms, params, sql, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query_id, database, env, seconds * 1000, params_json, sql, now),
+            )
+            if cursor.lastrowid % 100 == 0:
+                store.execute("DELETE FROM slow_queries WHERE id <= ?", (cursor.lastrowid - KEEP_ROWS,))
+
+        if not self._reserve_explain(query_id):
+            return
+        self._save_plan(store, query_id, database, sql, params, analyze=env != 'prod')
+
+    def _explain_recorded(self, store, query_id, analyze):
+        row = store.execute(
+            "SELECT database, sql, params FROM slow_queries WHERE query_id = ? "
+            "ORDER BY duration_ms DESC LIMIT 1", (query_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"No slow runs recorded for {query_id}")
+        params = json.loads(row['params']) if row['params'] else None
+        self._save_plan(store, query_id, row['database'], row['sql'], params, analyze)
+
+    def _save_plan(self, store, query_id, database, sql, params, analyze):
+        plan = explain(database, sql, params, analyze)
+        with store:
+            store.execute(
+                "INSERT INTO slow_query_plans (query_id, database, env, analyzed, plan, captured_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (query_id, database, environment(), int(analyze), json.dumps(plan),
+                 datetime.now().isoformat(timespec='seconds')),
+            )
+
+    def flush(self):
+        """Wait until everything queued so far is written (CLI and checks)"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def worst(self, limit=20):
+        """Slowest query ids, each with its slowest run's parameters and latest plan"""
+        store = self._store()
+        try:
+            offenders = [dict(row) for row in store.execute(WORST_SQL, (limit,))]
+            for offender in offenders:
+                slowest = store.execute(
+                    "SELECT params FROM slow_queries WHERE query_id = ? AND database = ? AND env = ? "
+                    "ORDER BY duration_ms DESC LIMIT 1",
+                    (offender['query_id'], offender['database'], offender['env']),
+                ).fetchone()
+                offender['slowest_params'] = json.loads(slowest['params']) if slowest['params'] else None
+                plan = store.execute(
+                    "SELECT analyzed, plan, captured_at FROM slow_query_plans "
+                    "WHERE query_id = ? AND database = ? AND env = ? ORDER BY id DESC LIMIT 1",
+                    (offender['query_id'], offender['database'], offender['env']),
+                ).fetchone()
+                offender['plan'] = None if plan is None else {
+                    'analyzed': bool(plan['analyzed']),
+                    'captured_at': plan['captured_at'],
+                    'plan': json.loads(plan['plan']),
+                }
+            return offenders
+        finally:
+            store.close()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show slow dashboard queries and their plans')
+    parser.add_argument('--limit', type=int, default=20, help='Number of query ids to show')
+    parser.add_argument('--explain', metavar='QUERY_ID', help='Capture a plan for the slowest recorded run')
+    parser.add_argument('--analyze', action='store_true', help='Use EXPLAIN (ANALYZE, BUFFERS)')
+    args = parser.parse_args()
+
+    if args.explain:
+        try:
+            slow_query_log.capture_plan(args.explain, analyze=args.analyze)
+        except Exception as e:
+            print(f"✗ No plan captured for {args.explain}: {e}")
+            sys.exit(1)
+        print(f"✓ Plan captured for {args.explain}")
+        return
+
+    offenders = slow_query_log.worst(args.limit)
+    if not offenders:
+        print(f"No queries over {threshold_ms():.0f}ms recorded")
+        return
+    print(f"{'QUERY':<45} {'DB':<11} {'ENV':<5} {'RUNS':>5} {'MAX MS':>9} {'AVG MS':>9}  PLAN")
+    for row in offenders:
+        plan = row['plan']
+        if plan is None:
+            plan_note = '-'
+        else:
+            top = plan['plan'][0]
+            cost = top['Plan'].get('Total Cost')
+            actual = top.get('Execution Time')
+            plan_note = f"cost {cost}" + (f", {actual:.1f}ms actual" if actual is not None else '')
+        print(f"{row['query_id']:<45} {row['database']:<11} {row['env']:<5} {row['occurrences']:>5} "
+              f"{row['max_ms']:>9} {row['avg_ms']:>9}  {plan_note}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,111 +1,243 @@
 """
 SQL Queries used in the ChemLink Analytics Dashboard
 This file contains all queries for reference and documentation
+
+Entries with a `target` are also what the routes execute (see
+query_engine.py): `params` lists the %(name)s placeholders in order,
+`cache_ttl` is in seconds, `window` is the default ?from=&to=&granularity=
+window and `source_tables` are the relations read. Entries without a target
+document routes that run several queries.
 """
 
 SQL_QUERIES = {
+    "new_users_daily": {
+        "name": "New Users - Today",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 60,
+        "source_tables": ["aggregates.profile_completeness"],
+        "query": """SELECT 
+    person_id as id,
+    full_name,
+    email,
+    has_finder,
+    experience_count,
+    education_count,
+    embedding_count,
+    created_at
+FROM aggregates.profile_completeness
+WHERE created_at >= CURRENT_DATE
+  AND created_at < CURRENT_DATE + 1
+ORDER BY created_at DESC;"""
+    },
+    "new_users_weekly": {
+        "name": "New Users - Weekly Trend",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "week", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 weeks by week)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
+SELECT 
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS week,
+    SUM(event_count) AS new_users
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['signup'])
+GROUP BY 1
+ORDER BY week DESC;"""
+    },
     "new_users_monthly": {
         "name": "New Users - Monthly Trend",
-        "database": "ChemLink DB",
-        "query": """-- Rolling 12-month window (current month + 11 previous months)
--- Returns available data if less than 12 months exists
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "month", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 months by month)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
 SELECT 
-    DATE_TRUNC('month', created_at) as month,
-    COUNT(*) as new_users
-FROM persons 
-WHERE deleted_at IS NULL
-  AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-GROUP BY month 
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS month,
+    SUM(event_count) AS new_users
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['signup'])
+GROUP BY 1
 ORDER BY month DESC;"""
+    },
+    "growth_rate_weekly": {
+        "name": "User Growth Rate - Weekly",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "previous_start", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "week", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 weeks by week; one extra week is read so the
+-- oldest week shown has a growth rate)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
+WITH weekly_users AS (
+    SELECT DATE_TRUNC(%(granularity)s, bucket_hour) as week,
+           SUM(event_count) as new_users
+    FROM aggregates.activity_rollup_hourly
+    WHERE bucket_hour >= %(previous_start)s AND bucket_hour < %(window_end)s
+      AND activity_type = 'signup'
+    GROUP BY 1
+),
+growth AS (
+    SELECT 
+        week, 
+        new_users,
+        LAG(new_users) OVER (ORDER BY week) as prev_week,
+        ROUND(((new_users - LAG(new_users) OVER (ORDER BY week)) * 100.0 / 
+               NULLIF(LAG(new_users) OVER (ORDER BY week), 0)), 2) as growth_rate_pct
+    FROM weekly_users
+)
+SELECT * FROM growth
+WHERE week >= %(window_start)s
+ORDER BY week DESC;"""
     },
     "growth_rate_monthly": {
         "name": "User Growth Rate - Monthly",
-        "database": "ChemLink DB",
-        "query": """-- Rolling 12-month window with month-over-month growth rate calculation
--- Shows percentage change compared to previous month
--- Returns available data if less than 12 months exists
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "previous_start", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "month", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 months by month; one extra month is read so the
+-- oldest month shown has a growth rate)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
 WITH monthly_users AS (
-    SELECT DATE_TRUNC('month', created_at) as month,
-           COUNT(*) as new_users
-    FROM persons 
-    WHERE deleted_at IS NULL
-      AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-    GROUP BY month
+    SELECT DATE_TRUNC(%(granularity)s, bucket_hour) as month,
+           SUM(event_count) as new_users
+    FROM aggregates.activity_rollup_hourly
+    WHERE bucket_hour >= %(previous_start)s AND bucket_hour < %(window_end)s
+      AND activity_type = 'signup'
+    GROUP BY 1
+),
+growth AS (
+    SELECT 
+        month, 
+        new_users,
+        LAG(new_users) OVER (ORDER BY month) as prev_month,
+        ROUND(((new_users - LAG(new_users) OVER (ORDER BY month)) * 100.0 / 
+               NULLIF(LAG(new_users) OVER (ORDER BY month), 0)), 2) as growth_rate_pct
+    FROM monthly_users
 )
-SELECT 
-    month, 
-    new_users,
-    LAG(new_users) OVER (ORDER BY month) as prev_month,
-    ROUND(((new_users - LAG(new_users) OVER (ORDER BY month)) * 100.0 / 
-           NULLIF(LAG(new_users) OVER (ORDER BY month), 0)), 2) as growth_rate_pct
-FROM monthly_users 
+SELECT * FROM growth
+WHERE month >= %(window_start)s
 ORDER BY month DESC;"""
     },
     "login_velocity_hourly": {
         "name": "Login Velocity (Hourly)",
-        "database": "Kratos Identity DB",
-        "query": """SELECT
-    DATE_TRUNC('hour', authenticated_at) AS hour_bucket,
-    COUNT(*) AS sessions_started
-FROM sessions
-WHERE authenticated_at >= NOW() - INTERVAL '24 hours'
-GROUP BY hour_bucket
-ORDER BY hour_bucket DESC
-LIMIT 24;"""
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "hour", "buckets": 24},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 24 hours by hour)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
+SELECT 
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS hour_bucket,
+    SUM(event_count) AS sessions_started
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['session'])
+GROUP BY 1
+ORDER BY hour_bucket DESC;"""
     },
     "unique_identities_daily": {
         "name": "Unique Authenticated Identities (Daily)",
-        "database": "Kratos Identity DB",
-        "query": """-- Distinct Kratos identities that authenticated each day (rolling 30 days)
-SELECT
-    DATE_TRUNC('day', authenticated_at) AS day_bucket,
-    COUNT(DISTINCT identity_id) AS unique_identities,
-    COUNT(*) AS sessions_started
-FROM sessions
-WHERE authenticated_at >= CURRENT_DATE - INTERVAL '30 days'
-GROUP BY day_bucket
-ORDER BY day_bucket DESC
-LIMIT 30;"""
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "day", "buckets": 30},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 30 days by day)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
+SELECT 
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS day_bucket,
+    COUNT(DISTINCT actor) AS unique_identities,
+    SUM(event_count) AS sessions_started
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['session'])
+GROUP BY 1
+ORDER BY day_bucket DESC;"""
     },
     "dau": {
         "name": "Daily Active Users (DAU)",
-        "database": "Engagement DB",
-        "query": """SELECT 
-    DATE(activity_date) as date,
-    COUNT(DISTINCT person_id) as active_users,
-    COUNT(CASE WHEN activity_type = 'post' THEN 1 END) as users_who_posted,
-    COUNT(CASE WHEN activity_type = 'comment' THEN 1 END) as users_who_commented
-FROM (
-    SELECT person_id, created_at as activity_date, 'post' as activity_type 
-    FROM posts WHERE deleted_at IS NULL
-    UNION ALL
-    SELECT person_id, created_at, 'comment' 
-    FROM comments WHERE deleted_at IS NULL
-) daily_activity
-WHERE activity_date >= CURRENT_DATE - INTERVAL '30 days'
-GROUP BY DATE(activity_date)
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "day", "buckets": 31},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 31 days by day)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
+SELECT 
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS date,
+    COUNT(DISTINCT actor) AS active_users,
+    COALESCE(SUM(event_count) FILTER (WHERE activity_type = 'post'), 0) AS users_who_posted,
+    COALESCE(SUM(event_count) FILTER (WHERE activity_type = 'comment'), 0) AS users_who_commented
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['post', 'comment'])
+GROUP BY 1
 ORDER BY date DESC;"""
+    },
+    "wau": {
+        "name": "Weekly Active Users (WAU)",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "week", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 weeks by week)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
+SELECT 
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS week,
+    COUNT(DISTINCT actor) AS active_users
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['post', 'comment'])
+GROUP BY 1
+ORDER BY week DESC;"""
     },
     "mau": {
         "name": "Monthly Active Users (MAU)",
-        "database": "Engagement DB",
-        "query": """-- Rolling 12-month window (current month + 11 previous months)
--- Returns available data if less than 12 months exists
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "month", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 months by month)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
 SELECT 
-    DATE_TRUNC('month', activity_date) as month,
-    COUNT(DISTINCT person_id) as active_users
-FROM (
-    SELECT person_id, created_at as activity_date 
-    FROM posts 
-    WHERE deleted_at IS NULL
-      AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-    UNION ALL
-    SELECT person_id, created_at 
-    FROM comments 
-    WHERE deleted_at IS NULL
-      AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-) monthly_activity
-GROUP BY DATE_TRUNC('month', activity_date)
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS month,
+    COUNT(DISTINCT actor) AS active_users
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['post', 'comment'])
+GROUP BY 1
 ORDER BY month DESC;"""
     },
     "mau_by_country": {
@@ -143,6 +275,10 @@ WHERE p.id::text IN (<person_id_list>);
     "post_frequency": {
         "name": "Post Frequency - Daily",
         "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["posts"],
         "query": """SELECT 
     DATE(created_at) as post_date,
     COUNT(*) as posts_created,
@@ -157,6 +293,10 @@ ORDER BY post_date DESC;"""
     "engagement_rate": {
         "name": "Post Engagement Rate by Type",
         "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["posts", "comments"],
         "query": """SELECT 
     p.type as content_type,
     COUNT(DISTINCT p.id) as total_posts,
@@ -174,6 +314,10 @@ ORDER BY engagement_rate_pct DESC;"""
     "content_type": {
         "name": "Content Type Distribution",
         "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["posts"],
         "query": """SELECT 
     p.type,
     COUNT(*) as post_count,
@@ -191,6 +335,10 @@ ORDER BY post_count DESC;"""
     "active_posters": {
         "name": "Top Active Posters",
         "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["persons", "posts", "comments"],
         "query": """SELECT 
     p.first_name || ' ' || p.last_name as name,
     p.email,
@@ -216,6 +364,10 @@ LIMIT 20;"""
     "post_reach": {
         "name": "Top Performing Posts",
         "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["posts", "persons", "comments"],
         "query": """SELECT 
     p.id as post_id,
     LEFT(p.content, 100) as post_preview,
@@ -235,51 +387,84 @@ WHERE p.deleted_at IS NULL
 GROUP BY p.id, p.content, author.first_name, author.last_name, p.type, p.created_at
 ORDER BY engagement_score DESC, comment_count DESC, p.created_at DESC
 LIMIT 20;"""
+    },
+    "engagement_summary": {
+        "name": "Engagement Summary (30 days)",
+        "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["posts", "comments"],
+        "query": """SELECT 
+    'Total Posts (30d)' as metric,
+    COUNT(*)::text as value
+FROM posts
+WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
+
+UNION ALL
+
+SELECT 
+    'Active Posters (30d)',
+    COUNT(DISTINCT person_id)::text
+FROM posts
+WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
+
+UNION ALL
+
+SELECT 
+    'Total Comments (30d)',
+    COUNT(*)::text
+FROM comments
+WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
+
+UNION ALL
+
+SELECT 
+    'Avg Posts/Day',
+    ROUND(COUNT(*)::numeric / 30, 1)::text
+FROM posts
+WHERE deleted_at IS NULL AND created_at >= NOW() - INTERVAL '30 days'
+
+UNION ALL
+
+SELECT 
+    'Avg Comments/Post',
+    ROUND(
+        (SELECT COUNT(*) FROM comments WHERE deleted_at IS NULL)::numeric /
+        NULLIF((SELECT COUNT(*) FROM posts WHERE deleted_at IS NULL), 0), 2
+    )::text;"""
     },
     "profile_completion": {
         "name": "Profile Completion Score",
-        "database": "ChemLink DB",
-        "query": """WITH profile_completeness AS (
-    SELECT 
-        p.id,
-        p.first_name || ' ' || p.last_name as full_name,
-        p.email,
-        CASE WHEN p.headline_description IS NOT NULL AND LENGTH(p.headline_description) > 10 THEN 1 ELSE 0 END as has_headline,
-        CASE WHEN p.linked_in_url IS NOT NULL THEN 1 ELSE 0 END as has_linkedin,
-        CASE WHEN p.location_id IS NOT NULL THEN 1 ELSE 0 END as has_location,
-        CASE WHEN p.company_id IS NOT NULL THEN 1 ELSE 0 END as has_company,
-        (SELECT COUNT(*) FROM experiences WHERE person_id = p.id AND deleted_at IS NULL) as experience_count,
-        (SELECT COUNT(*) FROM education WHERE person_id = p.id AND deleted_at IS NULL) as education_count,
-        (SELECT COUNT(*) FROM person_languages WHERE person_id = p.id AND deleted_at IS NULL) as language_count,
-        (SELECT COUNT(*) FROM embeddings WHERE person_id = p.id AND deleted_at IS NULL) as embedding_count,
-        p.has_finder
-    FROM persons p
-    WHERE p.deleted_at IS NULL
-)
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 60,
+        "source_tables": ["aggregates.profile_completeness"],
+        "query": """-- Per-person counts and score are maintained by profile_completeness.py
+-- (one point each: headline, LinkedIn, location, company, any experience,
+-- any education, any language)
 SELECT 
     full_name,
     email,
-    (has_headline + has_linkedin + has_location + has_company + 
-     CASE WHEN experience_count > 0 THEN 1 ELSE 0 END +
-     CASE WHEN education_count > 0 THEN 1 ELSE 0 END +
-     CASE WHEN language_count > 0 THEN 1 ELSE 0 END) as profile_completeness_score,
+    completeness_score as profile_completeness_score,
     experience_count,
     education_count,
     language_count,
     embedding_count,
     has_finder,
-    CASE 
-        WHEN embedding_count > 0 THEN 'FINDER_ENABLED'
-        WHEN experience_count > 0 OR education_count > 0 THEN 'BUILDER_ONLY'
-        ELSE 'BASIC_PROFILE'
-    END as profile_status
-FROM profile_completeness
-ORDER BY profile_completeness_score DESC, embedding_count DESC
+    profile_status
+FROM aggregates.profile_completeness
+ORDER BY completeness_score DESC, embedding_count DESC, person_id
 LIMIT 50;"""
     },
     "profile_freshness": {
         "name": "Profile Update Freshness",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["persons"],
         "query": """SELECT 
     id,
     first_name || ' ' || last_name as name,
@@ -298,6 +483,10 @@ LIMIT 50;"""
     "top_companies": {
         "name": "Top Companies",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["companies", "persons", "experiences"],
         "query": """SELECT 
     c.name as company_name,
     COUNT(DISTINCT p.id) as user_count,
@@ -313,6 +502,10 @@ ORDER BY user_count DESC, total_experiences DESC;"""
     "top_roles": {
         "name": "Top Roles/Job Titles",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["roles", "experiences"],
         "query": """SELECT 
     r.title as role_title,
     COUNT(DISTINCT e.person_id) as user_count,
@@ -328,14 +521,16 @@ ORDER BY user_count DESC;"""
     "education_distribution": {
         "name": "Education Distribution",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["degrees", "education"],
         "query": """SELECT 
     d.name as degree_type,
     COUNT(DISTINCT ed.person_id) as user_count,
-    COUNT(DISTINCT ed.school_id) as schools_count,
-    STRING_AGG(DISTINCT s.name, ', ' ORDER BY s.name LIMIT 5) as top_schools
+    COUNT(DISTINCT ed.school_id) as schools_count
 FROM degrees d
 JOIN education ed ON d.id = ed.degree_id
-LEFT JOIN schools s ON ed.school_id = s.id
 WHERE d.deleted_at IS NULL
   AND ed.deleted_at IS NULL
 GROUP BY d.id, d.name
@@ -344,6 +539,10 @@ ORDER BY user_count DESC;"""
     "geographic_distribution": {
         "name": "Geographic Distribution",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["persons", "locations"],
         "query": """SELECT 
     COALESCE(l.country, 'Unknown') as country,
     COUNT(DISTINCT p.id) as user_count,
@@ -358,6 +557,10 @@ ORDER BY user_count DESC;"""
     "top_skills_projects": {
         "name": "Top Skills & Project Types",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["projects"],
         "query": """SELECT 
     pr.name as project_name,
     LEFT(pr.description, 100) as project_description,
@@ -371,20 +574,29 @@ ORDER BY project_count DESC;"""
     "account_funnel": {
         "name": "Account Creation Drop-off Funnel",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["persons"],
         "query": """SELECT 
     COUNT(*) as total_accounts,
-    COUNT(CASE WHEN first_name IS NOT NULL AND last_name IS NOT NULL THEN 1 END) as step_basic_info,
-    COUNT(CASE WHEN headline_description IS NOT NULL AND LENGTH(headline_description) > 10 THEN 1 END) as step_headline,
-    COUNT(CASE WHEN location_id IS NOT NULL THEN 1 END) as step_location,
-    COUNT(CASE WHEN company_id IS NOT NULL THEN 1 END) as step_company,
-    COUNT(CASE WHEN linked_in_url IS NOT NULL THEN 1 END) as step_linkedin,
-    COUNT(CASE WHEN finder_enabled = true THEN 1 END) as step_finder_enabled
+    COUNT(*) FILTER (WHERE first_name IS NOT NULL AND last_name IS NOT NULL) as step_basic_info,
+    COUNT(*) FILTER (WHERE headline_description IS NOT NULL) as step_headline,
+    COUNT(*) FILTER (WHERE location_id IS NOT NULL) as step_location,
+    COUNT(*) FILTER (WHERE company_id IS NOT NULL) as step_company,
+    COUNT(*) FILTER (WHERE linked_in_url IS NOT NULL) as step_linkedin,
+    COUNT(*) FILTER (WHERE has_finder = true) as step_finder_enabled
 FROM persons
-WHERE deleted_at IS NULL;"""
+WHERE deleted_at IS NULL
+  AND created_at >= DATE_TRUNC('year', CURRENT_DATE);"""
     },
     "profile_additions": {
         "name": "Profile Additions to Collections",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["collection_profiles"],
         "query": """SELECT 
     DATE_TRUNC('month', created_at) as month,
     COUNT(*) as profiles_added
@@ -503,49 +715,51 @@ SELECT
     },
     "dau_comprehensive": {
         "name": "DAU - Comprehensive (All Activity Types)",
-        "database": "ChemLink DB",
-        "query": """-- Daily Active Users tracking ALL activity types
--- NOTE: query_votes has NO deleted_at column
--- NOTE: query_embeddings has NO person tracking (system-level data)
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "day", "buckets": 31},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 31 days by day)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
 SELECT 
-    DATE(activity_date) as date,
-    COUNT(DISTINCT person_id) as active_users
-FROM (
-    SELECT person_id, created_at as activity_date FROM view_access WHERE deleted_at IS NULL AND created_at >= CURRENT_DATE - INTERVAL '30 days'
-    UNION ALL
-    SELECT voter_id as person_id, created_at as activity_date FROM query_votes WHERE created_at >= CURRENT_DATE - INTERVAL '30 days'
-    UNION ALL
-    SELECT person_id, created_at as activity_date FROM collections WHERE deleted_at IS NULL AND created_at >= CURRENT_DATE - INTERVAL '30 days'
-    UNION ALL
-    SELECT id as person_id, updated_at as activity_date FROM persons WHERE deleted_at IS NULL AND updated_at >= CURRENT_DATE - INTERVAL '30 days' AND updated_at != created_at
-) daily_activity
-GROUP BY DATE(activity_date)
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS date,
+    COUNT(DISTINCT actor) AS active_users
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['view', 'vote', 'collection', 'profile_update'])
+GROUP BY 1
 ORDER BY date DESC;"""
     },
     "mau_comprehensive": {
         "name": "MAU - Comprehensive (All Activity Types)",
-        "database": "ChemLink DB",
-        "query": """-- Monthly Active Users tracking ALL activity types
--- NOTE: query_votes has NO deleted_at column
--- NOTE: query_embeddings has NO person tracking (system-level data)
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "month", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 months by month)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
 SELECT 
-    DATE_TRUNC('month', activity_date) as month,
-    COUNT(DISTINCT person_id) as active_users
-FROM (
-    SELECT person_id, created_at as activity_date FROM view_access WHERE deleted_at IS NULL AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-    UNION ALL
-    SELECT voter_id as person_id, created_at as activity_date FROM query_votes WHERE created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-    UNION ALL
-    SELECT person_id, created_at as activity_date FROM collections WHERE deleted_at IS NULL AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-    UNION ALL
-    SELECT id as person_id, updated_at as activity_date FROM persons WHERE deleted_at IS NULL AND updated_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months' AND updated_at != created_at
-) monthly_activity
-GROUP BY DATE_TRUNC('month', activity_date)
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS month,
+    COUNT(DISTINCT actor) AS active_users
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['view', 'vote', 'collection', 'profile_update'])
+GROUP BY 1
 ORDER BY month DESC;"""
     },
     "user_type": {
         "name": "Active Users by Type (Standard vs Finder)",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["view_access", "query_votes", "collections", "persons"],
         "query": """-- Active users segmented by Standard vs Finder
 -- NOTE: query_votes has NO deleted_at column, uses voter_id not person_id
 SELECT 
@@ -567,6 +781,10 @@ ORDER BY month DESC, user_type;"""
     "collections_privacy": {
         "name": "Collections Created by Privacy (Public vs Private)",
         "database": "ChemLink DB",
+        "target": "chemlink",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["collections"],
         "query": """-- Collections segmented by privacy type over time
 SELECT 
     DATE_TRUNC('month', created_at) as month,
@@ -580,29 +798,33 @@ ORDER BY month DESC, privacy;"""
     },
     "activity_by_type_monthly": {
         "name": "Monthly Active Users by Activity Type",
-        "database": "Engagement DB",
-        "query": """SELECT 
-    DATE_TRUNC('month', activity_date) as month,
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity", "window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "month", "buckets": 12},
+        "source_tables": ["aggregates.activity_rollup_hourly"],
+        "query": """-- ?from=&to=&granularity=hour|day|week|month (default: last 12 months by month)
+-- The window is normalized to whole buckets and read from the hourly
+-- rollup maintained by etl_sync.py
+SELECT 
+    DATE_TRUNC(%(granularity)s, bucket_hour) AS month,
     activity_type,
-    COUNT(DISTINCT person_id) as unique_users,
-    COUNT(*) as total_activities
-FROM (
-    SELECT person_id, created_at as activity_date, 'post' as activity_type 
-    FROM posts 
-    WHERE deleted_at IS NULL
-      AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-    UNION ALL
-    SELECT person_id, created_at, 'comment' 
-    FROM comments 
-    WHERE deleted_at IS NULL
-      AND created_at >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months'
-) monthly_activity
-GROUP BY DATE_TRUNC('month', activity_date), activity_type
+    COUNT(DISTINCT actor) AS unique_users,
+    SUM(event_count) AS total_activities
+FROM aggregates.activity_rollup_hourly
+WHERE bucket_hour >= %(window_start)s AND bucket_hour < %(window_end)s
+  AND activity_type = ANY(ARRAY['post', 'comment'])
+GROUP BY 1, 2
 ORDER BY month DESC, activity_type;"""
     },
     "activity_distribution_current": {
         "name": "Activity Distribution - Current Month",
         "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["posts", "comments"],
         "query": """WITH activity_counts AS (
     SELECT 
         activity_type,
@@ -636,6 +858,10 @@ ORDER BY ac.unique_users DESC;"""
     "activity_intensity_levels": {
         "name": "User Engagement Intensity Levels",
         "database": "Engagement DB",
+        "target": "engagement",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["posts", "comments"],
         "query": """WITH user_activity_counts AS (
     SELECT 
         DATE_TRUNC('month', activity_date) as month,
@@ -687,5 +913,230 @@ ORDER BY month DESC,
         WHEN 'Regular User (5-9)' THEN 3
         ELSE 4
     END;"""
+    },
+    "v2_new_users_daily": {
+        "name": "V2 New Users - Daily",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "day", "buckets": 31, "allowed": ["day"]},
+        "source_tables": ["aggregates.daily_metrics"],
+        "query": """-- ?from=&to= (default: last 31 days)
+SELECT metric_date as date, new_signups, new_finder_signups, 
+       new_standard_signups, total_users_cumulative
+FROM aggregates.daily_metrics
+WHERE metric_date >= %(window_start)s AND metric_date < %(window_end)s
+ORDER BY metric_date DESC;"""
+    },
+    "v2_new_users_monthly": {
+        "name": "V2 New Users - Monthly",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.monthly_metrics"],
+        "query": """SELECT metric_month as month, new_signups, 
+       total_users_end_of_month, growth_rate_pct
+FROM aggregates.monthly_metrics
+ORDER BY metric_month DESC;"""
+    },
+    "v2_growth_rate_monthly": {
+        "name": "V2 Growth Rate - Monthly",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.monthly_metrics"],
+        "query": """SELECT metric_month as month, new_signups, growth_rate_pct
+FROM aggregates.monthly_metrics
+ORDER BY metric_month DESC;"""
+    },
+    "v2_active_users_daily": {
+        "name": "V2 Active Users - Daily",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "day", "buckets": 31, "allowed": ["day"]},
+        "source_tables": ["aggregates.daily_metrics"],
+        "query": """-- ?from=&to= (default: last 31 days)
+SELECT metric_date as date, dau, active_posters, active_commenters,
+       active_voters, active_collectors, engagement_rate
+FROM aggregates.daily_metrics
+WHERE metric_date >= %(window_start)s AND metric_date < %(window_end)s
+ORDER BY metric_date DESC;"""
+    },
+    "v2_active_users_monthly": {
+        "name": "V2 Active Users - Monthly",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.monthly_metrics"],
+        "query": """SELECT metric_month as month, mau, avg_dau, finder_mau,
+       standard_mau, activation_rate
+FROM aggregates.monthly_metrics
+ORDER BY metric_month DESC;"""
+    },
+    "v2_engagement_daily": {
+        "name": "V2 Engagement - Daily",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["window_start", "window_end"],
+        "cache_ttl": 60,
+        "window": {"granularity": "day", "buckets": 31, "allowed": ["day"]},
+        "source_tables": ["aggregates.daily_metrics"],
+        "query": """-- ?from=&to= (default: last 31 days)
+SELECT metric_date as date, posts_created, comments_created,
+       votes_cast, collections_created, views_given,
+       engagement_rate, social_engagement_rate
+FROM aggregates.daily_metrics
+WHERE metric_date >= %(window_start)s AND metric_date < %(window_end)s
+ORDER BY metric_date DESC;"""
+    },
+    "v2_engagement_monthly": {
+        "name": "V2 Engagement - Monthly",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.monthly_metrics"],
+        "query": """SELECT metric_month as month, total_posts, total_comments,
+       total_votes, total_collections, avg_activities_per_user,
+       avg_engagement_score, activation_rate
+FROM aggregates.monthly_metrics
+ORDER BY metric_month DESC;"""
+    },
+    "v2_user_segmentation": {
+        "name": "V2 User Segmentation",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.user_engagement_levels"],
+        "query": """SELECT engagement_level, COUNT(*) as user_count,
+       ROUND(AVG(engagement_score), 2) as avg_score,
+       ROUND(AVG(total_activities), 2) as avg_activities
+FROM aggregates.user_engagement_levels
+GROUP BY engagement_level
+ORDER BY CASE engagement_level
+    WHEN 'POWER_USER' THEN 1
+    WHEN 'ACTIVE' THEN 2
+    WHEN 'CASUAL' THEN 3
+    WHEN 'LURKER' THEN 4
+    ELSE 5 END;"""
+    },
+    "v2_retention": {
+        "name": "V2 Cohort Retention",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["granularity"],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.cohort_retention"],
+        "query": """-- ?granularity=week|month (default: month)
+SELECT cohort_start, period_number, cohort_size,
+       retained_users, retention_rate
+FROM aggregates.cohort_retention
+WHERE granularity = %(granularity)s
+ORDER BY cohort_start DESC, period_number;"""
+    },
+    "graph_connection_recommendations": {
+        "name": "Connection Recommendations",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.connection_recommendations"],
+        "query": """SELECT 
+    user_id,
+    recommended_user_id,
+    recommendation_score,
+    common_companies,
+    common_roles,
+    common_schools,
+    recommendation_reason
+FROM aggregates.connection_recommendations
+ORDER BY recommendation_score DESC
+LIMIT 500;"""
+    },
+    "graph_connection_recommendations_for_user": {
+        "name": "Connection Recommendations for User",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["user_id"],
+        "cache_ttl": 60,
+        "source_tables": ["aggregates.connection_recommendations"],
+        "query": """-- Fallback while the in-process graph index (graph_index.py) is loading
+SELECT 
+    user_id,
+    recommended_user_id,
+    recommendation_score,
+    common_companies,
+    common_roles,
+    common_schools,
+    recommendation_reason
+FROM aggregates.connection_recommendations
+WHERE user_id = %(user_id)s
+ORDER BY recommendation_score DESC, recommended_user_id
+LIMIT 50;"""
+    },
+    "graph_company_network_for_company": {
+        "name": "Company Network for Company",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["company_ids"],
+        "cache_ttl": 60,
+        "source_tables": ["aggregates.company_network_map"],
+        "query": """-- company_ids: ids matching the requested name (company_search.py)
+SELECT 
+    company_id_1,
+    company_id_2,
+    company_name_1,
+    company_name_2,
+    shared_employee_count,
+    network_strength_score
+FROM aggregates.company_network_map
+WHERE company_id_1 = ANY(%(company_ids)s) 
+   OR company_id_2 = ANY(%(company_ids)s)
+ORDER BY shared_employee_count DESC, company_id_1, company_id_2
+LIMIT 100;"""
+    },
+    "graph_skills_matching": {
+        "name": "Skills Matching Scores",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": [],
+        "cache_ttl": 300,
+        "source_tables": ["aggregates.skills_matching_scores"],
+        "query": """SELECT 
+    user_id,
+    role_id,
+    role_title,
+    experience_years,
+    proficiency_score,
+    similar_user_count
+FROM aggregates.skills_matching_scores
+ORDER BY proficiency_score DESC
+LIMIT 500;"""
+    },
+    "graph_skills_matching_for_user": {
+        "name": "Skills Matching for User",
+        "database": "Analytics DB",
+        "target": "analytics",
+        "params": ["user_id"],
+        "cache_ttl": 60,
+        "source_tables": ["aggregates.skills_matching_scores"],
+        "query": """-- Fallback while the in-process graph index (graph_index.py) is loading
+SELECT 
+    user_id,
+    role_id,
+    role_title,
+    experience_years,
+    proficiency_score,
+    similar_user_count
+FROM aggregates.skills_matching_scores
+WHERE user_id = %(user_id)s
+ORDER BY proficiency_score DESC, role_id;"""
     }
 }
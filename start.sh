@@ -1,8 +1,10 @@
 #!/bin/bash
 
-# Start Flask app in background with auto-reload and ngrok tunnel
-# Usage: ./start.sh [prod|uat|dev|kube]
+# Start the dashboard in background (gunicorn, see gunicorn.conf.py) and ngrok tunnel
+# Usage: ./start.sh [prod|uat|dev|kube|local]
 # Default: prod
+# SERVER=flask ./start.sh uat runs the Flask development server (auto-reload, debugger) instead
+# Graceful reload after changing .env: ./reload.sh
 
 PID_FILE="flask_app.pid"
 NGROK_PID_FILE="ngrok.pid"
@@ -13,9 +15,9 @@ NGROK_LOG_FILE="ngrok.log"
 ENV=${1:-prod}
 
 # Validate environment
-if [ "$ENV" != "prod" ] && [ "$ENV" != "uat" ] && [ "$ENV" != "dev" ] && [ "$ENV" != "kube" ]; then
+if [ "$ENV" != "prod" ] && [ "$ENV" != "uat" ] && [ "$ENV" != "dev" ] && [ "$ENV" != "kube" ] && [ "$ENV" != "local" ]; then
     echo "❌ Invalid environment: $ENV"
-    echo "Usage: ./start.sh [prod|uat|dev|kube]"
+    echo "Usage: ./start.sh [prod|uat|dev|kube|local]"
     echo "Default: prod"
     exit 1
 fi
@@ -43,9 +45,20 @@ fi
 echo "✅ Environment set to: $ENV"
 echo ""
 
-# Start Flask app in background with caffeinate to prevent sleep
-echo "Starting Flask app in background with caffeinate..."
-nohup caffeinate -i python3 app.py > "$LOG_FILE" 2>&1 &
+SERVER=${SERVER:-gunicorn}
+if [ "$SERVER" == "flask" ]; then
+    SERVER_CMD="python3 app.py"
+else
+    SERVER_CMD="gunicorn -c gunicorn.conf.py wsgi:app"
+fi
+
+# Start the server in background (with caffeinate on macOS to prevent sleep)
+echo "Starting $SERVER server in background..."
+if [[ "$OSTYPE" == "darwin"* ]]; then
+    nohup caffeinate -i $SERVER_CMD > "$LOG_FILE" 2>&1 &
+else
+    nohup $SERVER_CMD > "$LOG_FILE" 2>&1 &
+fi
 APP_PID=$!
 
 # Save PID to file
@@ -189,7 +189,7 @@ function showSQLModal(queryId) {
     
     // Set modal content
     document.getElementById('sqlModalTitle').textContent = queryData.name;
-    document.getElementById('sqlDatabase').textContent = '📦 Database: ' + queryData.database;
+    document.getElementById('sqlDatabase').textContent = '📦 Database: ' + queryData.database + describeExecution(queryData);
     document.getElementById('sqlQueryCode').textContent = queryData.query;
     
     // Store current query for copy function
@@ -199,6 +199,15 @@ function showSQLModal(queryId) {
     document.getElementById('sqlModal').style.display = 'flex';
 }
 
+// Target, bound parameters and cache lifetime of an executable registry entry
+function describeExecution(queryData) {
+    if (!queryData.target) {
+        return '';
+    }
+    const params = queryData.params && queryData.params.length ? queryData.params.join(', ') : 'none';
+    return ' · Target: ' + queryData.target + ' · Params: ' + params + ' · Cached: ' + queryData.cache_ttl + 's';
+}
+
 // Close SQL modal
 function closeSQLModal() {
     document.getElementById('sqlModal').style.display = 'none';
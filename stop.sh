@@ -20,9 +20,27 @@ if ! ps -p "$APP_PID" > /dev/null 2>&1; then
     exit 0
 fi
 
+# gunicorn (./start.sh default): stop the master gracefully, letting workers finish their requests.
+# A master busy with a reload (./reload.sh) handles the signal once its snapshots are loaded
+GUNICORN_PID_FILE="gunicorn.pid"
+if [ -f "$GUNICORN_PID_FILE" ]; then
+    GUNICORN_PID=$(cat "$GUNICORN_PID_FILE")
+    echo "Stopping gunicorn (PID: $GUNICORN_PID)..."
+    kill "$GUNICORN_PID" 2>/dev/null
+    for _ in $(seq 90); do
+        ps -p "$GUNICORN_PID" > /dev/null 2>&1 || break
+        sleep 1
+    done
+    if ps -p "$GUNICORN_PID" > /dev/null 2>&1; then
+        echo "gunicorn didn't stop, forcing..."
+        kill -9 "$GUNICORN_PID"
+    fi
+    rm -f "$GUNICORN_PID_FILE"
+fi
+
 # Kill the process
 echo "Stopping Flask app (PID: $APP_PID)..."
-kill "$APP_PID"
+kill "$APP_PID" 2>/dev/null
 
 # Wait for process to stop
 sleep 2
@@ -1,10 +1,10 @@
 #!/bin/bash
 
 # Environment switcher for ChemLink Analytics Dashboard
-# Usage: ./switch_env.sh [uat|prod|dev]
+# Usage: ./switch_env.sh [uat|prod|dev|local]
 
 if [ -z "$1" ]; then
-    echo "Usage: ./switch_env.sh [uat|prod|dev]"
+    echo "Usage: ./switch_env.sh [uat|prod|dev|local]"
     echo ""
     echo "Current environment:"
     grep "^APP_ENV=" .env | sed 's/APP_ENV=/  /'
@@ -13,9 +13,9 @@ fi
 
 ENV=$1
 
-if [ "$ENV" != "uat" ] && [ "$ENV" != "prod" ] && [ "$ENV" != "dev" ]; then
+if [ "$ENV" != "uat" ] && [ "$ENV" != "prod" ] && [ "$ENV" != "dev" ] && [ "$ENV" != "local" ]; then
     echo "❌ Invalid environment: $ENV"
-    echo "Valid options: uat, prod, dev"
+    echo "Valid options: uat, prod, dev, local"
     exit 1
 fi
 
@@ -43,6 +43,9 @@ case $ENV in
     dev)
         echo "  ChemLink: chemlink-service-dev (K8s cluster - may not work)"
         ;;
+    local)
+        echo "  ChemLink, Engagement, Kratos: synthetic databases on LOCAL_DB_HOST (synthetic_data.py)"
+        ;;
 esac
 echo ""
 echo "🔄 Restart the server for changes to take effect:"
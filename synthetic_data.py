@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generator
+Builds local ChemLink, Engagement and Kratos source databases with realistic,
+skewed data at a chosen scale, for load testing without touching UAT/PROD
+
+Scale 1 is roughly today's UAT (2,000 persons); 10, 100 and 1000 multiply
+every per-person table, while reference tables (companies, roles, schools...)
+grow with the square root of the scale. Distributions are skewed the way
+real usage is:
+    - a few power users (finders first) produce most posts, comments, votes,
+      views and sessions
+    - a few popular companies, roles and posts attract most links
+    - signups lean towards recent months; logins follow working hours
+
+Tables mirror the source schemas the dashboard reads (design-docs ERDs and
+schema_comparison_data_*.json), with primary keys and the unique keys prod
+has and no other indexes. They are dropped and recreated on every run, loaded
+with COPY, then ANALYZEd. Output is deterministic for a given --seed.
+
+The databases come from the `local` APP_ENV in db_config.py (LOCAL_DB_HOST,
+LOCAL_*_DB_NAME; created if missing). Point the app at them with
+`./switch_env.sh local`, then `python etl_sync.py --full` fills the analytics
+DB from them.
+
+Usage:
+    python synthetic_data.py                    # Scale 1
+    python synthetic_data.py --scale 100
+    python synthetic_data.py --scale 10 --seed 7 --days 365
+    python synthetic_data.py --scale 1000 --vector-dim 0   # NULL embedding vectors
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+from psycopg2 import sql
+
+from db_config import (
+    get_chemlink_local_db_connection,
+    get_engagement_local_db_connection,
+    get_kratos_local_db_connection,
+)
+
+BASE_PERSONS = 2000
+ENGAGEMENT_ADOPTION = 0.3  # share of ChemLink persons with an Engagement account
+FINDER_SHARE = 0.02
+DELETED_SHARE = 0.03
+CHUNK_SIZE = 1024 * 1024
+
+# Reference table sizes at scale 1 (grow with sqrt(scale)); None = fixed list
+REFERENCE_SIZES = {
+    'locations': 120, 'companies': 400, 'roles': 300, 'projects': 200, 'schools': 250,
+}
+
+# Average rows per ChemLink person (engagement tables: per Engagement person)
+PER_PERSON = {
+    'experiences': 2.5, 'education': 1.3, 'person_languages': 1.2, 'embeddings': 3.0,
+    'view_access': 10, 'query_votes': 1.5, 'query_embeddings': 3, 'collections': 0.15,
+    'posts': 8, 'comments': 24, 'sessions': 15,
+}
+
+DEGREES = [('High School Diploma', 'secondary'), ('Associate', 'undergraduate'),
+           ('Bachelor of Science', 'undergraduate'), ('Bachelor of Arts', 'undergraduate'),
+           ('Bachelor of Engineering', 'undergraduate'), ('Master of Science', 'graduate'),
+           ('Master of Engineering', 'graduate'), ('MBA', 'graduate'), ('PhD', 'doctorate'),
+           ('Postdoctoral', 'doctorate'), ('Certificate', 'other'), ('Diploma', 'other')]
+LANGUAGES = [('English', 'en'), ('Spanish', 'es'), ('German', 'de'), ('French', 'fr'), ('Chinese', 'zh'),
+             ('Japanese', 'ja'), ('Portuguese', 'pt'), ('Hindi', 'hi'), ('Korean', 'ko'), ('Italian', 'it'),
+             ('Dutch', 'nl'), ('Arabic', 'ar'), ('Russian', 'ru'), ('Polish', 'pl'), ('Turkish', 'tr')]
+COUNTRIES = ['United States', 'Germany', 'India', 'China', 'United Kingdom', 'Japan', 'Brazil', 'France',
+             'Netherlands', 'Switzerland', 'Singapore', 'Canada', 'South Korea', 'Belgium', 'Mexico',
+             'Spain', 'Italy', 'Australia', 'Philippines', 'Saudi Arabia']
+ROLE_WORDS = ['Process', 'Chemical', 'Analytical', 'R&D', 'Quality', 'Polymer', 'Formulation', 'Regulatory',
+              'Production', 'Safety', 'Catalysis', 'Materials']
+ROLE_TITLES = ['Engineer', 'Chemist', 'Scientist', 'Manager', 'Technician', 'Director', 'Specialist',
+               'Lead', 'Consultant', 'Analyst']
+COMPANY_WORDS = ['Chem', 'Poly', 'Bio', 'Petro', 'Agri', 'Nano', 'Catal', 'Synth', 'Hydro', 'Carbo']
+COMPANY_SUFFIXES = ['Industries', 'Labs', 'Corp', 'Materials', 'Solutions', 'Group', 'Chemicals', 'AG']
+FIRST_NAMES = ['Maria', 'James', 'Wei', 'Priya', 'Carlos', 'Anna', 'Yuki', 'Ahmed', 'Sofia', 'Lukas',
+               'Olivia', 'Rahul', 'Chen', 'Elena', 'David', 'Fatima', 'Jonas', 'Ana', 'Kenji', 'Grace']
+LAST_NAMES = ['Smith', 'Garcia', 'Wang', 'Patel', 'Muller', 'Kim', 'Santos', 'Tanaka', 'Rossi', 'Novak',
+              'Silva', 'Chen', 'Khan', 'Dubois', 'Johnson', 'Lopez', 'Schmidt', 'Singh', 'Ito', 'Costa']
+POST_TYPES = [('text', 0.6), ('link', 0.2), ('image', 0.15), ('video', 0.05)]
+INTENTS = ['find_expert', 'hiring', 'consulting', 'partnership', 'research', None]
+PRIVACY = [('private', 0.6), ('public', 0.3), ('shared', 0.1)]
+# Relative login volume per UTC hour (working hours across EU/US)
+HOUR_WEIGHTS = [2, 1, 1, 1, 2, 3, 5, 7, 9, 10, 10, 9, 8, 9, 10, 10, 9, 7, 5, 4, 3, 3, 2, 2]
+
+TIMESTAMPS = "created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ, deleted_at TIMESTAMPTZ"
+
+SCHEMAS = {
+    'chemlink': [
+        ('locations', f"id BIGINT, country VARCHAR, city VARCHAR, {TIMESTAMPS}", ['id']),
+        ('companies', f"id BIGINT, name VARCHAR, description TEXT, {TIMESTAMPS}", ['id']),
+        ('roles', f"id BIGINT, title VARCHAR, description TEXT, {TIMESTAMPS}", ['id']),
+        ('projects', f"id BIGINT, name VARCHAR, description TEXT, {TIMESTAMPS}", ['id']),
+        ('schools', f"id BIGINT, name VARCHAR, location VARCHAR, {TIMESTAMPS}", ['id']),
+        ('degrees', f"id BIGINT, name VARCHAR, type VARCHAR, {TIMESTAMPS}", ['id']),
+        ('languages', f"id BIGINT, name VARCHAR, code VARCHAR, {TIMESTAMPS}", ['id']),
+        ('persons', "id BIGINT, person_id UUID, chemlink_id UUID, kratos_id UUID, first_name VARCHAR, "
+                    "last_name VARCHAR, email VARCHAR, linked_in_url VARCHAR, headline_description TEXT, "
+                    "career_goals TEXT, location_id BIGINT, company_id BIGINT, role_id BIGINT, "
+                    f"has_finder BOOLEAN, {TIMESTAMPS}", ['id'], ['person_id']),
+        ('experiences', "id BIGINT, person_id BIGINT, company_id BIGINT, project_id BIGINT, role_id BIGINT, "
+                        "location_id BIGINT, description TEXT, type VARCHAR, start_date VARCHAR, "
+                        f"end_date VARCHAR, {TIMESTAMPS}", ['id']),
+        ('education', "id BIGINT, person_id BIGINT, school_id BIGINT, degree_id BIGINT, field_of_study VARCHAR, "
+                      f"start_date VARCHAR, end_date VARCHAR, {TIMESTAMPS}", ['id']),
+        ('person_languages', f"id BIGINT, person_id BIGINT, language_id BIGINT, proficiency VARCHAR, {TIMESTAMPS}",
+         ['id']),
+        ('embeddings', "id BIGINT, person_id BIGINT, embedded_text TEXT, embedded_vector {vector}, type VARCHAR, "
+                       f"start_date DATE, end_date DATE, {TIMESTAMPS}", ['id']),
+        ('collections', f"id BIGINT, person_id BIGINT, name VARCHAR, privacy VARCHAR, {TIMESTAMPS}", ['id']),
+        ('collection_profiles', "id BIGINT, collection_id BIGINT, person_id BIGINT, added_by BIGINT, rank INTEGER, "
+                                f"{TIMESTAMPS}", ['id']),
+        ('collection_collaborators', "id BIGINT, collection_id BIGINT, person_id BIGINT, added_by BIGINT, "
+                                     f"access_type VARCHAR, {TIMESTAMPS}", ['id']),
+        ('query_embeddings', f"id BIGINT, intent VARCHAR, embedded_text TEXT, embedded_vector {{vector}}, {TIMESTAMPS}",
+         ['id']),
+        # No updated_at/deleted_at on query_votes (see ANALYTICS_DB_CONTEXT.md)
+        ('query_votes', "id BIGINT, query_embedding_id BIGINT, voter_id BIGINT, type VARCHAR, created_at TIMESTAMPTZ",
+         ['id']),
+        ('view_access', f"id BIGINT, user_id UUID, person_id BIGINT, {TIMESTAMPS}", ['id']),
+    ],
+    'engagement': [
+        ('persons', "id UUID, external_id VARCHAR, first_name VARCHAR NOT NULL, last_name VARCHAR NOT NULL, "
+                    f"email VARCHAR NOT NULL, company_name VARCHAR, role_title VARCHAR, {TIMESTAMPS}",
+         ['id'], ['external_id']),
+        ('groups', f"id UUID, name VARCHAR NOT NULL, description TEXT, created_by UUID, {TIMESTAMPS}", ['id']),
+        ('group_members', "id UUID, group_id UUID NOT NULL, person_id UUID NOT NULL, role VARCHAR NOT NULL, "
+                          f"confirmed_at TIMESTAMPTZ, {TIMESTAMPS}", ['id']),
+        ('posts', "id UUID, person_id UUID NOT NULL, group_id UUID, type VARCHAR NOT NULL, content TEXT, "
+                  "link_url VARCHAR, media_keys JSONB, status VARCHAR, link_has_preview BOOLEAN NOT NULL, "
+                  f"{TIMESTAMPS}", ['id']),
+        ('comments', "id UUID, post_id UUID NOT NULL, person_id UUID NOT NULL, parent_comment_id UUID, "
+                     f"content TEXT NOT NULL, {TIMESTAMPS}", ['id']),
+        ('mentions', "id UUID, post_id UUID, comment_id UUID, mentioned_person_id UUID NOT NULL, "
+                     "mentioned_by_person_id UUID NOT NULL, created_at TIMESTAMPTZ, deleted_at TIMESTAMPTZ", ['id']),
+    ],
+    'kratos': [
+        ('identities', "id UUID, schema_id VARCHAR, traits JSONB, state VARCHAR, created_at TIMESTAMPTZ, "
+                       "updated_at TIMESTAMPTZ", ['id']),
+        ('sessions', "id UUID, identity_id UUID, authenticated_at TIMESTAMPTZ, issued_at TIMESTAMPTZ, "
+                     "expires_at TIMESTAMPTZ, active BOOLEAN, created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ", ['id']),
+    ],
+}
+
+CONNECTIONS = {
+    'chemlink': (get_chemlink_local_db_connection, 'LOCAL_CHEMLINK_DB_NAME', 'chemlink_local'),
+    'engagement': (get_engagement_local_db_connection, 'LOCAL_ENGAGEMENT_DB_NAME', 'engagement_local'),
+    'kratos': (get_kratos_local_db_connection, 'LOCAL_KRATOS_DB_NAME', 'kratos_local'),
+}
+
+# Disjoint uuid ranges per entity, so ids can be recomputed from an index
+UUID_SPACES = {'chemlink_person': 1, 'engagement_person': 2, 'group': 3, 'group_member': 4, 'post': 5,
+               'comment': 6, 'mention': 7, 'identity': 8, 'session': 9, 'viewer': 10}
+
+
+# ----------------------------------------------------------------------------
+# COPY plumbing
+# ----------------------------------------------------------------------------
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+    return str(value)
+
+
+class RowStream:
+    """File-like COPY FROM STDIN (text format) source over a row iterator"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._pending = ''
+        self.count = 0
+
+    def read(self, size=-1):
+        size = CHUNK_SIZE if size is None or size < 0 else size
+        parts, length = [self._pending], len(self._pending)
+        for row in self._rows:
+            line = '\t'.join(map(_copy_value, row)) + '\n'
+            parts.append(line)
+            length += len(line)
+            self.count += 1
+            if length >= size:
+                break
+        data = ''.join(parts)
+        self._pending = data[size:]
+        return data[:size]
+
+    readline = read
+
+
+def ensure_database(name):
+    """Create a local database if it does not exist yet"""
+    conn = psycopg2.connect(
+        host=os.getenv('LOCAL_DB_HOST', 'localhost'),
+        port=os.getenv('LOCAL_DB_PORT', 5432),
+        database='postgres',
+        user=os.getenv('LOCAL_DB_USER', 'postgres'),
+        password=os.getenv('LOCAL_DB_PASSWORD', 'postgres'),
+    )
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+            if cursor.fetchone() is None:
+                cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name)))
+                print(f"✓ Created database {name}")
+    finally:
+        conn.close()
+
+
+def vector_type(conn, dim):
+    """pgvector column type when the extension is available, else REAL[]"""
+    if dim <= 0:
+        return 'REAL[]', False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")
+        if cursor.fetchone():
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            return f'VECTOR({dim})', True
+    return 'REAL[]', False
+
+
+def create_tables(conn, database, vector):
+    with conn.cursor() as cursor:
+        for spec in SCHEMAS[database]:
+            cursor.execute(f"DROP TABLE IF EXISTS {spec[0]} CASCADE")
+            cursor.execute(f"CREATE TABLE {spec[0]} ({spec[1].format(vector=vector)})")
+    conn.commit()
+
+
+def add_keys(conn, database):
+    """Primary and unique keys after the load (faster than maintaining them during COPY)"""
+    with conn.cursor() as cursor:
+        for spec in SCHEMAS[database]:
+            table, keys = spec[0], spec[2]
+            cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(keys)})")
+            for unique in spec[3:]:
+                cursor.execute(f"ALTER TABLE {table} ADD UNIQUE ({', '.join(unique)})")
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    conn.autocommit = False
+
+
+def load(conn, table, columns, rows):
+    started = time.time()
+    stream = RowStream(rows)
+    with conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=CHUNK_SIZE)
+    conn.commit()
+    print(f"  ✓ {table}: {stream.count:,} rows in {time.time() - started:.1f}s")
+    return stream.count
+
+
+# ----------------------------------------------------------------------------
+# Generation
+# ----------------------------------------------------------------------------
+
+class Generator:
+    def __init__(self, scale, seed, days, vector_dim):
+        self.scale = scale
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.start = self.now - timedelta(days=days)
+        self.span = (self.now - self.start).total_seconds()
+        self.vector_dim = vector_dim
+        self.pgvector = False
+        self.persons = int(BASE_PERSONS * scale)
+        self.reference = {name: max(5, int(size * math.sqrt(scale))) for name, size in REFERENCE_SIZES.items()}
+
+    # -- helpers -------------------------------------------------------------
+
+    def skewed(self, n, power=3.0):
+        """Index in [0, n) with a heavy head: low indexes are picked far more often"""
+        return min(int(n * self.rng.random() ** power), n - 1)
+
+    def weighted(self, choices):
+        r, total = self.rng.random(), 0.0
+        for value, weight in choices:
+            total += weight
+            if r < total:
+                return value
+        return choices[-1][0]
+
+    def uuid(self, space, index):
+        digits = f"{UUID_SPACES[space]:08x}{self.seed % (1 << 32):08x}{index:016x}"
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+    def ts(self, epoch):
+        return datetime.fromtimestamp(epoch, timezone.utc)
+
+    def after(self, epoch, mean_hours=None):
+        """Timestamp after `epoch` (uniform until now, or exponential with the given mean)"""
+        now = self.now.timestamp()
+        if mean_hours is None:
+            return epoch + (now - epoch) * self.rng.random()
+        return min(epoch + self.rng.expovariate(1 / (mean_hours * 3600)), now)
+
+    def count(self, mean):
+        """Per-person row count with the given mean (geometric-ish, capped)"""
+        return min(int(self.rng.expovariate(1 / mean) + 0.5), int(mean * 8) + 1) if mean > 0 else 0
+
+    def deleted(self, created):
+        return self.ts(self.after(created)) if self.rng.random() < DELETED_SHARE else None
+
+    def vector(self):
+        if not self.vector_dim:
+            return None
+        values = ','.join(f"{self.rng.uniform(-1, 1):.4f}" for _ in range(self.vector_dim))
+        return f"[{values}]" if self.pgvector else f"{{{values}}}"
+
+    # -- population ----------------------------------------------------------
+
+    def plan_people(self):
+        """Per-person attributes every later table refers to (kept as compact arrays)"""
+        n = self.persons
+        self.created = array('d')
+        for _ in range(n):
+            # Growth: signups lean towards recent months
+            self.created.append(self.start.timestamp() + self.span * (1 - self.rng.random() ** 1.6))
+        self.created = array('d', sorted(self.created))
+        self.finder = bytearray(self.rng.random() < FINDER_SHARE for _ in range(n))
+        self.engaged = bytearray(
+            self.rng.random() < (0.8 if self.finder[i] else ENGAGEMENT_ADOPTION) for i in range(n))
+        # Activity order: finders first, so skewed picks make them the power users
+        finders = [i for i in range(n) if self.finder[i]]
+        others = [i for i in range(n) if not self.finder[i]]
+        self.rng.shuffle(finders)
+        self.rng.shuffle(others)
+        self.active_order = array('l', finders + others)
+        self.engagement_ids = array('l', (i for i in self.active_order if self.engaged[i]))
+        self.engagement_index = {person: k for k, person in enumerate(i for i in range(n) if self.engaged[i])}
+
+    def career(self, person):
+        """Deterministic experiences of one person: [(company, role, project, location, start, end)]"""
+        rng = random.Random(self.seed * 1000003 + person)
+        jobs = self.count(PER_PERSON['experiences'])
+        year = 1995 + rng.randint(0, 25)
+        month = rng.randint(1, 12)
+        result = []
+        for k in range(jobs):
+            company = min(int(self.reference['companies'] * rng.random() ** 2.5), self.reference['companies'] - 1)
+            role = min(int(self.reference['roles'] * rng.random() ** 2), self.reference['roles'] - 1)
+            project = rng.randrange(self.reference['projects']) if rng.random() < 0.4 else None
+            location = min(int(self.reference['locations'] * rng.random() ** 2), self.reference['locations'] - 1)
+            start = (year, month)
+            year += rng.randint(1, 5)
+            month = rng.randint(1, 12)
+            current = k == jobs - 1 and rng.random() < 0.7
+            end = None if current or year > self.now.year else (year, month)
+            result.append((company + 1, role + 1, project + 1 if project is not None else None, location + 1,
+                           start, end))
+            if end is None:
+                break
+        return result
+
+    # -- ChemLink ------------------------------------------------------------
+
+    def reference_rows(self, table):
+        size = self.reference.get(table)
+        created = self.start.timestamp()
+        if table == 'locations':
+            for i in range(size):
+                yield (i + 1, COUNTRIES[min(int(len(COUNTRIES) * self.rng.random() ** 1.5), len(COUNTRIES) - 1)],
+                       f"City {i + 1}", self.ts(created), self.ts(created), None)
+        elif table == 'companies':
+            for i in range(size):
+                name = f"{self.rng.choice(COMPANY_WORDS)}{self.rng.choice(COMPANY_WORDS).lower()} " \
+                       f"{self.rng.choice(COMPANY_SUFFIXES)} {i + 1}"
+                yield (i + 1, name, None, self.ts(created), self.ts(created), None)
+        elif table == 'roles':
+            for i in range(size):
+                title = f"{ROLE_WORDS[i % len(ROLE_WORDS)]} {ROLE_TITLES[(i // len(ROLE_WORDS)) % len(ROLE_TITLES)]}"
+                if i >= len(ROLE_WORDS) * len(ROLE_TITLES):
+                    title += f" {i // (len(ROLE_WORDS) * len(ROLE_TITLES)) + 1}"
+                yield (i + 1, title, None, self.ts(created), self.ts(created), None)
+        elif table == 'projects':
+            for i in range(size):
+                yield (i + 1, f"Project {i + 1}", None, self.ts(created), self.ts(created), None)
+        elif table == 'schools':
+            for i in range(size):
+                yield (i + 1, f"University {i + 1}", self.rng.choice(COUNTRIES), self.ts(created), self.ts(created),
+                       None)
+        elif table == 'degrees':
+            for i, (name, kind) in enumerate(DEGREES):
+                yield (i + 1, name, kind, self.ts(created), self.ts(created), None)
+        elif table == 'languages':
+            for i, (name, code) in enumerate(LANGUAGES):
+                yield (i + 1, name, code, self.ts(created), self.ts(created), None)
+
+    def person_rows(self):
+        for i in range(self.persons):
+            created = self.created[i]
+            jobs = self.career(i)
+            current = jobs[-1] if jobs else (None, None, None, None, None, None)
+            updated = self.after(created) if self.rng.random() < 0.4 else created
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            complete = self.rng.random()
+            yield (i + 1, self.uuid('chemlink_person', i), str(uuid.UUID(int=self.rng.getrandbits(128), version=4)),
+                   self.uuid('identity', i), first, last, f"{first.lower()}.{last.lower()}.{i + 1}@example.com",
+                   f"https://linkedin.com/in/user{i + 1}" if complete > 0.5 else None,
+                   f"{first}'s headline" if complete > 0.3 else None,
+                   "Grow in R&D leadership" if complete > 0.8 else None,
+                   current[3] if complete > 0.2 else None, current[0], current[1],
+                   bool(self.finder[i]), self.ts(created), self.ts(updated), self.deleted(created))
+
+    def experience_rows(self):
+        next_id = 1
+        for i in range(self.persons):
+            created = self.created[i]
+            for company, role, project, location, start, end in self.career(i):
+                yield (next_id, i + 1, company, project, role, location, None,
+                       'full_time' if self.rng.random() < 0.85 else 'contract',
+                       f"{start[0]:04d}-{start[1]:02d}-01", f"{end[0]:04d}-{end[1]:02d}-01" if end else None,
+                       self.ts(created), self.ts(created), self.deleted(created))
+                next_id += 1
+
+    def per_person_rows(self, table):
+        """education, person_languages and embeddings: a few rows per person"""
+        next_id = 1
+        for i in range(self.persons):
+            created = self.created[i]
+            for _ in range(self.count(PER_PERSON[table])):
+                if table == 'education':
+                    start = 1990 + self.rng.randint(0, 30)
+                    row = (next_id, i + 1, self.skewed(self.reference['schools'], 2) + 1,
+                           self.skewed(len(DEGREES), 1.5) + 1, 'Chemistry', f"{start}-09-01",
+                           f"{start + self.rng.randint(1, 6)}-06-01")
+                elif table == 'person_languages':
+                    row = (next_id, i + 1, self.skewed(len(LANGUAGES), 3) + 1,
+                           self.rng.choice(['native', 'fluent', 'intermediate', 'basic']))
+                else:
+                    row = (next_id, i + 1, f"Experience summary {next_id}", self.vector(),
+                           self.rng.choice(['experience', 'education', 'profile']), None, None)
+                yield row + (self.ts(created), self.ts(created), self.deleted(created))
+                next_id += 1
+
+    def actor(self, pool=None, power=3.0):
+        """A person index, skewed towards the power users"""
+        pool = self.active_order if pool is None else pool
+        return pool[self.skewed(len(pool), power)]
+
+    def activity_rows(self, table):
+        total = int(PER_PERSON[table] * self.persons)
+        if table == 'view_access':
+            for k in range(total):
+                person = self.actor()
+                at = self.ts(self.after(self.created[person]))
+                yield (k + 1, self.uuid('viewer', self.actor(power=2)), person + 1, at, at,
+                       at if self.rng.random() < DELETED_SHARE else None)
+        elif table == 'query_embeddings':
+            for k in range(total):
+                at = self.ts(self.start.timestamp() + self.span * (1 - self.rng.random() ** 1.6))
+                yield (k + 1, self.rng.choice(INTENTS), f"search {k + 1}", self.vector(), at, at, None)
+        elif table == 'query_votes':
+            queries = int(PER_PERSON['query_embeddings'] * self.persons)
+            for k in range(total):
+                person = self.actor()
+                yield (k + 1, self.rng.randrange(queries) + 1, person + 1,
+                       'upvote' if self.rng.random() < 0.8 else 'downvote',
+                       self.ts(self.after(self.created[person])))
+        elif table == 'collections':
+            self.collection_owners = array('l')
+            for k in range(total):
+                person = self.actor()
+                self.collection_owners.append(person)
+                created = self.after(self.created[person])
+                yield (k + 1, person + 1, f"Collection {k + 1}", self.weighted(PRIVACY),
+                       self.ts(created), self.ts(created), self.deleted(created))
+
+    def collection_profile_rows(self):
+        next_id = 1
+        for k, owner in enumerate(self.collection_owners):
+            for rank in range(self.count(10)):
+                created = self.ts(self.after(self.created[owner]))
+                yield (next_id, k + 1, self.actor(power=2) + 1, owner + 1, rank + 1, created, created, None)
+                next_id += 1
+
+    def collaborator_rows(self):
+        next_id = 1
+        for k, owner in enumerate(self.collection_owners):
+            if self.rng.random() >= 0.25:  # most collections are never shared
+                continue
+            for _ in range(self.count(2)):
+                created = self.ts(self.after(self.created[owner]))
+                yield (next_id, k + 1, self.actor(power=2) + 1, owner + 1,
+                       'editor' if self.rng.random() < 0.3 else 'viewer', created, created, None)
+                next_id += 1
+
+    # -- Engagement ----------------------------------------------------------
+
+    def engagement_person_rows(self):
+        for person, index in self.engagement_index.items():
+            created = self.after(self.created[person], mean_hours=24 * 30)
+            jobs = self.career(person)
+            # external_id holds the ChemLink uuid, or for older accounts the numeric id
+            external = self.uuid('chemlink_person', person) if self.rng.random() < 0.9 else str(person + 1)
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            yield (self.uuid('engagement_person', index), external, first, last,
+                   f"{first.lower()}.{last.lower()}.{person + 1}@example.com",
+                   f"Company {jobs[-1][0]}" if jobs else None, None,
+                   self.ts(created), self.ts(created), self.deleted(created))
+
+    def engagement_actor(self, power=3.0):
+        person = self.actor(self.engagement_ids, power)
+        return person, self.uuid('engagement_person', self.engagement_index[person])
+
+    def group_rows(self):
+        self.groups = max(5, int(25 * math.sqrt(self.scale)))
+        for g in range(self.groups):
+            person, owner = self.engagement_actor()
+            created = self.ts(self.after(self.created[person]))
+            yield (self.uuid('group', g), f"Group {g + 1}", None, owner, created, created, None)
+
+    def group_member_rows(self):
+        for k in range(int(0.2 * len(self.engagement_ids))):
+            person, member = self.engagement_actor(power=1.5)
+            created = self.ts(self.after(self.created[person]))
+            yield (self.uuid('group_member', k), self.uuid('group', self.skewed(self.groups, 2)), member,
+                   'admin' if self.rng.random() < 0.05 else 'member', created, created, created, None)
+
+    def post_rows(self):
+        self.post_created = array('d')
+        for k in range(int(PER_PERSON['posts'] * len(self.engagement_ids))):
+            person, author = self.engagement_actor()
+            created = self.after(self.created[person])
+            self.post_created.append(created)
+            kind = self.weighted(POST_TYPES)
+            group = self.uuid('group', self.skewed(self.groups, 2)) if self.rng.random() < 0.1 else None
+            yield (self.uuid('post', k), author, group, kind, f"Post {k + 1}",
+                   f"https://example.com/{k + 1}" if kind == 'link' else None,
+                   '["media/1.jpg"]' if kind in ('image', 'video') else None, 'published',
+                   kind == 'link' and self.rng.random() < 0.7,
+                   self.ts(created), self.ts(created), self.deleted(created))
+
+    def comment_rows(self):
+        posts = len(self.post_created)
+        for k in range(int(PER_PERSON['comments'] * len(self.engagement_ids))):
+            post = self.skewed(posts, 2.5)  # popular posts get most comments
+            _, author = self.engagement_actor(power=2.5)
+            created = self.after(self.post_created[post], mean_hours=36)
+            parent = self.uuid('comment', self.rng.randrange(k)) if k and self.rng.random() < 0.15 else None
+            yield (self.uuid('comment', k), self.uuid('post', post), author, parent, f"Comment {k + 1}",
+                   self.ts(created), self.ts(created), self.deleted(created))
+
+    def mention_rows(self):
+        posts = len(self.post_created)
+        for k in range(int(0.1 * posts)):
+            post = self.rng.randrange(posts)
+            _, mentioned = self.engagement_actor(power=2)
+            _, by = self.engagement_actor()
+            yield (self.uuid('mention', k), self.uuid('post', post), None, mentioned, by,
+                   self.ts(self.post_created[post]), None)
+
+    # -- Kratos --------------------------------------------------------------
+
+    def identity_rows(self):
+        for i in range(self.persons):
+            created = self.ts(self.created[i])
+            yield (self.uuid('identity', i), 'default', f'{{"email": "user{i + 1}@example.com"}}', 'active',
+                   created, created)
+
+    def session_rows(self):
+        hours = [(h, w / sum(HOUR_WEIGHTS)) for h, w in enumerate(HOUR_WEIGHTS)]
+        for k in range(int(PER_PERSON['sessions'] * self.persons)):
+            person = self.actor()
+            at = self.ts(self.after(self.created[person]))
+            at = at.replace(hour=self.weighted(hours))
+            if at > self.now:
+                at -= timedelta(days=1)
+            yield (self.uuid('session', k), self.uuid('identity', person), at, at, at + timedelta(days=14),
+                   self.rng.random() < 0.2, at, at)
+
+
+def generate(scale, seed, days, vector_dim):
+    gen = Generator(scale, seed, days, vector_dim)
+    started = time.time()
+    print(f"Generating scale {scale:g} ({gen.persons:,} persons, seed {seed})...")
+    gen.plan_people()
+
+    conns = {}
+    for database, (connect, name_var, default_name) in CONNECTIONS.items():
+        ensure_database(os.getenv(name_var, default_name))
+        conns[database] = connect()
+
+    try:
+        vector, gen.pgvector = vector_type(conns['chemlink'], vector_dim)
+        for database, conn in conns.items():
+            create_tables(conn, database, vector)
+
+        def columns(database, table):
+            spec = next(s for s in SCHEMAS[database] if s[0] == table)
+            return [column.split()[0] for column in spec[1].format(vector=vector).split(', ')]
+
+        chem = conns['chemlink']
+        print("ChemLink:")
+        for table in ('locations', 'companies', 'roles', 'projects', 'schools', 'degrees', 'languages'):
+            load(chem, table, columns('chemlink', table), gen.reference_rows(table))
+        load(chem, 'persons', columns('chemlink', 'persons'), gen.person_rows())
+        load(chem, 'experiences', columns('chemlink', 'experiences'), gen.experience_rows())
+        for table in ('education', 'person_languages', 'embeddings'):
+            load(chem, table, columns('chemlink', table), gen.per_person_rows(table))
+        for table in ('view_access', 'query_embeddings', 'query_votes', 'collections'):
+            load(chem, table, columns('chemlink', table), gen.activity_rows(table))
+        load(chem, 'collection_profiles', columns('chemlink', 'collection_profiles'), gen.collection_profile_rows())
+        load(chem, 'collection_collaborators', columns('chemlink', 'collection_collaborators'),
+             gen.collaborator_rows())
+
+        eng = conns['engagement']
+        print("Engagement:")
+        load(eng, 'persons', columns('engagement', 'persons'), gen.engagement_person_rows())
+        load(eng, 'groups', columns('engagement', 'groups'), gen.group_rows())
+        load(eng, 'group_members', columns('engagement', 'group_members'), gen.group_member_rows())
+        load(eng, 'posts', columns('engagement', 'posts'), gen.post_rows())
+        load(eng, 'comments', columns('engagement', 'comments'), gen.comment_rows())
+        load(eng, 'mentions', columns('engagement', 'mentions'), gen.mention_rows())
+
+        kratos = conns['kratos']
+        print("Kratos:")
+        load(kratos, 'identities', columns('kratos', 'identities'), gen.identity_rows())
+        load(kratos, 'sessions', columns('kratos', 'sessions'), gen.session_rows())
+
+        print("Adding keys and analyzing...")
+        for database, conn in conns.items():
+            add_keys(conn, database)
+    finally:
+        for conn in conns.values():
+            conn.close()
+    print(f"\n✓ Scale {scale:g} generated in {time.time() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate skewed synthetic source data in local databases')
+    parser.add_argument('--scale', type=float, default=1, help='Multiple of UAT size: 1, 10, 100, 1000 (default 1)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default 42)')
+    parser.add_argument('--days', type=int, default=730, help='History length in days (default 730)')
+    parser.add_argument('--vector-dim', type=int, default=32,
+                        help='Embedding vector size; 0 leaves vectors NULL (default 32)')
+    args = parser.parse_args()
+    generate(args.scale, args.seed, args.days, args.vector_dim)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Time windows for the growth, activity and Kratos routes
+
+Routes accept ?from=&to=&granularity=hour|day|week|month. Both ends are
+ISO dates or datetimes; `to` is inclusive of the bucket it falls in and
+defaults to now, `from` defaults to the route's usual number of buckets
+before `to`. Windows are normalized to whole buckets (weeks start on Monday,
+as DATE_TRUNC does), so every window is a whole number of hours and is served
+from aggregates.activity_rollup_hourly (maintained by etl_sync.py) with a
+range scan on its primary key, never from the raw event tables. Normalizing
+also makes equivalent requests share one cache entry. The windowed SQL is
+in sql_queries.py (entries with a `window`). Datetimes with an offset are
+converted to ROLLUP_TZ, the zone of the rollup's naive bucket hours.
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+
+from partition_manager import add_months
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# Staged timestamps (and so the rollup's bucket hours) are naive UTC, as the sources store them
+ROLLUP_TZ = timezone.utc
+
+# Upper bound on buckets per request, so response size stays bounded
+MAX_BUCKETS = {'hour': 24 * 92, 'day': 366 * 3, 'week': 52 * 5, 'month': 12 * 10}
+
+# Windows that ended before the current hour only change on late-arriving data
+CLOSED_WINDOW_TTL = 3600
+OPEN_WINDOW_TTL = 60
+
+
+class WindowError(ValueError):
+    """Unparseable or out-of-range window parameters"""
+
+
+Window = namedtuple('Window', ['start', 'end', 'granularity'])
+
+
+def floor(moment, granularity):
+    """Start of the bucket containing `moment`"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if granularity == 'week':
+        return moment - timedelta(days=moment.weekday())
+    if granularity == 'month':
+        return moment.replace(day=1)
+    return moment
+
+
+def shift(moment, granularity, buckets):
+    """Bucket start `buckets` buckets away from bucket start `moment`"""
+    if granularity == 'month':
+        return datetime.combine(add_months(moment.date(), buckets), datetime.min.time())
+    step = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+    return moment + step[granularity] * buckets
+
+
+def bucket_count(window):
+    if window.granularity == 'month':
+        return (window.end.year - window.start.year) * 12 + window.end.month - window.start.month
+    step = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+    return (window.end - window.start) // step[window.granularity]
+
+
+def parse_time(value, name):
+    """Naive datetime in ROLLUP_TZ from an ISO date or datetime (with or without an offset)"""
+    try:
+        if len(value) == 10:
+            return datetime.combine(date.fromisoformat(value), datetime.min.time())
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise WindowError(f"{name} must be an ISO date or datetime, got {value!r}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(ROLLUP_TZ).replace(tzinfo=None)
+    return moment
+
+
+def parse_window(args, default_granularity, default_buckets, allowed=GRANULARITIES, now=None):
+    """Normalized Window from request args (?from=&to=&granularity=)"""
+    granularity = args.get('granularity', default_granularity)
+    if granularity not in allowed:
+        raise WindowError(f"granularity must be one of: {', '.join(allowed)}")
+    to = parse_time(args['to'], 'to') if args.get('to') else (now or datetime.now())
+    end = shift(floor(to, granularity), granularity, 1)
+    if args.get('from'):
+        start = floor(parse_time(args['from'], 'from'), granularity)
+    else:
+        start = shift(end, granularity, -default_buckets)
+    window = Window(start, end, granularity)
+    if start >= end:
+        raise WindowError("from must be before to")
+    if bucket_count(window) > MAX_BUCKETS[granularity]:
+        raise WindowError(f"At most {MAX_BUCKETS[granularity]} {granularity} buckets per request")
+    return window
+
+
+def cache_ttl(window, now=None):
+    closed = window.end <= floor(now or datetime.now(), 'hour')
+    return CLOSED_WINDOW_TTL if closed else OPEN_WINDOW_TTL
+
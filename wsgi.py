@@ -0,0 +1,91 @@
+"""
+WSGI entry point for production serving
+
+gunicorn.conf.py loads this once in the master (preload_app): the app, the SQL
+registry and the graph/company snapshot indexes are built there and shared
+copy-on-write by every forked worker. Database connections are never shared:
+each worker drops whatever pools it inherited and opens its own.
+
+SIGHUP to the master re-reads .env, reloads the snapshots and replaces the
+workers one by one while the listening socket stays open. Code changes need a
+restart (./stop.sh && ./start.sh), since workers fork from the preloaded code.
+
+/metrics covers every worker: each one writes its registry to a directory the
+master creates at startup, and a scrape sums them (see metrics.share).
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import gc
+import shutil
+import tempfile
+
+from dotenv import load_dotenv
+
+import metrics
+from app import create_app
+from company_search import company_search
+from graph_index import graph_index
+from query_engine import reset_pools, warm_pools
+
+SNAPSHOT_INDEXES = [graph_index, company_search]
+
+app = create_app()
+
+
+def start():
+    """Master startup: one metrics directory for this server's workers, past and present"""
+    metrics.share(tempfile.mkdtemp(prefix='dashboard-metrics-'))
+
+
+def stop():
+    shutil.rmtree(metrics.shared_dir() or '', ignore_errors=True)
+
+
+def preload():
+    """Load the snapshot indexes in the master so workers start with them"""
+    for index in SNAPSHOT_INDEXES:
+        try:
+            snapshot = index.load()
+            print(f"✓ {index.name} loaded in {snapshot['load_ms']}ms")
+        except Exception as e:
+            # Workers load it on first use instead
+            print(f"✗ {index.name} not preloaded: {str(e).strip().splitlines()[0]}")
+    # Keep preloaded objects out of the collector so it doesn't copy their pages into every worker
+    gc.freeze()
+    metrics.flush()  # Queries run while preloading
+
+
+def after_fork():
+    """Per-worker state: fresh connection pools, reload locks and metrics file"""
+    reset_pools()
+    metrics.after_fork()
+    for index in SNAPSHOT_INDEXES:
+        index.after_fork()
+
+
+def warm_up():
+    """Open each worker's first connections before it takes requests"""
+    for target, error in warm_pools().items():
+        print(f"✗ {target} pool not warmed: {error}")
+
+
+def worker_exit():
+    """Keep the worker's final counts in the shared metrics"""
+    metrics.flush()
+
+
+def child_exit(pid):
+    """Master, after a worker exited (or was killed): fold its metrics into the retired file"""
+    try:
+        metrics.retire(pid)
+    except OSError as e:
+        print(f"✗ Metrics of worker {pid} not retired: {e}")
+
+
+def reload():
+    """SIGHUP: pick up .env changes and fresh snapshots for the next generation of workers"""
+    load_dotenv(override=True)
+    gc.unfreeze()
+    preload()